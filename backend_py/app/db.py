@@ -3,10 +3,18 @@ from dotenv import load_dotenv
 
 # Ensure environment variables are loaded before reading them below
 load_dotenv()
+import threading
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import MongoClient
+from pymongo.database import Database
+from .services.metrics import mongo_listeners
 
 _client: AsyncIOMotorClient | None = None
 _db: AsyncIOMotorDatabase | None = None
+# Synchronous client for code running in worker threads (e.g. caches used by the summarizer)
+_sync_client: MongoClient | None = None
+_sync_db: Database | None = None
+_sync_lock = threading.Lock()
 
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://127.0.0.1:27017/meeting-notes-summarizer")
 DB_NAME = os.getenv("MONGO_DB", "meeting-notes-summarizer")
@@ -15,20 +23,48 @@ async def connect_db():
     global _client, _db
     if _client is not None:
         return
-    _client = AsyncIOMotorClient(MONGO_URI)
+    _client = AsyncIOMotorClient(MONGO_URI, event_listeners=mongo_listeners())
     # Avoid boolean evaluation of Database objects; handle absence of default db
     try:
         default_db = _client.get_default_database()
     except Exception:
         default_db = None
     _db = default_db if default_db is not None else _client[DB_NAME]
+    await ensure_indexes()
+
+
+async def ensure_indexes():
+    # Keyset pagination for the meetings listing (sort: createdAt desc, _id desc)
+    try:
+        await _db["meetings"].create_index([("createdAt", -1), ("_id", -1)], name="createdAt_id_desc")
+    except Exception as e:
+        print(f"[db] failed to create indexes: {e}")
+
 
 async def close_db():
-    global _client
+    global _client, _sync_client, _sync_db
     if _client is not None:
         _client.close()
         _client = None
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client = None
+        _sync_db = None
 
 def db() -> AsyncIOMotorDatabase:
     assert _db is not None, "DB not initialized"
     return _db
+
+
+def sync_db() -> Database:
+    global _sync_client, _sync_db
+    if _sync_db is None:
+        with _sync_lock:
+            if _sync_db is None:
+                _sync_client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=2000, event_listeners=mongo_listeners())
+                try:
+                    default_db = _sync_client.get_default_database()
+                except Exception:
+                    default_db = None
+                _sync_db = default_db if default_db is not None else _sync_client[DB_NAME]
+    return _sync_db
@@ -1,4 +1,5 @@
 import os
+import asyncio
 from pathlib import Path
 from dotenv import load_dotenv, find_dotenv
 
@@ -15,15 +16,25 @@ else:
 
 print(f".env load status: {'OK' if loaded else 'NOT FOUND'}; path tried: {explicit_env}")
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from .routes import router
-from .db import connect_db, close_db
+from .db import connect_db, close_db, db
+from .services.jobs import get_queue
+from .services.mailer import get_mail_queue, close_pool, mail_stats, MAIL_DRAIN_SECONDS
+from .services.cache import cache_stats
+from .services.embedding_codec import migrate_legacy_embeddings
+from .services.vector_store import get_store, reconcile_with_db, snapshot_periodically, DEFAULT_DIM
+from .services import metrics
+from .services.metrics import MetricsMiddleware, METRICS_ENABLED
+from .services.ratelimit import RateLimitedError, limiter_stats
 
 PORT = int(os.getenv("PORT", "4000"))
 CORS_ORIGIN = os.getenv("CORS_ORIGIN", "http://localhost:3000")
 
 app = FastAPI(title="meeting-notes-summarizer")
+_background_tasks: list = []
 
 app.add_middleware(
     CORSMiddleware,
@@ -31,14 +42,92 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+
+def _collect_app_metrics():
+    """Scrape-time gauges: cache effectiveness, vector index and queue sizes."""
+    caches = cache_stats()
+    yield "app_cache_lookups_total", "counter", "Cache lookups by cache and result", [
+        ({"cache": name, "result": result}, s[field])
+        for name, s in caches.items()
+        for result, field in (("hit_memory", "hitsMemory"), ("hit_persistent", "hitsPersistent"), ("miss", "misses"))
+    ]
+    yield "app_cache_hit_ratio", "gauge", "Cache hit ratio since startup", [({"cache": n}, s["hitRate"]) for n, s in caches.items()]
+    yield "app_cache_entries", "gauge", "Entries in the in-memory cache tier", [({"cache": n}, s["size"]) for n, s in caches.items()]
+    store = get_store(DEFAULT_DIM)
+    if store.use_pinecone:
+        buf = store.stats()["writeBuffer"]
+        yield "app_vector_pending_writes", "gauge", "Pinecone operations buffered or in flight", [({}, sum(buf["pending"].values()) + buf["inflight"])]
+        yield "app_vector_flushed_total", "counter", "Pinecone operations written by the write-behind buffer", [
+            ({"op": "upsert"}, buf["flushedUpserts"]), ({"op": "delete"}, buf["flushedDeletes"])]
+    else:
+        yield "app_vector_index_size", "gauge", "Live vectors in the local index", [({"scope": s}, store.size(s)) for s in ("title", "summary")]
+    mail = mail_stats()
+    yield "app_job_queue_pending", "gauge", "Jobs waiting in the in-process queues", [
+        ({"queue": "jobs"}, get_queue().stats()["pending"]), ({"queue": "mail"}, mail["queue"]["pending"])]
+    if mail["pool"]:
+        yield "app_smtp_connections_opened_total", "counter", "SMTP connections opened by the pool", [({}, mail["pool"]["opened"])]
+
+
+metrics.register_collector(_collect_app_metrics)
+
+
+@app.exception_handler(RateLimitedError)
+async def rate_limited(request: Request, exc: RateLimitedError):
+    """Gemini quota exhausted after retries: tell the client when to try again."""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, int(exc.retry_after)))},
+    )
 
 @app.on_event("startup")
 async def on_startup():
     await connect_db()
+    await get_queue().start()
+    await get_mail_queue().start()
+    # Convert legacy list embeddings to packed Binary in the background
+    _background_tasks.append(asyncio.create_task(_migrate_embeddings()))
+    # Load the local vector index snapshot, then repair it from Mongo without delaying startup
+    try:
+        store = get_store(DEFAULT_DIM)
+        store.load()
+    except Exception as e:
+        print(f"[vector_store] failed to load snapshot: {e}")
+    else:
+        _background_tasks.append(asyncio.create_task(reconcile_with_db(store)))
+        _background_tasks.append(asyncio.create_task(snapshot_periodically(store)))
+
+async def _migrate_embeddings():
+    try:
+        await migrate_legacy_embeddings(db()["meetings"])
+    except Exception as e:
+        print(f"[embeddings] migration failed: {e}")
 
 @app.on_event("shutdown")
 async def on_shutdown():
+    await get_queue().stop()
+    # Give queued mail a short grace period before dropping it
+    if not await get_mail_queue().drain(MAIL_DRAIN_SECONDS):
+        print("[mail] shutdown with undelivered messages")
+    await get_mail_queue().stop()
+    await close_pool()
+    for t in _background_tasks:
+        t.cancel()
+    try:
+        # Pinecone: send buffered upserts/deletes before exiting
+        if not await asyncio.to_thread(get_store(DEFAULT_DIM).close):
+            print("[vector_store] shutdown with unsent Pinecone writes")
+    except Exception as e:
+        print(f"[vector_store] failed to flush Pinecone writes: {e}")
+    try:
+        get_store(DEFAULT_DIM).save_if_dirty()
+    except Exception as e:
+        print(f"[vector_store] failed to save snapshot: {e}")
     await close_db()
 
 @app.get("/api/health")
@@ -46,6 +135,31 @@ async def health():
     from datetime import datetime
     return {"ok": True, "service": "meeting-notes-summarizer", "time": datetime.utcnow().isoformat()}
 
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    return cache_stats()
+
+@app.get("/api/mail/stats")
+async def get_mail_stats():
+    return mail_stats()
+
+@app.get("/api/ratelimit/stats")
+async def get_ratelimit_stats():
+    """Per-model adaptive concurrency limit, calls in flight, throttled responses and retries."""
+    return limiter_stats()
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text exposition format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/vector/stats")
+async def get_vector_stats():
+    try:
+        return get_store(DEFAULT_DIM).stats()
+    except Exception as e:
+        return {"error": str(e)}
+
 app.include_router(router, prefix="/api/meetings")
 
 if __name__ == "__main__":
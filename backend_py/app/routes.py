@@ -1,14 +1,28 @@
 import os
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from fastapi.responses import JSONResponse
+import json
+import base64
+import codecs
+import tempfile
+import asyncio
+import weakref
+import threading
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from bson import ObjectId
 from typing import Optional, List
 from .db import db
-from .services.summarizer import summarize
-from .services.mailer import send_email
-from .services.embeddings import embed_texts
+from .services.summarizer import summarize, stream_summary, append_ai_summary
+from .services.extractive import extractive_summary
+from .services.mailer import enqueue_email, get_mail_queue
+from .services.embeddings import aembed_texts
 from .services.vector_store import get_store
-import markdown as md
+from .services.jobs import get_queue, QueueFullError, Job
+from .services.importer import meeting_document, iter_archive, import_meetings, utf8_exceeds
+from .services.embedding_codec import EMBEDDING_FIELDS, pack_embedding, embedding_to_list
+from .services.render import render_summary, summary_hash, stored_html
+from .services import metrics
+from .services.ratelimit import RateLimitedError
 from pymongo import ReturnDocument
 
 router = APIRouter()
@@ -23,12 +37,53 @@ def oid(id_str: str) -> ObjectId:
         raise HTTPException(status_code=400, detail="Invalid id")
 
 
+def _public(d: dict) -> dict:
+    """Prepare a meeting document for JSON: stringify the id and decode packed embeddings."""
+    d["_id"] = str(d["_id"])  # ensure stringified id for frontend
+    d.pop("summaryState", None)  # internal incremental-summary state
+    for f in EMBEDDING_FIELDS:
+        if f in d:
+            d[f] = embedding_to_list(d[f])
+    return d
+
+
+# Heavy fields left out of listings unless requested with ?fields=
+LIST_EXCLUDED_FIELDS = ("transcriptText", "titleEmbedding", "summaryEmbedding", "summaryHtml", "summaryState")
+LIST_PAGE_SIZE = int(os.getenv("MEETINGS_PAGE_SIZE", "100"))
+LIST_MAX_PAGE_SIZE = int(os.getenv("MEETINGS_MAX_PAGE_SIZE", "500"))
+
+
+def _encode_cursor(d: dict) -> str:
+    raw = json.dumps({"t": d["createdAt"].isoformat(), "i": str(d["_id"])})
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> dict:
+    from datetime import datetime
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        created, last_id = datetime.fromisoformat(raw["t"]), ObjectId(raw["i"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # Keyset condition for sort (createdAt desc, _id desc)
+    return {"$or": [{"createdAt": {"$lt": created}}, {"createdAt": created, "_id": {"$lt": last_id}}]}
+
+
 @router.get("/")
-async def list_meetings():
+async def list_meetings(response: Response, limit: Optional[int] = None, cursor: Optional[str] = None, fields: Optional[str] = None):
+    """Newest meetings first. Pass the X-Next-Cursor response header back as ?cursor= for the next page.
+    Transcripts and embeddings are omitted unless named in ?fields= (comma-separated)."""
+    page = max(1, min(limit or LIST_PAGE_SIZE, LIST_MAX_PAGE_SIZE))
+    wanted = {f.strip() for f in (fields or "").split(",") if f.strip()}
+    projection = {f: 0 for f in LIST_EXCLUDED_FIELDS if f not in wanted}
+    query = _decode_cursor(cursor) if cursor else {}
     items = []
-    async for d in db()[COLLECTION].find().sort("createdAt", -1).limit(100):
-        d["_id"] = str(d["_id"])  # ensure stringified id for frontend
-        items.append(d)
+    last = None
+    async for d in db()[COLLECTION].find(query, projection=projection or None).sort([("createdAt", -1), ("_id", -1)]).limit(page):
+        last = {"_id": d["_id"], "createdAt": d["createdAt"]}
+        items.append(_public(d))
+    if last is not None and len(items) == page:
+        response.headers["X-Next-Cursor"] = _encode_cursor(last)
     return items
 
 
@@ -39,7 +94,9 @@ async def semantic_search(q: str, scope: str = "both", limit: int = 10):
         raise HTTPException(status_code=400, detail="Invalid scope")
     # Embed query
     try:
-        q_emb = embed_texts([q or " "])[0]
+        q_emb = (await aembed_texts([q or " "]))[0]
+    except RateLimitedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=503, detail="Embeddings not configured. Set GOOGLE_API_KEY in backend .env.")
     dim = len(q_emb) if isinstance(q_emb, list) else 768
@@ -61,8 +118,7 @@ async def semantic_search(q: str, scope: str = "both", limit: int = 10):
     # Fetch docs
     items = []
     async for d in db()[COLLECTION].find({"_id": {"$in": ids}}):
-        d["_id"] = str(d["_id"]) 
-        items.append(d)
+        items.append(_public(d))
     # Maintain ranking order
     order = {i: idx for idx, (i, _) in enumerate(ranked)}
     items.sort(key=lambda d: order.get(d["_id"], 1e9))
@@ -74,52 +130,58 @@ async def get_meeting(id: str):
     d = await db()[COLLECTION].find_one({"_id": oid(id)})
     if not d:
         raise HTTPException(status_code=404, detail="Not found")
-    d["_id"] = str(d["_id"])
-    return d
+    return _public(d)
 
 
-@router.post("/summarize")
-async def create_summary(
-    title: Optional[str] = Form(None),
-    instructions: Optional[str] = Form(None),
-    text: Optional[str] = Form(None),
-    file: Optional[UploadFile] = File(None),
-):
-    transcript_text = text or ""
-    if not transcript_text and file is not None:
-        # Best-effort assume text/plain
-        b = await file.read()
-        transcript_text = b.decode("utf-8", errors="ignore")
+# Uploads are read and decoded in chunks; larger transcripts are rejected with 413
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(64 * 1024)))
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
 
-    if not transcript_text.strip():
-        raise HTTPException(status_code=400, detail="No transcript text provided")
 
-    s = summarize(transcript_text, instructions)
-    from datetime import datetime
+async def _read_upload(file: UploadFile) -> str:
+    """Decode an uploaded transcript chunk by chunk (UTF-8, invalid bytes dropped), enforcing UPLOAD_MAX_BYTES."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    parts: List[str] = []
+    size = 0
+    while True:
+        b = await file.read(UPLOAD_CHUNK_BYTES)
+        if not b:
+            break
+        size += len(b)
+        if size > UPLOAD_MAX_BYTES:
+            raise HTTPException(status_code=413, detail=f"Transcript exceeds {UPLOAD_MAX_BYTES} bytes")
+        parts.append(decoder.decode(b))
+    parts.append(decoder.decode(b"", final=True))
+    return "".join(parts)
+
+
+async def _summarize_and_store(title: Optional[str], instructions: Optional[str], transcript_text: str) -> dict:
+    """Summarize, embed and persist a meeting. Blocking LLM/embedding calls run in worker threads."""
+    s = await asyncio.to_thread(summarize, transcript_text, instructions)
+    return await _store_meeting(title, instructions, transcript_text, s)
 
+
+async def _store_meeting(title: Optional[str], instructions: Optional[str], transcript_text: str, s: str) -> dict:
+    """Embed and persist a summarized meeting, then index its vectors."""
     # Compute embeddings for title and summary (best-effort)
     title_emb = summary_emb = None
     try:
-        embs = embed_texts([title or "", s or ""])  # may raise if GOOGLE_API_KEY missing
+        embs = await aembed_texts([title or "", s or ""])  # may raise if GOOGLE_API_KEY missing
         title_emb, summary_emb = embs[0], embs[1]
-    except Exception:
-        # Skip embeddings silently; search will be unavailable until configured
-        pass
+    except RateLimitedError:
+        # Quota exhausted: answer 429 like summarize() does; the summary is cached, so a retry
+        # does not call the model again
+        print("[embeddings] rate limited while embedding a new meeting; not saved")
+        raise
+    except Exception as e:
+        # Save without embeddings; search will be unavailable until configured
+        print(f"[embeddings] saving meeting without embeddings: {e}")
 
-    doc = {
-        "title": title,
-        "transcriptText": transcript_text,
-        "instructions": instructions,
-        "summary": s,
-        **({"titleEmbedding": title_emb} if title_emb is not None else {}),
-        **({"summaryEmbedding": summary_emb} if summary_emb is not None else {}),
-        "recipients": [],
-        "createdAt": datetime.utcnow(),
-        "updatedAt": datetime.utcnow(),
-    }
-    result = await db()[COLLECTION].insert_one(doc)
+    doc = meeting_document(title, instructions, transcript_text, s, title_emb, summary_emb)
+    with metrics.span("db.insert"):
+        result = await db()[COLLECTION].insert_one(doc)
     saved = await db()[COLLECTION].find_one({"_id": result.inserted_id})
-    saved["_id"] = str(saved["_id"])
+    _public(saved)
     # Upsert into vector store if embeddings computed
     if isinstance(summary_emb, list) and isinstance(title_emb, list):
         dim = len(summary_emb) or len(title_emb)
@@ -129,6 +191,178 @@ async def create_summary(
     return saved
 
 
+async def _read_transcript(text: Optional[str], file: Optional[UploadFile]) -> str:
+    transcript_text = text or ""
+    if utf8_exceeds(transcript_text, UPLOAD_MAX_BYTES):
+        raise HTTPException(status_code=413, detail=f"Transcript exceeds {UPLOAD_MAX_BYTES} bytes")
+    if not transcript_text and file is not None:
+        # Best-effort assume text/plain
+        transcript_text = await _read_upload(file)
+
+    if not transcript_text.strip():
+        raise HTTPException(status_code=400, detail="No transcript text provided")
+    return transcript_text
+
+
+@router.post("/summarize")
+async def create_summary(
+    title: Optional[str] = Form(None),
+    instructions: Optional[str] = Form(None),
+    text: Optional[str] = Form(None),
+    file: Optional[UploadFile] = File(None),
+    mode: Optional[str] = Form(None),
+):
+    transcript_text = await _read_transcript(text, file)
+
+    # mode=async: enqueue and return a job id immediately; poll GET /jobs/{id} for the result
+    if (mode or "").lower() == "async":
+        try:
+            job = get_queue().submit(
+                lambda job: _summarize_and_store(title, instructions, transcript_text), kind="summarize"
+            )
+        except QueueFullError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        return JSONResponse(status_code=202, content=job.to_dict())
+
+    return await _summarize_and_store(title, instructions, transcript_text)
+
+
+# Archives are spooled to a temporary file so the import job can read them after the request ends
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(512 * 1024 * 1024)))
+
+
+async def _spool_upload(file: UploadFile) -> str:
+    fd, path = tempfile.mkstemp(prefix="import_", suffix=os.path.splitext(file.filename or "")[1])
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                b = await file.read(UPLOAD_CHUNK_BYTES)
+                if not b:
+                    break
+                size += len(b)
+                if size > IMPORT_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail=f"Archive exceeds {IMPORT_MAX_BYTES} bytes")
+                out.write(b)
+    except BaseException:
+        os.remove(path)
+        raise
+    if not size:
+        os.remove(path)
+        raise HTTPException(status_code=400, detail="Empty archive")
+    return path
+
+
+async def _run_import(job: Job, path: str, filename: Optional[str], instructions: Optional[str]) -> dict:
+    try:
+        return await import_meetings(iter_archive(path, filename), instructions, progress=job.progress)
+    finally:
+        os.remove(path)
+
+
+@router.post("/import")
+async def import_archive(file: UploadFile = File(...), instructions: Optional[str] = Form(None)):
+    """
+    Bulk import a ZIP of transcripts (.txt/.md/.vtt/.srt files, or .json/.jsonl meeting objects) or a
+    JSONL file of {"title", "text", "instructions"} lines. Runs as a background job; poll
+    GET /jobs/{id} for progress and per-item failures. `instructions` applies to items without their own.
+    """
+    path = await _spool_upload(file)
+    try:
+        name = file.filename
+        job = get_queue().submit(lambda job: _run_import(job, path, name, instructions), kind="import")
+    except QueueFullError as e:
+        os.remove(path)
+        raise HTTPException(status_code=503, detail=str(e))
+    return JSONResponse(status_code=202, content=job.to_dict())
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _iterate_in_thread(gen_fn, *args):
+    """Run a blocking generator in a worker thread and yield its items on the event loop.
+    Stops the producer at its next item if the consumer goes away (e.g. client disconnect)."""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in gen_fn(*args):
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, ("item", item))
+        except BaseException as e:
+            loop.call_soon_threadsafe(queue.put_nowait, ("error", e))
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, ("end", None))
+
+    loop.run_in_executor(None, metrics.bind(produce))
+    try:
+        while True:
+            kind, value = await queue.get()
+            if kind == "end":
+                break
+            if kind == "error":
+                raise value
+            yield value
+    finally:
+        stop.set()
+
+
+async def _summary_events(title: Optional[str], instructions: Optional[str], transcript_text: str):
+    parts: List[str] = []
+    try:
+        async for event, data in _iterate_in_thread(stream_summary, transcript_text, instructions):
+            if event == "token":
+                parts.append(data["text"])
+            yield _sse(event, data)
+        saved = await _store_meeting(title, instructions, transcript_text, "".join(parts))
+    except Exception as e:
+        yield _sse("error", {"detail": str(e)})
+        return
+    yield _sse("done", jsonable_encoder(saved))
+
+
+@router.post("/summarize/stream")
+async def create_summary_stream(
+    title: Optional[str] = Form(None),
+    instructions: Optional[str] = Form(None),
+    text: Optional[str] = Form(None),
+    file: Optional[UploadFile] = File(None),
+):
+    """Server-sent events: `progress` per finished chunk, `token` as the summary streams,
+    then `done` with the saved meeting (or `error`). Nothing is saved if the client disconnects."""
+    transcript_text = await _read_transcript(text, file)
+    return StreamingResponse(
+        _summary_events(title, instructions, transcript_text),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _queues():
+    return (get_queue(), get_mail_queue())
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = next((j for j in (q.get(job_id) for q in _queues()) if j is not None), None)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    job = next((j for j in (q.cancel(job_id) for q in _queues()) if j is not None), None)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
 @router.put("/{id}")
 async def update_meeting(id: str, body: dict):
     allowed = {k: v for k, v in body.items() if k in {"title", "summary", "instructions"}}
@@ -137,36 +371,138 @@ async def update_meeting(id: str, body: dict):
     from datetime import datetime
 
     allowed["updatedAt"] = datetime.utcnow()
+    new_embs: dict = {}
     # If title or summary updated, recompute embeddings
     if any(k in allowed for k in ("title", "summary")):
         # fetch original to know final values
-        current = await db()[COLLECTION].find_one({"_id": oid(id)})
+        current = await db()[COLLECTION].find_one(
+            {"_id": oid(id)},
+            projection={"title": 1, "summary": 1, "summaryHash": 1, "titleEmbedding": 1, "summaryEmbedding": 1},
+        )
         if not current:
             raise HTTPException(status_code=404, detail="Not found")
-        new_title = allowed.get("title", current.get("title") or "")
-        new_summary = allowed.get("summary", current.get("summary") or "")
-        try:
-            t_emb, s_emb = embed_texts([new_title, new_summary])
-            allowed["titleEmbedding"] = t_emb
-            allowed["summaryEmbedding"] = s_emb
-        except Exception:
-            # Leave embeddings unchanged if unavailable
-            pass
+        # Re-render the stored HTML only when the summary text actually changed
+        if "summary" in allowed and current.get("summaryHash") != summary_hash(allowed["summary"]):
+            allowed.update(render_summary(allowed["summary"]))
+        # Only re-embed fields whose text actually changed (or that have no stored embedding)
+        stale = {}
+        for field, emb_field in (("title", "titleEmbedding"), ("summary", "summaryEmbedding")):
+            new_value = allowed.get(field, current.get(field) or "")
+            if new_value != (current.get(field) or "") or not current.get(emb_field):
+                stale[emb_field] = new_value or ""
+        if stale:
+            try:
+                embs = await aembed_texts(list(stale.values()))
+                new_embs = dict(zip(stale.keys(), embs))
+                allowed.update({k: pack_embedding(v) for k, v in new_embs.items()})
+            except Exception:
+                # Leave embeddings unchanged if unavailable
+                pass
 
     res = await db()[COLLECTION].find_one_and_update(
         {"_id": oid(id)}, {"$set": allowed}, return_document=ReturnDocument.AFTER
     )
     if not res:
         raise HTTPException(status_code=404, detail="Not found")
-    res["_id"] = str(res["_id"])
+    _public(res)
     # Upsert vectors if present
-    if isinstance(allowed.get("summaryEmbedding"), list) or isinstance(allowed.get("titleEmbedding"), list):
-        dim = len((allowed.get("summaryEmbedding") or allowed.get("titleEmbedding") or [])) or 768
+    if new_embs:
+        dim = len(next(iter(new_embs.values()))) or 768
         store = get_store(dim)
-        if "titleEmbedding" in allowed and isinstance(allowed["titleEmbedding"], list):
-            store.upsert("title", res["_id"], allowed["titleEmbedding"]) 
-        if "summaryEmbedding" in allowed and isinstance(allowed["summaryEmbedding"], list):
-            store.upsert("summary", res["_id"], allowed["summaryEmbedding"]) 
+        if "titleEmbedding" in new_embs:
+            store.upsert("title", res["_id"], new_embs["titleEmbedding"])
+        if "summaryEmbedding" in new_embs:
+            store.upsert("summary", res["_id"], new_embs["summaryEmbedding"])
+    return res
+
+
+# Appends to one meeting run one at a time in this process; the transcriptChars filter on the
+# write catches appends from other processes
+_append_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+@router.post("/{id}/append")
+async def append_transcript(
+    id: str,
+    text: Optional[str] = Form(None),
+    file: Optional[UploadFile] = File(None),
+    instructions: Optional[str] = Form(None),
+):
+    """Append a transcript segment (e.g. from live transcription) and update the summary
+    incrementally: stored partial summaries are reused and only the new text is summarized
+    before the final synthesis. Returns the meeting without its transcript."""
+    segment = await _read_transcript(text, file)
+    _id = oid(id)
+    lock = _append_locks.setdefault(id, asyncio.Lock())
+    async with lock:
+        coll = db()[COLLECTION]
+        current = await coll.find_one({"_id": _id}, projection={"instructions": 1, "transcriptChars": 1, "summaryState": 1})
+        if not current:
+            raise HTTPException(status_code=404, detail="Not found")
+        instr = (instructions or current.get("instructions") or "").strip()
+        if not instr:
+            raise HTTPException(status_code=400, detail="No instructions provided")
+        expected = current.get("transcriptChars")
+        state = current.get("summaryState")
+        transcript = None
+        if not state or expected is None or state.get("transcriptChars") != expected:
+            # No state for this transcript (created before incremental summaries, or a fallback
+            # summary): chunking starts over from the stored transcript once
+            full = await coll.find_one({"_id": _id}, projection={"transcriptText": 1})
+            transcript = (full or {}).get("transcriptText") or ""
+            state = None
+        base_chars = len(transcript) if transcript is not None else expected
+
+        try:
+            s, state = await asyncio.to_thread(append_ai_summary, state, segment, instr, transcript)
+        except RateLimitedError:
+            raise
+        except Exception:
+            # Same fallback as summarize(): heuristic summary of the whole transcript; the state is dropped
+            if transcript is None:
+                full = await coll.find_one({"_id": _id}, projection={"transcriptText": 1})
+                transcript = (full or {}).get("transcriptText") or ""
+            joined = f"{transcript}\n{segment}" if transcript else segment
+            s, state = await asyncio.to_thread(extractive_summary, joined, instr), None
+
+        sep = "\n" if base_chars else ""
+        new_chars = base_chars + len(sep) + len(segment)
+        if state is not None:
+            state["transcriptChars"] = new_chars
+        from datetime import datetime
+
+        fields = {
+            "summary": s,
+            **render_summary(s),
+            "summaryState": state,
+            "transcriptChars": new_chars,
+            "instructions": instr,
+            "updatedAt": datetime.utcnow(),
+        }
+        summary_emb = None
+        try:
+            summary_emb = (await aembed_texts([s]))[0]
+            fields["summaryEmbedding"] = pack_embedding(summary_emb)
+        except Exception:
+            # Leave the embedding unchanged if unavailable
+            pass
+
+        # Pipeline update so only the segment is sent; $literal keeps "$..." text from being read as a field path
+        update = [{"$set": {
+            "transcriptText": {"$concat": [{"$ifNull": ["$transcriptText", ""]}, {"$literal": sep + segment}]},
+            **{k: {"$literal": v} for k, v in fields.items()},
+        }}]
+        res = await coll.find_one_and_update(
+            {"_id": _id, "transcriptChars": expected}, update,
+            projection={"transcriptText": 0}, return_document=ReturnDocument.AFTER,
+        )
+    if not res:
+        if await coll.find_one({"_id": _id}, projection={"_id": 1}) is None:
+            raise HTTPException(status_code=404, detail="Not found")
+        raise HTTPException(status_code=409, detail="Transcript was appended to concurrently; retry")
+    _public(res)
+    if isinstance(summary_emb, list):
+        get_store(len(summary_emb) or 768).upsert("summary", res["_id"], summary_emb)
     return res
 
 
@@ -186,9 +522,12 @@ async def email_summary(id: str, body: dict):
     if provided_html and isinstance(provided_html, str) and provided_html.strip():
         html = provided_html
     else:
-        # Convert Markdown summary to HTML for styled emails
-        summary_md = item.get("summary", "")
-        summary_html = md.markdown(summary_md, extensions=["extra", "sane_lists"])
+        # Rendered when the summary was saved; older documents are rendered once here and backfilled
+        summary_html = stored_html(item)
+        if summary_html is None:
+            rendered = render_summary(item.get("summary", ""))
+            summary_html = rendered["summaryHtml"]
+            await db()[COLLECTION].update_one({"_id": item["_id"], "summary": item.get("summary")}, {"$set": rendered})
         html = (
             f"<div style='font-family:Inter,Segoe UI,Arial,sans-serif;line-height:1.6;color:#111827'>"
             f"<h2 style='margin:0 0 12px;font-size:20px'>{subj}</h2>"
@@ -196,15 +535,24 @@ async def email_summary(id: str, body: dict):
             f"</div>"
         )
 
-    try:
-        info = await send_email(to=to, subject=subj, text=item.get("summary", ""), html=html)
-        # Update recipients history
-        merged = sorted(list(set([*(item.get("recipients", [])), *to])))
+    async def record_recipients(info: dict):
+        # Runs once the SMTP server has accepted the message
+        current = await db()[COLLECTION].find_one({"_id": item["_id"]}, projection={"recipients": 1})
+        if current is None:
+            return
+        merged = sorted(list(set([*(current.get("recipients", [])), *to])))
         await db()[COLLECTION].update_one({"_id": item["_id"]}, {"$set": {"recipients": merged}})
-        return {"ok": True, "messageId": info.get("messageId")}
+
+    try:
+        job, message_id = enqueue_email(
+            to=to, subject=subj, text=item.get("summary", ""), html=html, on_sent=record_recipients
+        )
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to send email: {e}")
-
+    # Delivery (with retries) happens in the background; poll GET /jobs/{jobId} for the outcome
+    return JSONResponse(status_code=202, content={"ok": True, "queued": True, "messageId": message_id, "jobId": job.id})
 
 
 @router.delete("/{id}")
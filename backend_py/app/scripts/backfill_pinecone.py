@@ -1,88 +1,245 @@
+"""
+Backfill a vector index from the embeddings stored on meeting documents.
+
+Usage (from backend_py/):
+    python -m app.scripts.backfill_pinecone                        # Pinecone (PINECONE_* settings from .env)
+    python -m app.scripts.backfill_pinecone --backend faiss        # rebuild the local FAISS/NumPy snapshot
+    python -m app.scripts.backfill_pinecone --batch 200 --concurrency 8 --restart
+
+Documents are streamed from a Mongo cursor in `_id` order, one page of `--batch` documents
+at a time, with up to `--concurrency` page upserts in flight. The last `_id` of the longest
+fully-written prefix is checkpointed, so an interrupted run resumes where it stopped (and a
+later run only picks up meetings created since). In local mode the checkpoint is written
+only after the snapshot it describes has been saved.
+"""
 import os
+import json
+import time
 import asyncio
-from typing import List, Tuple
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
 from dotenv import load_dotenv
 
 load_dotenv()
 
+from bson import ObjectId  # type: ignore
 from app.db import connect_db, close_db, db  # type: ignore
-from app.services.vector_store import get_store  # type: ignore
+from app.services.embedding_codec import unpack_embedding  # type: ignore
 
 COLLECTION = "meetings"
 BATCH = 200
+CONCURRENCY = 4
+SCOPES = (("title", "titleEmbedding"), ("summary", "summaryEmbedding"))
+_CACHE_DIR = Path(__file__).resolve().parents[2] / ".cache"
+
+
+def _write_checkpoint(path: str, state: dict):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def _read_checkpoint(path: str, backend: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("backend") != backend:
+        raise SystemExit(f"checkpoint {path} belongs to backend '{state.get('backend')}'; use --restart or another --checkpoint")
+    return state
+
+
+def _page_items(docs: List[dict], dim: Optional[int]) -> Tuple[Dict[str, list], int]:
+    """Decode a page of documents into (id, vector) batches per scope; vectors of the wrong size are skipped."""
+    items: Dict[str, list] = {scope: [] for scope, _ in SCOPES}
+    skipped = 0
+    for d in docs:
+        mid = str(d["_id"])
+        for scope, field in SCOPES:
+            # Accepts packed Binary and legacy list embeddings
+            vec = unpack_embedding(d.get(field))
+            if vec is None or not len(vec):
+                continue
+            if dim is not None and len(vec) != dim:
+                skipped += 1
+                continue
+            items[scope].append((mid, vec))
+    return items, skipped
+
+
+def _first_dim(docs: List[dict]) -> Optional[int]:
+    for d in docs:
+        for _, field in SCOPES:
+            vec = unpack_embedding(d.get(field))
+            if vec is not None and len(vec):
+                return len(vec)
+    return None
+
+
+class Backfill:
+    def __init__(self, args):
+        self.args = args
+        self.backend = args.backend
+        self.local = self.backend != "pinecone"
+        self.store = None
+        self.state = {"backend": self.backend, "dim": args.dim, "lastId": None, "docs": 0, "vectors": 0, "skipped": 0, "complete": False}
+        # Pages finish out of order; only the contiguous prefix of finished pages is checkpointed
+        self.next_seq = 0
+        self.committed_seq = 0
+        self.finished: Dict[int, Tuple[str, int, int, int]] = {}
+        self.pending: Set[asyncio.Task] = set()
+        self.started = time.perf_counter()
+        self.last_save = time.monotonic()
+        self.last_report = time.monotonic()
+        self.run_vectors = 0
+
+    def _open_store(self, dim: int):
+        os.environ["VECTOR_BACKEND"] = self.backend
+        from app.services.vector_store import VectorStore  # type: ignore
+        self.store = VectorStore(dim)
+        if self.local and self.state["lastId"] is not None:
+            # Resuming a local rebuild continues from the snapshot the checkpoint was written after
+            if not self.store.load(self.args.index_dir):
+                raise SystemExit(f"no compatible snapshot in {self.args.index_dir} to resume from; use --restart")
+        print(f"[backfill] backend={self.backend} dim={dim} batch={self.args.batch} concurrency={self.args.concurrency}")
+
+    def _upsert_page(self, items: Dict[str, list]):
+        for scope, batch in items.items():
+            if batch:
+                self.store.bulk_load(scope, batch)
+
+    async def _run_page(self, seq: int, docs: List[dict]):
+        items, skipped = await asyncio.to_thread(_page_items, docs, self.store.dim if self.local else None)
+        await asyncio.to_thread(self._upsert_page, items)
+        count = sum(len(b) for b in items.values())
+        self.finished[seq] = (str(docs[-1]["_id"]), len(docs), count, skipped)
+
+    def _commit(self):
+        advanced = False
+        while self.committed_seq in self.finished:
+            last_id, ndocs, count, skipped = self.finished.pop(self.committed_seq)
+            self.state["lastId"] = last_id
+            self.state["docs"] += ndocs
+            self.state["vectors"] += count
+            self.state["skipped"] += skipped
+            self.run_vectors += count
+            self.committed_seq += 1
+            advanced = True
+        return advanced
+
+    async def _checkpoint(self, force: bool = False):
+        if self.local:
+            # The snapshot must be on disk before the checkpoint that points past it
+            if not force and time.monotonic() - self.last_save < self.args.save_every:
+                return
+            await asyncio.to_thread(self.store.save, self.args.index_dir)
+            self.last_save = time.monotonic()
+        _write_checkpoint(self.args.checkpoint, self.state)
+
+    def _report(self, force: bool = False):
+        if not force and time.monotonic() - self.last_report < self.args.report_every:
+            return
+        self.last_report = time.monotonic()
+        elapsed = time.perf_counter() - self.started
+        rate = self.run_vectors / max(elapsed, 1e-9)
+        print(f"[backfill] {self.state['docs']} docs, {self.state['vectors']} vectors ({rate:.0f} vectors/s), last _id {self.state['lastId']}")
+
+    async def _reap(self, return_when):
+        done, self.pending = await asyncio.wait(self.pending, return_when=return_when)
+        for task in done:
+            task.result()  # re-raise upsert failures; the checkpoint stays at the last good prefix
+        if self._commit():
+            await self._checkpoint()
+            self._report()
+
+    async def _submit(self, docs: List[dict]):
+        if self.store is None:
+            # Dimension: --dim, else the one recorded in the checkpoint, else the first stored vector
+            dim = self.state["dim"] or _first_dim(docs)
+            if dim is None:
+                return
+            self.state["dim"] = dim
+            self._open_store(dim)
+        while len(self.pending) >= self.args.concurrency:
+            await self._reap(asyncio.FIRST_COMPLETED)
+        self.pending.add(asyncio.create_task(self._run_page(self.next_seq, docs)))
+        self.next_seq += 1
+
+    async def run(self):
+        if not self.args.restart:
+            saved = _read_checkpoint(self.args.checkpoint, self.backend)
+            if saved:
+                self.state.update({k: v for k, v in saved.items() if v is not None}, complete=False)
+                print(f"[backfill] resuming after _id {self.state['lastId']} ({self.state['vectors']} vectors already written)")
+        query: dict = {"$or": [{field: {"$type": ["array", "binData"]}} for _, field in SCOPES]}
+        if self.state["lastId"]:
+            query = {"$and": [query, {"_id": {"$gt": ObjectId(self.state["lastId"])}}]}
+        cursor = db()[COLLECTION].find(
+            query, projection={field: 1 for _, field in SCOPES}, sort=[("_id", 1)], batch_size=self.args.batch
+        )
+        page: List[dict] = []
+        try:
+            async for d in cursor:
+                page.append(d)
+                if len(page) >= self.args.batch:
+                    await self._submit(page)
+                    page = []
+            if page:
+                await self._submit(page)
+            if self.pending:
+                await self._reap(asyncio.ALL_COMPLETED)
+        except BaseException:
+            # Let in-flight pages finish so the checkpoint covers everything actually written
+            if self.pending:
+                await asyncio.wait(self.pending)
+                self._commit()
+            if self.store is not None:
+                await self._checkpoint(force=True)
+            raise
+        self.state["complete"] = True
+        if self.store is not None:
+            await self._checkpoint(force=True)
+        else:
+            print("[backfill] no new documents with embeddings found. Nothing to backfill.")
+        elapsed = time.perf_counter() - self.started
+        print(
+            f"[backfill] complete: {self.run_vectors} vectors in {elapsed:.1f}s "
+            f"({self.run_vectors / max(elapsed, 1e-9):.0f} vectors/s); {self.state['vectors']} total, "
+            f"{self.state['skipped']} skipped (dimension mismatch)"
+        )
 
-async def fetch_embedding_docs() -> List[dict]:
-    items: List[dict] = []
-    cursor = db()[COLLECTION].find({
-        "$or": [
-            {"titleEmbedding": {"$type": "array"}},
-            {"summaryEmbedding": {"$type": "array"}}
-        ]
-    }, projection={
-        "titleEmbedding": 1,
-        "summaryEmbedding": 1,
-    })
-    async for d in cursor:
-        d["_id"] = str(d["_id"])  # stringify for vector ids
-        items.append(d)
-    return items
 
 async def main():
-    # VECTOR_BACKEND should be set to pinecone in .env
-    backend = os.getenv("VECTOR_BACKEND", "faiss").lower()
-    if backend != "pinecone":
-        print(f"[WARN] VECTOR_BACKEND is '{backend}'. Set VECTOR_BACKEND=pinecone to backfill Pinecone.")
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backend", default="pinecone",
+                    choices=["pinecone", "faiss"], help="pinecone, or faiss to rebuild the local index snapshot")
+    ap.add_argument("--batch", type=int, default=BATCH, help="documents per upsert page")
+    ap.add_argument("--dim", type=int, help="vector dimension (default: from the checkpoint or the first stored vector)")
+    ap.add_argument("--concurrency", type=int, default=CONCURRENCY, help="page upserts in flight")
+    ap.add_argument("--checkpoint", help="checkpoint file (default backend_py/.cache/backfill_<backend>.json)")
+    ap.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from the first document")
+    ap.add_argument("--index-dir", help="snapshot directory for --backend faiss (default VECTOR_INDEX_DIR)")
+    ap.add_argument("--save-every", type=float, default=30, help="seconds between local snapshots/checkpoints")
+    ap.add_argument("--report-every", type=float, default=5, help="seconds between progress lines")
+    args = ap.parse_args()
+    args.batch = max(1, args.batch)
+    args.concurrency = max(1, args.concurrency)
+    args.checkpoint = args.checkpoint or str(_CACHE_DIR / f"backfill_{args.backend}.json")
+    if args.backend == "faiss":
+        from app.services.vector_store import VECTOR_INDEX_DIR  # type: ignore
+        args.index_dir = args.index_dir or VECTOR_INDEX_DIR
+        if not args.index_dir:
+            raise SystemExit("--backend faiss needs --index-dir or VECTOR_INDEX_DIR")
+
     await connect_db()
     try:
-        docs = await fetch_embedding_docs()
-        if not docs:
-            print("No documents with embeddings found. Nothing to backfill.")
-            return
-        # Determine dimension from first available embedding
-        first_vec = None
-        for d in docs:
-            if isinstance(d.get("summaryEmbedding"), list) and d["summaryEmbedding"]:
-                first_vec = d["summaryEmbedding"]
-                break
-            if isinstance(d.get("titleEmbedding"), list) and d["titleEmbedding"]:
-                first_vec = d["titleEmbedding"]
-                break
-        if not first_vec:
-            print("No embedding vectors found in docs.")
-            return
-        dim = len(first_vec)
-        store = get_store(dim)
-        # Upsert in batches per scope
-        title_batch: List[Tuple[str, List[float]]] = []
-        summary_batch: List[Tuple[str, List[float]]] = []
-        total_title = total_summary = 0
-        for d in docs:
-            mid = d["_id"]
-            t = d.get("titleEmbedding")
-            s = d.get("summaryEmbedding")
-            if isinstance(t, list) and t:
-                title_batch.append((mid, t))
-            if isinstance(s, list) and s:
-                summary_batch.append((mid, s))
-            # Flush in batches
-            if len(title_batch) >= BATCH:
-                store.bulk_load("title", title_batch)
-                total_title += len(title_batch)
-                title_batch.clear()
-            if len(summary_batch) >= BATCH:
-                store.bulk_load("summary", summary_batch)
-                total_summary += len(summary_batch)
-                summary_batch.clear()
-        # Flush remaining
-        if title_batch:
-            store.bulk_load("title", title_batch)
-            total_title += len(title_batch)
-        if summary_batch:
-            store.bulk_load("summary", summary_batch)
-            total_summary += len(summary_batch)
-        print(f"Backfill complete. Upserted {total_title} title vectors and {total_summary} summary vectors to Pinecone.")
+        await Backfill(args).run()
     finally:
         await close_db()
 
+
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,106 @@
+"""
+Recall@k and latency of the ANN index modes against the exact flat index.
+
+Usage (from backend_py/):
+    python -m app.scripts.bench_ann --n 50000 --dim 768 --queries 200 --k 10
+
+Vectors are synthetic and clustered (closer to real embeddings than uniform noise).
+Latency is measured one query at a time, as the search endpoint issues them.
+"""
+import time
+import json
+import argparse
+from typing import List
+
+import numpy as np
+
+from app.services.vector_store import build_index, set_search_params, _to_unit_rows  # type: ignore
+
+
+def make_data(n: int, dim: int, queries: int, clusters: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype("float32")
+    assign = rng.integers(0, clusters, size=n + queries)
+    data = centers[assign] + 0.5 * rng.normal(size=(n + queries, dim)).astype("float32")
+    data = _to_unit_rows(data)
+    return data[:n], data[n:]
+
+
+def time_queries(index, q: np.ndarray, k: int):
+    lat: List[float] = []
+    found = np.empty((len(q), k), dtype="int64")
+    for i in range(len(q)):
+        t0 = time.perf_counter()
+        _, I = index.search(q[i:i + 1], k)
+        lat.append((time.perf_counter() - t0) * 1000)
+        found[i] = I[0]
+    return found, np.array(lat)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    hits = sum(len(set(f.tolist()) & set(t.tolist())) for f, t in zip(found, truth))
+    return hits / (len(truth) * k)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=50000)
+    ap.add_argument("--dim", type=int, default=768)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--clusters", type=int, default=100)
+    ap.add_argument("--ef", default="16,32,64,128,256")
+    ap.add_argument("--nprobe", default="1,4,16,64")
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    xb, xq = make_data(args.n, args.dim, args.queries, args.clusters)
+    ids = np.arange(args.n, dtype="int64")
+    rows = []
+
+    def record(name: str, params: dict, build_s: float, found, lat, truth):
+        row = {
+            "index": name,
+            **params,
+            "buildSeconds": round(build_s, 3),
+            "recall": round(recall_at_k(found, truth), 4) if truth is not None else 1.0,
+            "p50ms": round(float(np.percentile(lat, 50)), 4),
+            "p95ms": round(float(np.percentile(lat, 95)), 4),
+        }
+        rows.append(row)
+        print(f"{name:5s} {json.dumps(params):32s} build={row['buildSeconds']:7.2f}s "
+              f"recall@{args.k}={row['recall']:.4f} p50={row['p50ms']:.3f}ms p95={row['p95ms']:.3f}ms")
+
+    t0 = time.perf_counter()
+    flat = build_index("flat", args.dim)
+    flat.add_with_ids(xb, ids)
+    build_s = time.perf_counter() - t0
+    truth, lat = time_queries(flat, xq, args.k)
+    record("flat", {}, build_s, truth, lat, None)
+
+    t0 = time.perf_counter()
+    hnsw = build_index("hnsw", args.dim)
+    hnsw.add_with_ids(xb, ids)
+    build_s = time.perf_counter() - t0
+    for ef in [int(x) for x in args.ef.split(",") if x]:
+        set_search_params(hnsw, ef_search=ef)
+        found, lat = time_queries(hnsw, xq, args.k)
+        record("hnsw", {"efSearch": ef}, build_s, found, lat, truth)
+
+    t0 = time.perf_counter()
+    ivf = build_index("ivf", args.dim, train=xb)
+    ivf.add_with_ids(xb, ids)
+    build_s = time.perf_counter() - t0
+    for nprobe in [int(x) for x in args.nprobe.split(",") if x]:
+        set_search_params(ivf, nprobe=nprobe)
+        found, lat = time_queries(ivf, xq, args.k)
+        record("ivf", {"nprobe": nprobe, "nlist": ivf.nlist}, build_s, found, lat, truth)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"n": args.n, "dim": args.dim, "k": args.k, "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""
+End-to-end benchmark of the HTTP API, driving `app.main:app` in-process over httpx's ASGI
+transport. Gemini, embeddings, Pinecone and SMTP are replaced by the deterministic fakes in
+`app.scripts.fakes` (latencies configurable), and Mongo by an in-memory collection.
+
+Usage (from backend_py/):
+    python -m app.scripts.bench_api --sizes 100,1000,10000 --requests 200 --concurrency 16 --json bench.json
+    python -m app.scripts.bench_api --vector-backend faiss --ops search,list
+    python -m app.scripts.bench_api --compare before.json after.json
+
+For each corpus size the store is seeded with that many meetings, then each operation
+(summarize, search, list, update, email) is run `--requests` times from `--concurrency`
+clients. Results report throughput and p50/p95/p99 latency, plus how many calls each fake
+service received, and are written as JSON (with the git commit) for comparison across commits.
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+import platform
+import subprocess
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+OPS = ("summarize", "search", "list", "update", "email")
+_WORDS = (
+    "roadmap budget release migration customer backlog sprint deadline risk blocker api latency "
+    "database onboarding pricing launch review design testing infra cost hiring metrics security "
+    "mobile analytics partner support contract renewal forecast quarter".split()
+)
+
+
+def _configure_env(args):
+    """Settings must be in place before the app modules are imported (they read them at import)."""
+    os.environ.update({
+        "GOOGLE_API_KEY": "bench",
+        "GEMINI_API_KEY": "bench",
+        "VECTOR_BACKEND": args.vector_backend,
+        "PINECONE_API_KEY": "bench",
+        "PINECONE_INDEX": "bench",
+        "VECTOR_INDEX_DIR": "",
+        "EMBED_CACHE_PATH": "",
+        "SUMMARY_CACHE_PERSIST": "false",
+        "SMTP_HOST": "bench",
+        "SMTP_PORT": "2525",
+        "SMTP_AUTH": "false",
+        "SMTP_SECURITY": "none",
+        "MAIL_FROM": "bench@example.com",
+        "MAIL_QUEUE_MAX": str(max(500, args.requests * 2)),
+    })
+    # Never pick up real credentials or service URLs from backend_py/.env
+    import dotenv
+    dotenv.load_dotenv = lambda *a, **k: False
+
+
+def _sentence(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choices(_WORDS, k=n))
+
+
+def make_transcript(rng: random.Random, size_chars: int) -> str:
+    lines, size = [], 0
+    while size < size_chars:
+        line = f"[{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}] {rng.choice(['Alice', 'Bob', 'Priya'])}: {_sentence(rng, rng.randint(6, 18))}."
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+
+def percentile(sorted_ms: List[float], p: float) -> float:
+    """Nearest-rank percentile."""
+    if not sorted_ms:
+        return 0.0
+    return sorted_ms[min(len(sorted_ms) - 1, max(0, math.ceil(p / 100 * len(sorted_ms)) - 1))]
+
+
+def seed_corpus(n: int, rng: random.Random, transcript_chars: int) -> List[str]:
+    """Insert `n` meetings (with embeddings and rendered HTML) and index their vectors."""
+    from app.db import db  # type: ignore
+    from app.services.embedding_codec import pack_embedding  # type: ignore
+    from app.services.render import render_summary  # type: ignore
+    from app.services.vector_store import get_store, DEFAULT_DIM  # type: ignore
+    from app.scripts.fakes import fake_embedding  # type: ignore
+    from bson import ObjectId  # type: ignore
+
+    coll = db()["meetings"]
+    base = datetime.utcnow() - timedelta(seconds=n)
+    vectors: Dict[str, list] = {"title": [], "summary": []}
+    ids = []
+    for i in range(n):
+        title = _sentence(rng, 4).title()
+        summary = "\n".join(f"- {_sentence(rng, 10)}" for _ in range(5))
+        t_emb, s_emb = fake_embedding(title), fake_embedding(summary)
+        doc = {
+            "_id": ObjectId(),
+            "title": title,
+            "transcriptText": make_transcript(rng, transcript_chars),
+            "instructions": None,
+            "summary": summary,
+            **render_summary(summary),
+            "titleEmbedding": pack_embedding(t_emb),
+            "summaryEmbedding": pack_embedding(s_emb),
+            "recipients": [],
+            "createdAt": base + timedelta(seconds=i),
+            "updatedAt": base + timedelta(seconds=i),
+        }
+        coll.docs[doc["_id"]] = doc
+        ids.append(str(doc["_id"]))
+        vectors["title"].append((ids[-1], t_emb))
+        vectors["summary"].append((ids[-1], s_emb))
+    store = get_store(DEFAULT_DIM)
+    for scope, items in vectors.items():
+        for i in range(0, len(items), 1000):
+            store.bulk_load(scope, items[i:i + 1000])
+    return ids
+
+
+def _counters(fakes: dict) -> dict:
+    from app.scripts.fakes import FakeGenerativeModel  # type: ignore
+    return {
+        "llmCalls": FakeGenerativeModel.calls,
+        "embedCalls": fakes["genai"].embed_calls,
+        "pineconeRequests": fakes["pinecone"].requests,
+        "smtpSent": fakes["smtp"].sent,
+    }
+
+
+def _request_factory(op: str, ids: List[str], rng: random.Random, args):
+    def build():
+        if op == "summarize":
+            return "POST", "/api/meetings/summarize", {"data": {
+                "title": _sentence(rng, 4).title(),
+                "text": make_transcript(rng, args.summarize_chars),
+                "instructions": "List the action items and decisions",
+            }}
+        if op == "search":
+            return "GET", "/api/meetings/search", {"params": {"q": _sentence(rng, 3), "limit": 10}}
+        if op == "list":
+            return "GET", "/api/meetings/", {"params": {"limit": args.page_size}}
+        if op == "update":
+            summary = "\n".join(f"- {_sentence(rng, 10)}" for _ in range(5))
+            return "PUT", f"/api/meetings/{rng.choice(ids)}", {"json": {"summary": summary}}
+        if op == "email":
+            return "POST", f"/api/meetings/{rng.choice(ids)}/email", {"json": {"to": ["team@example.com"], "subject": "Bench"}}
+        raise ValueError(op)
+    return build
+
+
+async def run_op(client, op: str, ids: List[str], rng: random.Random, args) -> dict:
+    build = _request_factory(op, ids, rng, args)
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    remaining = args.requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            method, url, kwargs = build()
+            t0 = time.perf_counter()
+            try:
+                resp = await client.request(method, url, **kwargs)
+                status = resp.status_code
+            except Exception as e:
+                status = type(e).__name__
+            latencies.append((time.perf_counter() - t0) * 1000)
+            if not (isinstance(status, int) and status < 400):
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, args.concurrency))))
+    seconds = time.perf_counter() - t0
+    latencies.sort()
+    return {
+        "op": op,
+        "requests": len(latencies),
+        "concurrency": args.concurrency,
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "rps": round(len(latencies) / max(seconds, 1e-9), 1),
+        "p50Ms": round(percentile(latencies, 50), 2),
+        "p95Ms": round(percentile(latencies, 95), 2),
+        "p99Ms": round(percentile(latencies, 99), 2),
+        "meanMs": round(sum(latencies) / max(len(latencies), 1), 2),
+        "maxMs": round(latencies[-1] if latencies else 0.0, 2),
+    }
+
+
+async def run_size(n: int, args, latency) -> List[dict]:
+    import httpx
+    from app import main  # type: ignore
+    from app.services import vector_store  # type: ignore
+    from app.services.mailer import get_mail_queue  # type: ignore
+    from app.scripts import fakes as fake  # type: ignore
+
+    rng = random.Random(args.seed + n)
+    services = fake.install(latency)
+    fake.install_mongo()
+    vector_store._store = None
+    t0 = time.perf_counter()
+    ids = seed_corpus(n, rng, args.transcript_chars)
+    print(f"[bench] corpus {n}: seeded in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+
+    await main.on_startup()
+    # Let startup's one-off background work (migration, reconcile) finish before measuring
+    one_off = [t for t in main._background_tasks if not t.done() and "periodically" not in t.get_coro().__qualname__]
+    if one_off:
+        await asyncio.wait(one_off)
+    rows = []
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for op in args.ops:
+                before = _counters(services)
+                row = {"corpus": n, **await run_op(client, op, ids, rng, args)}
+                if op == "email":
+                    # Delivery happens in the background; time until the mail queue is empty
+                    t0 = time.perf_counter()
+                    await get_mail_queue().drain(600)
+                    row["deliverySeconds"] = round(time.perf_counter() - t0, 3)
+                if op in ("update", "summarize"):
+                    # Include write-behind vector writes in the services' call counts
+                    await asyncio.to_thread(vector_store.get_store(fake.EMBED_DIM).flush)
+                after = _counters(services)
+                row["serviceCalls"] = {k: after[k] - before[k] for k in after}
+                rows.append(row)
+                print(json.dumps(row))
+    finally:
+        await main.on_shutdown()
+        main._background_tasks.clear()
+    return rows
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "describe", "--always", "--dirty"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def compare(before_path: str, after_path: str):
+    """Print per-operation ratios (after / before) of p50, p95 and throughput."""
+    with open(before_path, "r", encoding="utf-8") as f:
+        before = json.load(f)
+    with open(after_path, "r", encoding="utf-8") as f:
+        after = json.load(f)
+    base = {(r["corpus"], r["op"]): r for r in before["results"]}
+    print(f"before {before['meta'].get('commit')} -> after {after['meta'].get('commit')}")
+    for r in after["results"]:
+        b = base.get((r["corpus"], r["op"]))
+        if b is None:
+            continue
+        ratio = lambda k: round(r[k] / b[k], 2) if b[k] else None
+        print(json.dumps({"corpus": r["corpus"], "op": r["op"], "p50": ratio("p50Ms"), "p95": ratio("p95Ms"), "rps": ratio("rps")}))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="100,1000,10000", help="corpus sizes (meetings)")
+    ap.add_argument("--ops", default=",".join(OPS), help=f"subset of {','.join(OPS)}")
+    ap.add_argument("--requests", type=int, default=200, help="requests per operation and corpus size")
+    ap.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    ap.add_argument("--vector-backend", default="pinecone", choices=["pinecone", "faiss"])
+    ap.add_argument("--llm-ms", type=float, default=200, help="fake Gemini latency per generate call")
+    ap.add_argument("--embed-ms", type=float, default=30, help="fake embedding latency per request")
+    ap.add_argument("--pinecone-ms", type=float, default=20, help="fake Pinecone latency per request")
+    ap.add_argument("--smtp-ms", type=float, default=50, help="fake SMTP latency per command")
+    ap.add_argument("--summarize-chars", type=int, default=20000, help="transcript size for summarize requests")
+    ap.add_argument("--transcript-chars", type=int, default=2000, help="transcript size of seeded meetings")
+    ap.add_argument("--page-size", type=int, default=50, help="limit for list requests")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", help="write results to this file")
+    ap.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two result files and exit")
+    args = ap.parse_args()
+    if args.compare:
+        compare(*args.compare)
+        return
+    args.ops = [op for op in args.ops.split(",") if op]
+    unknown = set(args.ops) - set(OPS)
+    if unknown:
+        raise SystemExit(f"unknown ops: {', '.join(sorted(unknown))}")
+
+    _configure_env(args)
+    from app.scripts.fakes import Latency  # type: ignore
+    latency = Latency(llm_ms=args.llm_ms, embed_ms=args.embed_ms, pinecone_ms=args.pinecone_ms, smtp_ms=args.smtp_ms)
+
+    async def run_all():
+        results = []
+        for n in [int(x) for x in args.sizes.split(",") if x]:
+            results.extend(await run_size(n, args, latency))
+        return results
+
+    results = asyncio.run(run_all())
+    if args.json:
+        meta = {
+            "commit": _git_commit(),
+            "time": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("json", "compare")},
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Compare the original fixed 12,000-character chunking with token-budgeted chunking: map calls,
+total Gemini calls (map + merge + synthesis) and chunks that would overflow the model's context.
+
+Usage (from backend_py/):
+    python -m app.scripts.bench_chunking
+    python -m app.scripts.bench_chunking --sizes-kb 50,500,5000 --context-tokens 32768,1048576 --overlap 2
+
+Calls are counted by running the real map/reduce pipeline against a stub model that returns
+`--partial-chars` characters per call, so merge rounds are included. No network access is used.
+"""
+import os
+import re
+import json
+import random
+import argparse
+from typing import Iterable, Iterator, List
+
+os.environ.setdefault("SUMMARY_CACHE_PERSIST", "false")
+os.environ["SUMMARY_CACHE_SIZE"] = "0"
+os.environ["SUMMARY_CHUNK_CACHE_SIZE"] = "0"
+
+from app.services import summarizer  # type: ignore
+from app.services.tokens import token_weight  # type: ignore
+
+LEGACY_MAX_CHARS = 12000
+_LEGACY_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")  # no CJK terminators
+_WORDS = {
+    "english": "we need to ship the roadmap review before the budget deadline and confirm owners for each action item".split(),
+    "cyrillic": "нам нужно согласовать план работ до конца квартала и назначить ответственных за каждую задачу".split(),
+    "cjk": list("我们需要在季度末之前确认路线图并为每个行动项指定负责人和截止日期"),
+}
+
+
+def make_transcript(kind: str, size_chars: int, rng: random.Random) -> str:
+    """Speaker-labelled lines; `asr` is English without sentence punctuation (speech-to-text output)."""
+    words = _WORDS["english" if kind == "asr" else kind]
+    joiner = "" if kind == "cjk" else " "
+    end = {"english": ".", "cyrillic": ".", "cjk": "。", "asr": ""}[kind]
+    lines, size = [], 0
+    while size < size_chars:
+        line = f"{rng.choice(['Alice', 'Bob', 'Priya'])}: {joiner.join(rng.choice(words) for _ in range(rng.randint(6, 18)))}{end}"
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+
+def legacy_chunk_sentences(sentences: Iterable[str], max_chars: int = LEGACY_MAX_CHARS) -> Iterator[str]:
+    """The original chunker, verbatim: greedy packing by characters, no overlap."""
+    buf: List[str] = []
+    size = 0
+    for s in sentences:
+        if size + len(s) + 1 > max_chars and buf:
+            yield " ".join(buf)
+            buf, size = [s], len(s) + 1
+        else:
+            buf.append(s)
+            size += len(s) + 1
+    if buf:
+        yield " ".join(buf)
+
+
+class _CountingModel:
+    def __init__(self, partial_chars: int):
+        self.partial_chars = partial_chars
+        self.calls = 0
+
+    def generate_content(self, prompt: str, **kwargs):
+        self.calls += 1
+        return type("Resp", (), {"text": ("- point " * (self.partial_chars // 8 + 1))[: self.partial_chars]})()
+
+
+def count_calls(chunks: List[str], partial_chars: int) -> int:
+    model = _CountingModel(partial_chars)
+    if len(chunks) == 1:
+        return 1
+    partials = summarizer._summarize_chunks(model, chunks)
+    summarizer._reduce_partials(model, partials, "Summarize")
+    return model.calls
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes-kb", default="50,200,1000,5000")
+    ap.add_argument("--kinds", default="english,asr,cyrillic,cjk")
+    ap.add_argument("--context-tokens", default="32768,1048576", help="context windows to budget for (gemini-1.0-pro, gemini-1.5-flash)")
+    ap.add_argument("--cap", type=int, default=0, help="SUMMARY_CHUNK_MAX_TOKENS to apply (0 = none)")
+    ap.add_argument("--overlap", type=int, default=0, help="overlap sentences between chunks")
+    ap.add_argument("--partial-chars", type=int, default=1500, help="length of each stub chunk summary")
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    summarizer.SUMMARY_CHUNK_MAX_TOKENS = args.cap
+    rng = random.Random(7)
+    results = []
+    for context in [int(x) for x in args.context_tokens.split(",") if x]:
+        os.environ["GEMINI_CONTEXT_TOKENS"] = str(context)
+        budget = summarizer.chunk_token_budget("Summarize")
+        hard_limit = context - summarizer.SUMMARY_OUTPUT_TOKENS
+        for kind in [k for k in args.kinds.split(",") if k]:
+            for kb in [float(x) for x in args.sizes_kb.split(",") if x]:
+                cleaned = summarizer._clean_transcript(make_transcript(kind, int(kb * 1000), rng))
+                sentences = list(summarizer.iter_sentences([cleaned]))
+                legacy_sentences = [p.strip() for p in _LEGACY_SENTENCE_BOUNDARY.split(cleaned) if p.strip()]
+                legacy = [cleaned] if len(cleaned) <= LEGACY_MAX_CHARS else list(legacy_chunk_sentences(legacy_sentences))
+                chunks = list(summarizer._chunk_sentences(sentences, budget, args.overlap)) or [""]
+                legacy_calls = count_calls(legacy, args.partial_chars)
+                calls = count_calls(chunks, args.partial_chars)
+                row = {
+                    "contextTokens": context,
+                    "budgetTokens": budget,
+                    "kind": kind,
+                    "sizeKB": kb,
+                    "estTokens": round(token_weight(cleaned)),
+                    "legacyMapCalls": len(legacy),
+                    "mapCalls": len(chunks),
+                    "legacyCalls": legacy_calls,
+                    "calls": calls,
+                    "callsSaved": legacy_calls - calls,
+                    "legacyOverflowChunks": sum(token_weight(c) > hard_limit for c in legacy),
+                    "maxChunkTokens": round(max(token_weight(c) for c in chunks)),
+                }
+                results.append(row)
+                print(json.dumps(row))
+
+    # Where a legacy chunk overflowed, the old pipeline made fewer calls only by truncating input
+    fits = [r for r in results if not r["legacyOverflowChunks"]]
+    saved = sum(r["callsSaved"] for r in fits)
+    total = sum(r["legacyCalls"] for r in fits)
+    print(f"Gemini calls where the legacy chunks fit: {total} -> {total - saved} ({saved} saved, {saved / max(total, 1):.0%})")
+    overflowed = len(results) - len(fits)
+    if overflowed:
+        print(f"{overflowed} runs had legacy chunks over the context window (truncated input); now split to fit")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
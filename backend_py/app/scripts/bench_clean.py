@@ -0,0 +1,82 @@
+"""
+Benchmark of the transcript cleaner against the original eight-pass implementation
+(kept in tests/legacy.py, which tests/test_cleaner.py checks it against on random inputs).
+
+Usage (from backend_py/):
+    python -m app.scripts.bench_clean --sizes-mb 1,5,10,25,50
+    python -m app.scripts.bench_clean --sizes-mb 10 --memory   # also report peak allocations
+"""
+import time
+import json
+import random
+import argparse
+import tracemalloc
+
+from app.services.summarizer import _clean_transcript  # type: ignore
+from tests.legacy import legacy_clean_transcript  # type: ignore
+
+
+_NAMES = ["Alice", "Bob Smith", "Priya", "Dr Chen", "Maria"]
+_WORDS = "so um the roadmap uh is on track and we will ship by 3/4/2025 er maybe next week ok right budget at 10:30".split()
+
+
+def make_transcript(size_bytes: int, seed: int = 0) -> str:
+    """A meeting-style transcript: timestamped speaker turns, fillers, dates and bullets."""
+    rng = random.Random(seed)
+    lines = []
+    size = 0
+    while size < size_bytes:
+        ts = rng.choice([f"[{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}] ", f"({rng.randint(0, 2)}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}) ", ""])
+        line = f"{ts}{rng.choice(_NAMES)}: {' '.join(rng.choices(_WORDS, k=rng.randint(4, 16)))}."
+        if rng.random() < 0.1:
+            line += "\n  - " + " ".join(rng.choices(_WORDS, k=5))
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+
+def measure(fn, text: str, memory: bool) -> dict:
+    t0 = time.perf_counter()
+    out = fn(text)
+    row = {"seconds": round(time.perf_counter() - t0, 3)}
+    if memory:
+        tracemalloc.start()
+        fn(text)
+        row["peakMB"] = round(tracemalloc.get_traced_memory()[1] / 1e6, 1)
+        tracemalloc.stop()
+    return row, out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes-mb", default="1,5,10,25,50")
+    ap.add_argument("--memory", action="store_true", help="measure peak allocations (slower)")
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    results = []
+    for mb in [float(x) for x in args.sizes_mb.split(",") if x]:
+        text = make_transcript(int(mb * 1e6))
+        legacy, expected = measure(legacy_clean_transcript, text, args.memory)
+        fused, got = measure(_clean_transcript, text, args.memory)
+        row = {
+            "sizeMB": mb,
+            "legacySeconds": legacy["seconds"],
+            "seconds": fused["seconds"],
+            "MBps": round(mb / max(fused["seconds"], 1e-9), 1),
+            "speedup": round(legacy["seconds"] / max(fused["seconds"], 1e-9), 2),
+            "identical": got == expected,
+        }
+        if args.memory:
+            row["legacyPeakMB"], row["peakMB"] = legacy["peakMB"], fused["peakMB"]
+        results.append(row)
+        print(json.dumps(row))
+        del text, expected, got
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark of the extractive (heuristic) summarizer against the previous implementation
+(kept in tests/legacy.py; tests/test_extractive.py checks the two give byte-identical summaries).
+
+Usage (from backend_py/):
+    python -m app.scripts.bench_extractive --sizes 10000,30000,100000
+
+Synthetic sentences mix a few templates with random vocabulary, so most are distinct.
+"""
+import time
+import json
+import random
+import argparse
+
+from app.services.extractive import extractive_summary  # type: ignore
+from tests.legacy import legacy_summary  # type: ignore
+
+
+# --- synthetic transcripts ------------------------------------------------------------------
+
+_NAMES = ["Alice", "Bob", "Priya", "Chen", "Maria", "Tom"]
+_WORDS = (
+    "roadmap budget release migration customer backlog sprint deadline risk blocker api latency "
+    "database onboarding pricing launch review design testing infra cost hiring metrics".split()
+)
+_TEMPLATES = [
+    "{n} said the {a} and {b} work is on track.",
+    "We need to finish the {a} before the {b} review.",
+    "{n} will follow up on {a} by Friday 12.",
+    "The team agreed to move {a} to next week.",
+    "There is a risk that {a} slips because of {b}.",
+    "Okay.",
+    "Let's move on.",
+    "{n} asked whether {a} affects {b} or the {c}!",
+    "Decided: {a} ships first, then {b}?",
+]
+_INSTRUCTIONS = ["Summarize the meeting", "List the action items and deadlines as bullet points", "What decisions and risks came up?"]
+
+
+def make_transcript(n: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(n):
+        t = rng.choice(_TEMPLATES)
+        s = t.format(n=rng.choice(_NAMES), a=rng.choice(_WORDS), b=rng.choice(_WORDS), c=rng.choice(_WORDS))
+        extra = rng.choices(_WORDS, k=rng.randint(0, 8))
+        if extra:
+            s = f"{' '.join(extra)} {rng.randint(1, 999)} {s}"
+        lines.append(s + ("\n" if rng.random() < 0.3 else " "))
+    return "".join(lines)
+
+
+def timed(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10000,30000,100000", help="sentences per transcript")
+    ap.add_argument("--legacy-max", type=int, default=100000, help="skip the previous engine above this size")
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    results = []
+    for n in [int(x) for x in args.sizes.split(",") if x]:
+        text = make_transcript(n)
+        for instructions in _INSTRUCTIONS:
+            row = {"sentences": n, "instructions": instructions}
+            out = None
+            for name, use_numpy in (("python", False), ("numpy", True)):
+                res = []
+                row[f"{name}Ms"] = round(timed(lambda: res.append(extractive_summary(text, instructions, use_numpy=use_numpy))), 1)
+                assert out is None or res[0] == out
+                out = res[0]
+            if n <= args.legacy_max:
+                res = []
+                row["legacyMs"] = round(timed(lambda: res.append(legacy_summary(text, instructions))), 1)
+                row["identical"] = res[0] == out
+                row["speedup"] = round(row["legacyMs"] / max(min(row["pythonMs"], row["numpyMs"]), 1e-9), 1)
+            results.append(row)
+            print(json.dumps(row))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Micro-benchmark of the NumPy fallback vector backend (used when FAISS is not installed):
+the contiguous growable matrix against the previous list-of-arrays layout that ran
+np.stack + argsort on every query.
+
+Usage (from backend_py/):
+    python -m app.scripts.bench_fallback --sizes 10000,100000,1000000 --dim 768
+
+Memory: 1M x 768 float32 is ~3 GB per layout; use --dim or --dtype float16 to scale down.
+"""
+import time
+import json
+import argparse
+from typing import List
+
+import numpy as np
+
+from app.services.vector_store import _NumpyScope, _to_unit_rows  # type: ignore
+
+
+class LegacyScope:
+    """The previous fallback layout: one array per vector, stacked on every search."""
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.vecs: List[np.ndarray] = []
+
+    def add(self, ids: List[str], mat: np.ndarray):
+        self.ids.extend(ids)
+        self.vecs.extend(list(mat))
+
+    def search(self, q: np.ndarray, k: int):
+        mat = np.stack(self.vecs, axis=0)
+        sims = (mat @ q.T).reshape(-1)
+        top = np.argsort(-sims)[:k]
+        return [(self.ids[i], float(sims[i])) for i in top]
+
+
+def timed(fn, repeat: int) -> List[float]:
+    out = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10000,100000,1000000")
+    ap.add_argument("--dim", type=int, default=768)
+    ap.add_argument("--dtype", default="float32", choices=["float32", "float16"])
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--queries", type=int, default=20)
+    ap.add_argument("--batch", type=int, default=10000, help="vectors generated/added per step")
+    ap.add_argument("--skip-legacy", action="store_true")
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    results = []
+    for n in [int(x) for x in args.sizes.split(",") if x]:
+        scope = _NumpyScope(args.dim, dtype=args.dtype)
+        legacy = None if args.skip_legacy else LegacyScope()
+        add_ms = 0.0
+        for start in range(0, n, args.batch):
+            m = min(args.batch, n - start)
+            rows = _to_unit_rows(rng.normal(size=(m, args.dim)).astype("float32"))
+            ids = [f"m{start + i}" for i in range(m)]
+            t0 = time.perf_counter()
+            scope.add(ids, rows)
+            add_ms += (time.perf_counter() - t0) * 1000
+            if legacy is not None:
+                legacy.add(ids, rows)
+            del rows
+        queries = _to_unit_rows(rng.normal(size=(args.queries, args.dim)).astype("float32"))
+        it = iter(range(10**9))
+        new_lat = timed(lambda: scope.search(queries[next(it) % args.queries].reshape(1, -1), args.k), args.queries)
+        del_lat = timed(lambda: scope.remove(f"m{rng.integers(0, n)}"), 100)
+        row = {
+            "n": n,
+            "dim": args.dim,
+            "dtype": args.dtype,
+            "addSecondsTotal": round(add_ms / 1000, 3),
+            "searchP50ms": round(float(np.median(new_lat)), 3),
+            "deleteP50ms": round(float(np.median(del_lat)), 4),
+        }
+        if legacy is not None:
+            it = iter(range(10**9))
+            old_lat = timed(lambda: legacy.search(queries[next(it) % args.queries].reshape(1, -1), args.k), max(3, args.queries // 4))
+            row["legacySearchP50ms"] = round(float(np.median(old_lat)), 3)
+            row["speedup"] = round(row["legacySearchP50ms"] / max(row["searchP50ms"], 1e-9), 1)
+        results.append(row)
+        print(json.dumps(row))
+        del scope, legacy
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
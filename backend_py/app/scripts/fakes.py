@@ -0,0 +1,447 @@
+"""
+Deterministic local stand-ins for the external services, used by the benchmark scripts:
+Gemini (generation and embeddings), Pinecone, SMTP and an in-memory Mongo collection.
+
+Each fake sleeps for a configurable latency per request and otherwise answers instantly, so
+benchmarks measure the app's own overhead plus a controlled, repeatable service cost.
+`install()` patches the client libraries in place; nothing here is imported by the app.
+"""
+import time
+import zlib
+import heapq
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+from bson import ObjectId  # type: ignore
+
+EMBED_DIM = 768
+
+
+@dataclass
+class Latency:
+    """Per-request latency of each fake service, in milliseconds."""
+    llm_ms: float = 200.0
+    llm_token_ms: float = 5.0
+    embed_ms: float = 30.0
+    pinecone_ms: float = 20.0
+    smtp_ms: float = 50.0
+
+
+def _sleep(ms: float):
+    if ms > 0:
+        time.sleep(ms / 1000)
+
+
+def _hash(token: str) -> int:
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def fake_embedding(text: str, dim: int = EMBED_DIM) -> List[float]:
+    """Hashed bag-of-words vector: texts sharing words are close, so search results are meaningful."""
+    vec = np.zeros(dim, dtype="float32")
+    for w in (text or "").lower().split():
+        h = _hash(w)
+        vec[h % dim] += 1.0 if h & 1 << 31 else -1.0
+    if not vec.any():
+        vec[0] = 1.0
+    return (vec / np.linalg.norm(vec)).tolist()
+
+
+# --- Gemini ---------------------------------------------------------------------------------
+
+class _Response:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """generate_content returns a short bullet summary derived from the prompt's tail."""
+
+    calls = 0
+    _lock = threading.Lock()
+
+    def __init__(self, name: str = "fake", latency: Optional[Latency] = None):
+        self.name = name
+        self.latency = latency or Latency()
+
+    def _text(self, prompt: str) -> str:
+        words = prompt.split()[-60:]
+        bullets = [" ".join(words[i:i + 12]) for i in range(0, len(words), 12)]
+        return "\n".join(f"- {b}" for b in bullets if b)
+
+    def generate_content(self, prompt: str, stream: bool = False, **kwargs):
+        with FakeGenerativeModel._lock:
+            FakeGenerativeModel.calls += 1
+        _sleep(self.latency.llm_ms)
+        text = self._text(prompt)
+        if not stream:
+            return _Response(text)
+        return self._stream(text)
+
+    def _stream(self, text: str) -> Iterator[_Response]:
+        for line in text.splitlines(keepends=True):
+            _sleep(self.latency.llm_token_ms)
+            yield _Response(line)
+
+
+class FakeGenai:
+    """Replacement for the attributes of google.generativeai the app uses."""
+
+    def __init__(self, latency: Latency):
+        self.latency = latency
+        self.embed_calls = 0
+
+    def configure(self, **kwargs):
+        pass
+
+    def GenerativeModel(self, name: str, **kwargs):
+        return FakeGenerativeModel(name, self.latency)
+
+    def embed_content(self, model: str, content, **kwargs):
+        with FakeGenerativeModel._lock:
+            self.embed_calls += 1
+        _sleep(self.latency.embed_ms)
+        if isinstance(content, str):
+            return {"embedding": fake_embedding(content)}
+        return {"embedding": [fake_embedding(t) for t in content]}
+
+
+# --- Pinecone -------------------------------------------------------------------------------
+
+class FakePineconeIndex:
+    """Exact cosine search over per-namespace matrices (the app's NumPy scope does the bookkeeping)."""
+
+    def __init__(self, latency: Latency, dim: int = EMBED_DIM):
+        from app.services.vector_store import _NumpyScope, _to_unit_rows  # type: ignore
+        self._scope_cls, self._unit = _NumpyScope, _to_unit_rows
+        self.latency = latency
+        self.dim = dim
+        self.namespaces: Dict[str, Any] = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def _ns(self, namespace: str):
+        if namespace not in self.namespaces:
+            self.namespaces[namespace] = self._scope_cls(self.dim, "float32")
+        return self.namespaces[namespace]
+
+    def upsert(self, vectors: List[dict], namespace: str = ""):
+        _sleep(self.latency.pinecone_ms)
+        with self._lock:
+            self.requests += 1
+            self._ns(namespace).add([v["id"] for v in vectors], self._unit([v["values"] for v in vectors]))
+
+    def delete(self, ids: List[str], namespace: str = ""):
+        _sleep(self.latency.pinecone_ms)
+        with self._lock:
+            self.requests += 1
+            for i in ids:
+                self._ns(namespace).remove(i)
+
+    def query(self, vector: List[float], top_k: int = 10, namespace: str = "", **kwargs):
+        _sleep(self.latency.pinecone_ms)
+        with self._lock:
+            self.requests += 1
+            hits = self._ns(namespace).search(self._unit([vector]), top_k)
+        return {"matches": [{"id": mid, "score": score} for mid, score in hits]}
+
+
+class FakePinecone:
+    def __init__(self, index: FakePineconeIndex):
+        self._index = index
+
+    def __call__(self, api_key: str = "", **kwargs) -> "FakePinecone":
+        return self
+
+    def Index(self, name: Optional[str] = None, host: Optional[str] = None):
+        return self._index
+
+
+# --- SMTP -----------------------------------------------------------------------------------
+
+class FakeSMTP:
+    """Async stand-in for aiosmtplib.SMTP that accepts every message."""
+
+    sent = 0
+    connections = 0
+    latency = Latency()
+
+    def __init__(self, **kwargs):
+        self.is_connected = False
+
+    async def connect(self):
+        await asyncio.sleep(FakeSMTP.latency.smtp_ms / 1000)
+        FakeSMTP.connections += 1
+        self.is_connected = True
+
+    async def login(self, user, password):
+        pass
+
+    async def send_message(self, msg):
+        await asyncio.sleep(FakeSMTP.latency.smtp_ms / 1000)
+        FakeSMTP.sent += 1
+        return ({}, "250 OK")
+
+    async def noop(self):
+        return (250, "OK")
+
+    async def rset(self):
+        return (250, "OK")
+
+    async def quit(self):
+        self.is_connected = False
+
+    def close(self):
+        self.is_connected = False
+
+
+# --- Mongo ----------------------------------------------------------------------------------
+
+_MISSING = object()
+
+
+def _bson_type(v) -> str:
+    if isinstance(v, list):
+        return "array"
+    if isinstance(v, (bytes, bytearray)) or type(v).__name__ == "Binary":
+        return "binData"
+    return type(v).__name__
+
+
+def _cmp_ok(value, op: str, arg) -> bool:
+    if op == "$in":
+        return value in arg
+    if op == "$ne":
+        return value != arg if arg is not None else value not in (_MISSING, None)
+    if op == "$exists":
+        return (value is not _MISSING) == bool(arg)
+    if op == "$type":
+        return _bson_type(value) in (arg if isinstance(arg, list) else [arg])
+    if value is _MISSING or value is None:
+        return False
+    if op == "$lt":
+        return value < arg
+    if op == "$lte":
+        return value <= arg
+    if op == "$gt":
+        return value > arg
+    if op == "$gte":
+        return value >= arg
+    raise NotImplementedError(f"fake Mongo does not support {op}")
+
+
+def matches(doc: dict, query: dict) -> bool:
+    """The subset of the Mongo query language the app uses."""
+    for key, cond in query.items():
+        if key == "$or":
+            if not any(matches(doc, q) for q in cond):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, q) for q in cond):
+                return False
+        else:
+            value = doc.get(key, _MISSING)
+            if isinstance(cond, dict) and cond and all(k.startswith("$") for k in cond):
+                if not all(_cmp_ok(value, op, arg) for op, arg in cond.items()):
+                    return False
+            elif value != cond and not (cond is None and value is _MISSING):
+                return False
+    return True
+
+
+def _eval(doc: dict, expr):
+    """The aggregation expressions the app's pipeline updates use."""
+    if isinstance(expr, str) and expr.startswith("$"):
+        return doc.get(expr[1:])
+    if isinstance(expr, dict) and len(expr) == 1 and next(iter(expr)).startswith("$"):
+        op, arg = next(iter(expr.items()))
+        if op == "$literal":
+            return arg
+        if op == "$ifNull":
+            value = _eval(doc, arg[0])
+            return _eval(doc, arg[1]) if value is None else value
+        if op == "$concat":
+            parts = [_eval(doc, a) for a in arg]
+            return None if any(p is None for p in parts) else "".join(parts)
+        raise NotImplementedError(f"fake Mongo does not support {op}")
+    return expr
+
+
+def project(doc: dict, projection: Optional[dict]) -> dict:
+    if not projection:
+        return dict(doc)
+    if any(v for k, v in projection.items() if k != "_id"):
+        out = {k: doc[k] for k, v in projection.items() if v and k in doc}
+        if projection.get("_id", 1):
+            out["_id"] = doc["_id"]
+        return out
+    return {k: v for k, v in doc.items() if projection.get(k, 1)}
+
+
+class _Result:
+    def __init__(self, **kw):
+        self.__dict__.update(kw)
+
+
+class FakeCursor:
+    def __init__(self, docs: List[dict], projection: Optional[dict]):
+        self._docs = docs
+        self._projection = projection
+        self._limit = 0
+        self._sort: List[tuple] = []
+
+    def sort(self, key, direction: int = 1):
+        self._sort = list(key) if isinstance(key, list) else [(key, direction)]
+        return self
+
+    def limit(self, n: int):
+        self._limit = n
+        return self
+
+    def _materialize(self) -> List[dict]:
+        docs = self._docs
+        directions = {direction for _, direction in self._sort}
+        if self._limit and len(directions) == 1:
+            # Top-k by the full sort key, like an index-backed sort with a limit
+            keys = [key for key, _ in self._sort]
+            pick = heapq.nlargest if directions == {-1} else heapq.nsmallest
+            docs = pick(self._limit, docs, key=lambda d: tuple(d.get(k) for k in keys))
+        else:
+            for key, direction in reversed(self._sort):
+                docs = sorted(docs, key=lambda d: d.get(key), reverse=direction < 0)
+        if self._limit:
+            docs = docs[: self._limit]
+        return [project(d, self._projection) for d in docs]
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        docs = self._materialize()
+        return docs[:length] if length else docs
+
+    def __aiter__(self):
+        self._iter = iter(self._materialize())
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    """Async (motor-style) in-memory collection. Scans are linear, like an unindexed query."""
+
+    def __init__(self):
+        self.docs: Dict[Any, dict] = {}
+
+    def _find(self, query: dict) -> List[dict]:
+        # Lookups by _id (single or $in) use the primary key instead of a scan
+        _id = query.get("_id")
+        if isinstance(_id, dict) and list(_id) == ["$in"]:
+            found = (self.docs.get(i) for i in _id["$in"])
+            return [d for d in found if d is not None and matches(d, query)]
+        if _id is not None and not isinstance(_id, dict):
+            d = self.docs.get(_id)
+            return [d] if d is not None and matches(d, query) else []
+        return [d for d in self.docs.values() if matches(d, query)]
+
+    def find(self, query: Optional[dict] = None, projection: Optional[dict] = None, sort=None, **kwargs) -> FakeCursor:
+        cursor = FakeCursor(self._find(query or {}), projection)
+        return cursor.sort(sort) if sort else cursor
+
+    async def find_one(self, query: dict, projection: Optional[dict] = None) -> Optional[dict]:
+        found = self._find(query)
+        return project(found[0], projection) if found else None
+
+    async def insert_one(self, doc: dict):
+        doc.setdefault("_id", ObjectId())
+        self.docs[doc["_id"]] = dict(doc)
+        return _Result(inserted_id=doc["_id"])
+
+    async def insert_many(self, docs: List[dict], ordered: bool = True):
+        for doc in docs:
+            await self.insert_one(doc)
+        return _Result(inserted_ids=[d["_id"] for d in docs])
+
+    def _apply(self, d: dict, update):
+        if isinstance(update, list):
+            for stage in update:
+                for op, fields in stage.items():
+                    if op != "$set":
+                        raise NotImplementedError(f"fake Mongo does not support pipeline stage {op}")
+                    d.update({k: _eval(d, v) for k, v in fields.items()})
+            return
+        for op, fields in update.items():
+            if op != "$set":
+                raise NotImplementedError(f"fake Mongo does not support {op}")
+            d.update(fields)
+
+    async def update_one(self, query: dict, update: dict, upsert: bool = False):
+        found = self._find(query)
+        if found:
+            self._apply(found[0], update)
+        return _Result(matched_count=len(found[:1]), modified_count=len(found[:1]))
+
+    async def find_one_and_update(self, query: dict, update: dict, projection: Optional[dict] = None,
+                                  return_document: Any = False, **kwargs) -> Optional[dict]:
+        found = self._find(query)
+        if not found:
+            return None
+        before = dict(found[0])
+        self._apply(found[0], update)
+        return project(found[0] if return_document else before, projection)
+
+    async def delete_one(self, query: dict):
+        found = self._find(query)
+        if found:
+            del self.docs[found[0]["_id"]]
+        return _Result(deleted_count=len(found[:1]))
+
+    async def bulk_write(self, ops: list, ordered: bool = True):
+        for op in ops:
+            await self.update_one(op._filter, op._doc)
+
+    async def create_index(self, *args, **kwargs):
+        return "fake"
+
+    async def estimated_document_count(self) -> int:
+        return len(self.docs)
+
+
+class FakeDatabase(dict):
+    def __missing__(self, name: str) -> FakeCollection:
+        self[name] = FakeCollection()
+        return self[name]
+
+
+class _FakeClient:
+    def close(self):
+        pass
+
+
+def install_mongo() -> FakeDatabase:
+    """Point app.db at a fresh in-memory database (connect_db becomes a no-op)."""
+    from app import db as app_db  # type: ignore
+    database = FakeDatabase()
+    app_db._client, app_db._db = _FakeClient(), database
+    return database
+
+
+def install(latency: Latency) -> dict:
+    """Patch Gemini, Pinecone and SMTP client libraries with the fakes. Call before the app handles requests."""
+    import google.generativeai as genai  # type: ignore
+    import aiosmtplib  # type: ignore
+    from app.services import vector_store  # type: ignore
+
+    fake_genai = FakeGenai(latency)
+    for name in ("configure", "GenerativeModel", "embed_content"):
+        setattr(genai, name, getattr(fake_genai, name))
+    index = FakePineconeIndex(latency)
+    vector_store.Pinecone = FakePinecone(index)
+    vector_store._has_pinecone = True
+    FakeSMTP.latency = latency
+    aiosmtplib.SMTP = FakeSMTP
+    return {"genai": fake_genai, "pinecone": index, "smtp": FakeSMTP}
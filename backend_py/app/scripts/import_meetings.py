@@ -0,0 +1,70 @@
+"""
+Bulk import meetings from a ZIP of transcripts or a JSONL file (same formats as POST /api/meetings/import).
+
+Usage (from backend_py/):
+    python -m app.scripts.import_meetings archive.zip --instructions "Summarize with action items"
+    python -m app.scripts.import_meetings meetings.jsonl --concurrency 8 --batch 100 --failures failures.json
+
+Each JSONL line (or .json/.jsonl member of a ZIP) is {"title", "text", "instructions"}; plain text
+members are one transcript each, titled by file name. Transcripts are summarized on a worker pool,
+embedded per batch, written with insert_many and, with Pinecone, bulk-loaded into the index.
+A local FAISS/NumPy index belongs to the API process, which adds the stored embeddings when it
+next starts (reconcile_with_db).
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.db import connect_db, close_db  # type: ignore
+from app.services.importer import iter_archive, import_meetings, IMPORT_BATCH_SIZE, IMPORT_CONCURRENCY  # type: ignore
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("path", help="ZIP or JSONL file")
+    ap.add_argument("--instructions", help="instructions for items without their own")
+    ap.add_argument("--concurrency", type=int, default=IMPORT_CONCURRENCY, help="transcripts summarized at once")
+    ap.add_argument("--batch", type=int, default=IMPORT_BATCH_SIZE, help="meetings per embedding/insert batch")
+    ap.add_argument("--failures", help="write per-item failures to this JSON file")
+    args = ap.parse_args()
+    if not os.path.exists(args.path):
+        raise SystemExit(f"{args.path} not found")
+
+    pinecone = os.getenv("VECTOR_BACKEND", "faiss").lower() == "pinecone"
+    started = time.perf_counter()
+
+    def report(p: dict):
+        elapsed = time.perf_counter() - started
+        print(f"[import] {p['processed']} processed, {p['imported']} imported, {p['failed']} failed "
+              f"({p['processed'] / max(elapsed, 1e-9):.1f}/s)")
+
+    await connect_db()
+    try:
+        progress = await import_meetings(
+            iter_archive(args.path), args.instructions, concurrency=args.concurrency, batch=args.batch,
+            index=pinecone, on_progress=report,
+        )
+        if pinecone:
+            from app.services.vector_store import get_store, DEFAULT_DIM  # type: ignore
+            get_store(DEFAULT_DIM).close()
+    finally:
+        await close_db()
+    report(progress)
+    for f in progress["failures"][:20]:
+        print(f"[import] failed {f['item']}: {f['error']}")
+    if progress["failed"] > 20:
+        print(f"[import] ... {progress['failed'] - 20} more failures")
+    if progress["indexFailures"]:
+        print(f"[import] {progress['indexFailures']} meetings were stored but not indexed; run app.scripts.backfill_pinecone")
+    if args.failures:
+        with open(args.failures, "w", encoding="utf-8") as f:
+            json.dump(progress["failures"], f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
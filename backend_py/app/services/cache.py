@@ -0,0 +1,272 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from pymongo.errors import OperationFailure
+
+from ..db import sync_db
+
+# Registry of named caches so their counters can be reported together
+_caches: Dict[str, "TieredCache"] = {}
+
+
+def cache_key(*parts: str) -> str:
+    """Content address for a tuple of strings (sha256 over the unit-separated parts)."""
+    h = hashlib.sha256()
+    for p in parts:
+        h.update((p or "").encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+class StreamingKey:
+    """Incremental form of cache_key: cache_key(*parts, last) where `last` arrives in pieces."""
+
+    def __init__(self, *parts: str):
+        self._h = hashlib.sha256()
+        for p in parts:
+            self._h.update((p or "").encode("utf-8"))
+            self._h.update(b"\x1f")
+
+    def update(self, piece: str):
+        self._h.update(piece.encode("utf-8"))
+
+    def hexdigest(self) -> str:
+        h = self._h.copy()
+        h.update(b"\x1f")
+        return h.hexdigest()
+
+
+class LRUCache:
+    """Thread-safe bounded LRU map."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = max(0, maxsize)
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key: str, value: Any):
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class MongoCacheTier:
+    """
+    Persistent cache tier in a Mongo collection, accessed with the synchronous client because
+    callers run in worker threads. Entries expire through a TTL index and the collection is
+    trimmed to max_docs (oldest first). Failures disable the tier briefly instead of raising.
+    """
+
+    RETRY_AFTER_SECONDS = 60
+    TRIM_EVERY = 100
+
+    def __init__(self, collection: str, ttl_seconds: int, max_docs: int):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+        self.max_docs = max_docs
+        self._indexed = False
+        self._disabled_until = 0.0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _coll(self):
+        if time.monotonic() < self._disabled_until:
+            return None
+        coll = sync_db()[self.collection]
+        if not self._indexed:
+            with self._lock:
+                if not self._indexed:
+                    self._ensure_ttl_index(coll)
+                    self._indexed = True
+        return coll
+
+    def _ensure_ttl_index(self, coll):
+        try:
+            coll.create_index("createdAt", expireAfterSeconds=self.ttl_seconds)
+            return
+        except OperationFailure as e:
+            if e.code not in (85, 86):  # IndexOptionsConflict / IndexKeySpecsConflict
+                raise
+        # An index on createdAt exists with another TTL (or none): change it in place
+        print(f"[cache] {self.collection}: updating the createdAt TTL index to {self.ttl_seconds}s")
+        try:
+            coll.database.command({
+                "collMod": self.collection,
+                "index": {"keyPattern": {"createdAt": 1}, "expireAfterSeconds": self.ttl_seconds},
+            })
+        except OperationFailure:
+            # Older servers cannot turn a plain index into a TTL index: rebuild it
+            coll.drop_index([("createdAt", 1)])
+            coll.create_index("createdAt", expireAfterSeconds=self.ttl_seconds)
+
+    def _fail(self, e: Exception):
+        print(f"[cache] {self.collection} unavailable ({e}); retrying in {self.RETRY_AFTER_SECONDS}s")
+        self._disabled_until = time.monotonic() + self.RETRY_AFTER_SECONDS
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            coll = self._coll()
+            if coll is None:
+                return None
+            d = coll.find_one({"_id": key}, projection={"value": 1})
+            return d.get("value") if d else None
+        except Exception as e:
+            self._fail(e)
+            return None
+
+    def set(self, key: str, value: Any):
+        try:
+            coll = self._coll()
+            if coll is None:
+                return
+            coll.replace_one({"_id": key}, {"value": value, "createdAt": datetime.utcnow()}, upsert=True)
+            with self._lock:
+                self._writes += 1
+                trim = self._writes % self.TRIM_EVERY == 0
+            if trim:
+                self._trim(coll)
+        except Exception as e:
+            self._fail(e)
+
+    def _trim(self, coll):
+        excess = coll.estimated_document_count() - self.max_docs
+        if excess <= 0:
+            return
+        oldest = [d["_id"] for d in coll.find({}, projection={"_id": 1}).sort("createdAt", 1).limit(excess)]
+        if oldest:
+            coll.delete_many({"_id": {"$in": oldest}})
+
+
+class SqliteCacheTier:
+    """
+    On-disk cache tier in a local SQLite file, so entries survive restarts without a network hop.
+    Values go through encode/decode (JSON by default); the table is trimmed to max_entries
+    (oldest first).
+    """
+
+    TRIM_EVERY = 200
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int,
+        encode: Callable[[Any], Any] = json.dumps,
+        decode: Callable[[Any], Any] = json.loads,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self._encode = encode
+        self._decode = decode
+        self._writes = 0
+        self._lock = threading.Lock()
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, created REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_created ON cache (created)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+        return self._decode(row[0]) if row else None
+
+    def set(self, key: str, value: Any):
+        blob = self._encode(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created) VALUES (?, ?, ?)", (key, blob, time.time())
+            )
+            self._writes += 1
+            if self._writes % self.TRIM_EVERY == 0:
+                self._conn.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            self._conn.commit()
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class TieredCache:
+    """In-process LRU in front of an optional persistent tier, with hit/miss counters."""
+
+    def __init__(self, name: str, maxsize: int, persistent: Optional[Any] = None):
+        self.name = name
+        self.memory = LRUCache(maxsize)
+        self.persistent = persistent
+        self.hits_memory = 0
+        self.hits_persistent = 0
+        self.misses = 0
+        # Lookups run from request handlers, worker threads and the map-reduce pool at once
+        self._lock = threading.Lock()
+        _caches[name] = self
+
+    def get(self, key: str) -> Optional[Any]:
+        v = self.memory.get(key)
+        if v is not None:
+            with self._lock:
+                self.hits_memory += 1
+            return v
+        if self.persistent is not None:
+            v = self.persistent.get(key)
+            if v is not None:
+                with self._lock:
+                    self.hits_persistent += 1
+                self.memory.set(key, v)
+                return v
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any):
+        self.memory.set(key, value)
+        if self.persistent is not None:
+            self.persistent.set(key, value)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits_memory, hits_persistent, misses = self.hits_memory, self.hits_persistent, self.misses
+        lookups = hits_memory + hits_persistent + misses
+        out = {
+            "size": len(self.memory),
+            "maxSize": self.memory.maxsize,
+            "hitsMemory": hits_memory,
+            "hitsPersistent": hits_persistent,
+            "misses": misses,
+            "hitRate": ((hits_memory + hits_persistent) / lookups) if lookups else 0.0,
+        }
+        if hasattr(self.persistent, "size"):
+            out["persistentSize"] = self.persistent.size()
+        return out
+
+
+def cache_stats() -> dict:
+    return {name: c.stats() for name, c in _caches.items()}
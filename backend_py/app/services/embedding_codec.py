@@ -0,0 +1,75 @@
+import os
+import struct
+import asyncio
+from typing import Any, List, Optional
+
+import numpy as np
+from bson.binary import Binary, USER_DEFINED_SUBTYPE
+from pymongo import UpdateOne
+
+# Embeddings are stored in Mongo as BSON Binary: an 8-byte header (magic, version, dtype code,
+# dimension) followed by the packed little-endian vector. Legacy documents hold arrays of doubles.
+EMBED_STORAGE_DTYPE = os.getenv("EMBED_STORAGE_DTYPE", "float32").lower()
+EMBEDDING_FIELDS = ("titleEmbedding", "summaryEmbedding")
+
+_MAGIC = b"EV"
+_VERSION = 1
+_HEADER = struct.Struct("<2sBBI")
+_DTYPES = {1: np.dtype("<f4"), 2: np.dtype("<f2")}
+_CODES = {"float32": 1, "float16": 2}
+
+
+def pack_embedding(vec: Any, dtype: str = EMBED_STORAGE_DTYPE) -> Binary:
+    code = _CODES.get(dtype, 1)
+    arr = np.asarray(vec, dtype=_DTYPES[code]).reshape(-1)
+    return Binary(_HEADER.pack(_MAGIC, _VERSION, code, arr.size) + arr.tobytes(), USER_DEFINED_SUBTYPE)
+
+
+def unpack_embedding(value: Any) -> Optional[np.ndarray]:
+    """Decode a stored embedding (packed Binary or legacy list) to a NumPy vector.
+    Binary values are decoded zero-copy (read-only view over the document bytes)."""
+    if value is None:
+        return None
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        buf = memoryview(value)
+        if len(buf) < _HEADER.size:
+            return None
+        magic, _version, code, dim = _HEADER.unpack_from(buf)
+        if magic != _MAGIC or code not in _DTYPES:
+            return None
+        return np.frombuffer(buf, dtype=_DTYPES[code], count=dim, offset=_HEADER.size)
+    if isinstance(value, (list, tuple)):
+        return np.asarray(value, dtype="float32") if value else None
+    return None
+
+
+def embedding_to_list(value: Any) -> Optional[List[float]]:
+    vec = unpack_embedding(value)
+    return vec.astype("float32").tolist() if vec is not None else None
+
+
+async def migrate_legacy_embeddings(coll, batch: int = 200) -> int:
+    """
+    Rewrite embeddings stored as BSON arrays into packed Binary, in batches. Each update is
+    conditioned on the field still being an array, so concurrent writes are never clobbered.
+    Returns the number of documents migrated.
+    """
+    migrated = 0
+    query = {"$or": [{f: {"$type": "array"}} for f in EMBEDDING_FIELDS]}
+    projection = {f: 1 for f in EMBEDDING_FIELDS}
+    while True:
+        docs = await coll.find(query, projection=projection).limit(batch).to_list(length=batch)
+        if not docs:
+            break
+        ops = []
+        for d in docs:
+            for f in EMBEDDING_FIELDS:
+                if isinstance(d.get(f), list):
+                    ops.append(UpdateOne({"_id": d["_id"], f: {"$type": "array"}}, {"$set": {f: pack_embedding(d[f])}}))
+        if ops:
+            await coll.bulk_write(ops, ordered=False)
+        migrated += len(docs)
+        await asyncio.sleep(0)  # yield to request handlers between batches
+    if migrated:
+        print(f"[embeddings] migrated {migrated} documents to packed embeddings")
+    return migrated
@@ -1,9 +1,34 @@
 import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from array import array
+from pathlib import Path
 import google.generativeai as genai
-from typing import List
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 load_dotenv()
 
+from .cache import TieredCache, SqliteCacheTier, cache_key
+from . import metrics
+from .ratelimit import get_limiter
+from .tokens import estimate_tokens
+
+EMBED_MODEL = os.getenv("EMBED_MODEL", "text-embedding-004")
+# Gemini accepts up to 100 texts per embed request
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "100"))
+EMBED_MAX_CONCURRENCY = int(os.getenv("EMBED_MAX_CONCURRENCY", "4"))
+
+# Memoize embeddings by (model, text): in-memory LRU plus an on-disk SQLite tier
+_default_cache_path = str(Path(__file__).resolve().parents[2] / ".cache" / "embeddings.sqlite3")
+_cache_path = os.getenv("EMBED_CACHE_PATH", _default_cache_path)
+_cache_tier = SqliteCacheTier(
+    _cache_path,
+    max_entries=int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "100000")),
+    encode=lambda v: array("d", v).tobytes(),
+    decode=lambda b: array("d", b).tolist(),
+) if _cache_path else None
+_embed_cache = TieredCache("embeddings", int(os.getenv("EMBED_CACHE_SIZE", "4096")), _cache_tier)
+
 # Initialize Gemini client lazily
 _genai_configured = False
 
@@ -19,21 +44,71 @@ def _ensure_config():
     _genai_configured = True
 
 
-def embed_texts(texts: List[str]) -> List[List[float]]:
+def _extract_vectors(resp, expected: int) -> List[List[float]]:
+    # Expect {'embedding': [[...], ...]} for list content across versions
+    vecs = resp.get("embedding") if isinstance(resp, dict) else None
+    if not vecs and hasattr(resp, "embedding"):
+        vecs = getattr(resp, "embedding")
+    if not vecs:
+        raise RuntimeError("Failed to obtain embedding from Gemini response")
+    if expected == 1 and vecs and not isinstance(vecs[0], (list, tuple)):
+        vecs = [vecs]
+    if len(vecs) != expected:
+        raise RuntimeError(f"Gemini returned {len(vecs)} embeddings for {expected} inputs")
+    return [list(v) for v in vecs]
+
+
+def _normalize(t: str) -> str:
+    return t if (isinstance(t, str) and t.strip()) else " "
+
+
+def _embed_batch(batch: List[str]) -> List[List[float]]:
+    tokens = sum(estimate_tokens(t) for t in batch)
+    with metrics.span("embeddings.embed"):
+        resp = get_limiter(EMBED_MODEL).call(lambda: genai.embed_content(model=EMBED_MODEL, content=batch), tokens)
+    metrics.inc("app_embed_texts_total", len(batch))
+    return _extract_vectors(resp, len(batch))
+
+
+def _embed_uncached(texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+    size = max(1, batch_size or EMBED_BATCH_SIZE)
+    batches = [texts[i:i + size] for i in range(0, len(texts), size)]
+    if len(batches) == 1:
+        return _embed_batch(batches[0])
+    with ThreadPoolExecutor(max_workers=max(1, min(EMBED_MAX_CONCURRENCY, len(batches)))) as pool:
+        results = list(pool.map(metrics.bind(_embed_batch), batches))
+    return [v for r in results for v in r]
+
+
+def embed_texts(texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
     """Return embeddings for a list of texts using Gemini embeddings (text-embedding-004).
-    Calls the API per item to avoid SDK differences across versions.
+    Cached texts are served from the embedding cache; the rest are sent batch_size per request
+    (EMBED_BATCH_SIZE) with several batches in parallel up to EMBED_MAX_CONCURRENCY.
+    Output order matches input order.
     """
-    _ensure_config()
-    out: List[List[float]] = []
-    model = "models/text-embedding-004" if "text-embedding-004" not in "models/text-embedding-004" else "text-embedding-004"
-    for t in texts:
-        content = t if (isinstance(t, str) and t.strip()) else " "
-        resp = genai.embed_content(model=model, content=content)
-        # Expect {'embedding': [...]} across versions
-        vec = resp.get("embedding") if isinstance(resp, dict) else None
-        if not vec and hasattr(resp, "embedding"):
-            vec = getattr(resp, "embedding")
-        if not vec:
-            raise RuntimeError("Failed to obtain embedding from Gemini response")
-        out.append(list(vec))
-    return out
+    if not texts:
+        return []
+    contents = [_normalize(t) for t in texts]
+    keys = [cache_key(EMBED_MODEL, c) for c in contents]
+    found: Dict[str, List[float]] = {}
+    missing: Dict[str, str] = {}
+    for k, c in zip(keys, contents):
+        if k in found or k in missing:
+            continue
+        v = _embed_cache.get(k)
+        if v is not None:
+            found[k] = v
+        else:
+            missing[k] = c
+    if missing:
+        _ensure_config()
+        vecs = _embed_uncached(list(missing.values()), batch_size)
+        for k, v in zip(missing.keys(), vecs):
+            _embed_cache.set(k, v)
+            found[k] = v
+    return [list(found[k]) for k in keys]
+
+
+async def aembed_texts(texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+    """Async variant of embed_texts for route handlers; runs the blocking calls in a worker thread."""
+    return await asyncio.to_thread(embed_texts, texts, batch_size)
@@ -0,0 +1,141 @@
+import re
+import os
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Extractive (heuristic) summarizer used when the Gemini path is unavailable.
+# Patterns are compiled once; each distinct sentence is tokenized once and all
+# bookkeeping is by index, so a summary is linear in the transcript size.
+EXTRACTIVE_NUMPY_MIN = int(os.getenv("EXTRACTIVE_NUMPY_MIN", "20000"))
+
+STOPWORDS = frozenset(
+    "a,an,the,and,or,but,if,then,else,for,of,in,on,at,by,to,from,with,as,that,this,these,those,is,are,was,were,be,been,being,can,could,should,would,may,might,will,shall,do,does,did,have,has,had".split(",")
+)
+_NEWLINES = re.compile(r"\n+")
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"[a-z0-9'-]+")
+_BULLETS_REQUESTED = re.compile(r"bullet|point|list", re.I)
+
+# Categories detected in the instructions, and the sentence patterns they select
+_INSTRUCTION_PATTERNS = {
+    "deadlines": re.compile(r"deadline|due|by\s+\d{1,2}\/(\d{1,2}|\d{4})|eod|eow", re.I),
+    "actions": re.compile(r"action|todo|follow[- ]?up|task|next step", re.I),
+    "decisions": re.compile(r"decision|agreed|conclude|finalize", re.I),
+    "risks": re.compile(r"risk|blocker|issue|concern", re.I),
+    "owners": re.compile(r"owner|assign|responsible|who", re.I),
+}
+_SENTENCE_PATTERNS = {
+    "deadlines": re.compile(r"deadline|due|by\s+\w+\s*\d{1,2}|\b\d{1,2}\/\d{1,2}\b|eod|eow|tomorrow|next week", re.I),
+    "actions": re.compile(r"\b(we|i|they)\s+(will|need to|must|should)|action|todo|follow[- ]?up|task|next step", re.I),
+    "decisions": re.compile(r"decided|agreed|approved|concluded|finalized", re.I),
+    "risks": re.compile(r"risk|blocker|issue|concern|problem", re.I),
+    "owners": re.compile(r"@?\b[A-Z][a-z]+\b|assigned to|owner|responsible", re.I),
+}
+
+
+def sentence_split(text: str) -> List[str]:
+    parts = _SENTENCE_BOUNDARY.split(_NEWLINES.sub(" ", text))
+    return [s for s in (p.strip() for p in parts) if s]
+
+
+def apply_instruction_filters(sentences: List[str], instructions: str | None) -> List[str]:
+    """
+    Filter sentences based on user instructions. If multiple categories are requested
+    (e.g., actions AND deadlines), include sentences that match ANY requested category
+    instead of requiring ALL. If no categories are detected, return the original list.
+
+    Note: For more robust NLP (sentence splitting, tokenization, lemmatization, NER),
+    consider integrating spaCy or NLTK. This function intentionally remains regex-based
+    and dependency-light.
+    """
+    if not instructions:
+        return sentences
+    instr = instructions.lower()
+    matchers = [_SENTENCE_PATTERNS[key] for key, p in _INSTRUCTION_PATTERNS.items() if p.search(instr)]
+    # If no specific category requested, return sentences unchanged
+    if not matchers:
+        return sentences
+
+    # Include each distinct sentence once if it matches ANY requested category
+    verdict: Dict[str, bool] = {}
+    for s in sentences:
+        if s not in verdict:
+            verdict[s] = any(m.search(s) for m in matchers)
+    filtered = [s for s, ok in verdict.items() if ok]
+    return filtered or sentences
+
+
+def _unique(sentences: List[str]) -> Tuple[List[str], List[int]]:
+    """Distinct sentences in first-occurrence order, with their multiplicities."""
+    index: Dict[str, int] = {}
+    counts: List[int] = []
+    for s in sentences:
+        i = index.get(s)
+        if i is None:
+            index[s] = len(counts)
+            counts.append(1)
+        else:
+            counts[i] += 1
+    return list(index), counts
+
+
+def _tokenize(unique: List[str]) -> Tuple[List[List[str]], List[int]]:
+    """One pass per distinct sentence: content words and whitespace-token counts."""
+    words = [[w for w in _WORD.findall(s.lower()) if w not in STOPWORDS] for s in unique]
+    lengths = [len(s.split()) for s in unique]
+    return words, lengths
+
+
+def _scores_python(words: List[List[str]], counts: List[int], lengths: List[int]) -> List[float]:
+    freq: Dict[str, int] = {}
+    for ws, c in zip(words, counts):
+        for w in ws:
+            freq[w] = freq.get(w, 0) + c
+    get = freq.__getitem__
+    return [sum(map(get, ws)) / max(5, n) for ws, n in zip(words, lengths)]
+
+
+def _scores_numpy(words: List[List[str]], counts: List[int], lengths: List[int]) -> List[float]:
+    vocab: Dict[str, int] = {}
+    ids = np.fromiter((vocab.setdefault(w, len(vocab)) for ws in words for w in ws), dtype=np.int64)
+    owner = np.repeat(np.arange(len(words)), [len(ws) for ws in words])
+    # Integer-valued float64 sums are exact, so the quotients match the pure-Python path bit for bit
+    freq = np.bincount(ids, weights=np.asarray(counts, dtype=np.float64)[owner], minlength=len(vocab))
+    totals = np.bincount(owner, weights=freq[ids], minlength=len(words))
+    return (totals / np.maximum(5, np.asarray(lengths, dtype=np.float64))).tolist()
+
+
+def _score_unique(sentences: List[str], use_numpy: Optional[bool] = None) -> Tuple[List[str], List[float]]:
+    unique, counts = _unique(sentences)
+    words, lengths = _tokenize(unique)
+    if use_numpy is None:
+        use_numpy = len(unique) >= EXTRACTIVE_NUMPY_MIN
+    scorer = _scores_numpy if use_numpy and unique else _scores_python
+    return unique, scorer(words, counts, lengths)
+
+
+def score_sentences(sentences: List[str], use_numpy: Optional[bool] = None) -> dict[str, float]:
+    """Score each distinct sentence by the corpus frequency of its content words, per token."""
+    unique, scores = _score_unique(sentences, use_numpy)
+    return dict(zip(unique, scores))
+
+
+def extractive_summary(text: str, instructions: str | None, max_sentences: int = 6, use_numpy: Optional[bool] = None) -> str:
+    """
+    Pick the top-scoring sentences (ties keep transcript order) and return them in transcript
+    order, as bullets when the instructions ask for a list.
+    """
+    sentences = sentence_split(text)
+    if not sentences:
+        return ""
+    filtered = apply_instruction_filters(sentences, instructions)
+    unique, scores = _score_unique(filtered, use_numpy)
+    take = min(max_sentences, max(3, int(len(filtered) * 0.3)))
+    # nlargest is stable, so equal scores rank by first occurrence; the filtered list keeps
+    # transcript order, so sorting the picked indices restores first-occurrence order
+    selected = [unique[i] for i in sorted(heapq.nlargest(take, range(len(unique)), key=scores.__getitem__))]
+    if _BULLETS_REQUESTED.search(instructions or ""):
+        return "\n".join([f"• {s}" for s in selected])
+    return " ".join(selected)
@@ -0,0 +1,271 @@
+import os
+import json
+import asyncio
+import zipfile
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from ..db import db
+from . import metrics
+from .summarizer import summarize
+from .embeddings import aembed_texts
+from .embedding_codec import pack_embedding
+from .render import render_summary
+from .vector_store import get_store
+
+# Bulk import of transcript archives (POST /api/meetings/import, app.scripts.import_meetings).
+# Transcripts are summarized on a bounded pool; finished ones are written in batches: one
+# embedding request per batch, one insert_many and one bulk_load per vector scope.
+IMPORT_CONCURRENCY = int(os.getenv("IMPORT_CONCURRENCY", "4"))
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "50"))
+IMPORT_ITEM_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+IMPORT_MAX_FAILURES_REPORTED = int(os.getenv("IMPORT_MAX_FAILURES_REPORTED", "200"))
+
+COLLECTION = "meetings"
+TEXT_EXTENSIONS = (".txt", ".md", ".vtt", ".srt")
+
+# (reference, fields) where fields has title/text/instructions, or an exception for a bad item
+Item = Tuple[str, Any]
+
+
+def meeting_document(
+    title: Optional[str],
+    instructions: Optional[str],
+    transcript_text: str,
+    summary: str,
+    title_emb: Optional[List[float]] = None,
+    summary_emb: Optional[List[float]] = None,
+) -> dict:
+    """A new meeting document as stored in Mongo."""
+    now = datetime.utcnow()
+    return {
+        "title": title,
+        "transcriptText": transcript_text,
+        "transcriptChars": len(transcript_text),
+        "instructions": instructions,
+        "summary": summary,
+        **render_summary(summary),
+        **({"titleEmbedding": pack_embedding(title_emb)} if title_emb is not None else {}),
+        **({"summaryEmbedding": pack_embedding(summary_emb)} if summary_emb is not None else {}),
+        "recipients": [],
+        "createdAt": now,
+        "updatedAt": now,
+    }
+
+
+# --- Archive parsing ------------------------------------------------------------------------
+
+def utf8_exceeds(text: str, limit: int) -> bool:
+    """Whether `text` is over `limit` bytes in UTF-8, as for uploads. A character takes at most
+    4 bytes, so short texts skip the encode."""
+    return len(text) * 4 > limit and len(text.encode("utf-8", errors="surrogatepass")) > limit
+
+
+def _fields(obj: Any) -> dict:
+    if not isinstance(obj, dict):
+        raise ValueError("expected a JSON object")
+    text = obj.get("text") or obj.get("transcript") or obj.get("transcriptText")
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError("missing transcript text")
+    if utf8_exceeds(text, IMPORT_ITEM_MAX_BYTES):
+        raise ValueError(f"transcript exceeds {IMPORT_ITEM_MAX_BYTES} bytes")
+    return {"title": obj.get("title"), "text": text, "instructions": obj.get("instructions")}
+
+
+def iter_jsonl(lines: Iterable[bytes], name: str = "") -> Iterator[Item]:
+    """One meeting per line: {"title", "text" (or "transcript"), "instructions"}; blank lines are skipped."""
+    prefix = f"{name}:" if name else "line "
+    for n, raw in enumerate(lines, 1):
+        if not raw.strip():
+            continue
+        try:
+            yield f"{prefix}{n}", _fields(json.loads(raw))
+        except Exception as e:
+            yield f"{prefix}{n}", e
+
+
+def iter_zip(path: str) -> Iterator[Item]:
+    """Text members are one transcript each (titled by file name); .json/.jsonl members hold meeting objects."""
+    with zipfile.ZipFile(path) as zf:
+        for info in zf.infolist():
+            name = info.filename
+            base = os.path.basename(name)
+            if info.is_dir() or not base or base.startswith(".") or name.startswith("__MACOSX/"):
+                continue
+            ext = os.path.splitext(base)[1].lower()
+            if ext not in TEXT_EXTENSIONS + (".json", ".jsonl"):
+                yield name, ValueError("unsupported file type")
+                continue
+            if ext != ".jsonl" and info.file_size > IMPORT_ITEM_MAX_BYTES:
+                yield name, ValueError(f"file exceeds {IMPORT_ITEM_MAX_BYTES} bytes")
+                continue
+            try:
+                if ext == ".jsonl":
+                    with zf.open(info) as f:
+                        yield from iter_jsonl(f, name)
+                    continue
+                data = zf.read(info)
+            except Exception as e:
+                yield name, e
+                continue
+            if ext == ".json":
+                try:
+                    objs = json.loads(data)
+                except Exception as e:
+                    yield name, e
+                    continue
+                for i, obj in enumerate(objs if isinstance(objs, list) else [objs]):
+                    ref = f"{name}[{i}]" if isinstance(objs, list) else name
+                    try:
+                        yield ref, _fields(obj)
+                    except Exception as e:
+                        yield ref, e
+            else:
+                text = data.decode("utf-8", errors="ignore")
+                if not text.strip():
+                    yield name, ValueError("empty transcript")
+                else:
+                    yield name, {"title": os.path.splitext(base)[0], "text": text, "instructions": None}
+
+
+def iter_archive(path: str, filename: Optional[str] = None) -> Iterator[Item]:
+    """Items of a ZIP (detected by signature) or JSONL file."""
+    with open(path, "rb") as f:
+        is_zip = f.read(4) == b"PK\x03\x04"
+    if is_zip:
+        yield from iter_zip(path)
+        return
+    with open(path, "rb") as f:
+        yield from iter_jsonl(f, os.path.basename(filename or ""))
+
+
+# --- Import pipeline ------------------------------------------------------------------------
+
+class _Importer:
+    def __init__(self, instructions: Optional[str], progress: dict, concurrency: int, batch: int,
+                 index: bool, on_progress: Optional[Callable[[dict], None]]):
+        self.instructions = (instructions or "").strip()
+        self.progress = progress
+        self.concurrency = max(1, concurrency)
+        self.batch = max(1, batch)
+        self.index = index
+        self.on_progress = on_progress
+        self.pending: set = set()
+        self.ready: List[Tuple[str, dict, str]] = []
+        progress.update({"processed": 0, "imported": 0, "failed": 0, "indexFailures": 0, "failures": []})
+
+    def _fail(self, ref: str, error: Any):
+        p = self.progress
+        p["failed"] += 1
+        p["processed"] += 1
+        if len(p["failures"]) < IMPORT_MAX_FAILURES_REPORTED:
+            p["failures"].append({"item": ref, "error": str(error) or error.__class__.__name__})
+
+    async def _summarize(self, ref: str, fields: dict):
+        try:
+            summary = await asyncio.to_thread(summarize, fields["text"], fields["instructions"])
+        except Exception as e:
+            self._fail(ref, e)
+            return
+        self.ready.append((ref, fields, summary))
+
+    async def _flush(self):
+        batch, self.ready = self.ready, []
+        if not batch:
+            return
+        titles = [f["title"] or "" for _, f, _ in batch]
+        summaries = [s or "" for _, _, s in batch]
+        embs: Optional[List[List[float]]] = None
+        try:
+            # One call for the whole batch (embed_texts splits it into EMBED_BATCH_SIZE requests)
+            embs = await aembed_texts(titles + summaries)
+        except Exception:
+            # Import without embeddings; search is unavailable for these until a backfill
+            pass
+        n = len(batch)
+        docs = [
+            {"_id": ObjectId(), **meeting_document(
+                f["title"], f["instructions"], f["text"], s,
+                embs[i] if embs else None, embs[n + i] if embs else None,
+            )}
+            for i, (_, f, s) in enumerate(batch)
+        ]
+        failed: Dict[int, str] = {}
+        try:
+            with metrics.span("db.insert_many"):
+                await db()[COLLECTION].insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            failed = {err["index"]: err.get("errmsg", "write failed") for err in e.details.get("writeErrors", [])}
+        except Exception as e:
+            failed = {i: str(e) for i in range(n)}
+        for i, msg in failed.items():
+            self._fail(batch[i][0], msg)
+        ok = [i for i in range(n) if i not in failed]
+        self.progress["imported"] += len(ok)
+        self.progress["processed"] += len(ok)
+        if self.index and embs and ok:
+            store = get_store(len(embs[0]) or 768)
+            try:
+                for scope, offset in (("title", 0), ("summary", n)):
+                    items = [(str(docs[i]["_id"]), embs[offset + i]) for i in ok]
+                    await asyncio.to_thread(store.bulk_load, scope, items)
+            except Exception as e:
+                print(f"[import] vector bulk load failed: {e}")
+                self.progress["indexFailures"] += len(ok)
+        if self.on_progress:
+            self.on_progress(self.progress)
+
+    async def _reap(self, return_when):
+        done, self.pending = await asyncio.wait(self.pending, return_when=return_when)
+        for task in done:
+            task.result()
+        if len(self.ready) >= self.batch:
+            await self._flush()
+
+    async def run(self, items: Iterable[Item]) -> dict:
+        it = iter(items)
+        try:
+            while True:
+                # Archive members are read and decoded off the event loop
+                item = await asyncio.to_thread(next, it, None)
+                if item is None:
+                    break
+                ref, fields = item
+                if isinstance(fields, Exception):
+                    self._fail(ref, fields)
+                    continue
+                fields["instructions"] = (fields.get("instructions") or self.instructions).strip()
+                if not fields["instructions"]:
+                    self._fail(ref, "no instructions (set them per item or for the import)")
+                    continue
+                while len(self.pending) >= self.concurrency:
+                    await self._reap(asyncio.FIRST_COMPLETED)
+                self.pending.add(asyncio.create_task(self._summarize(ref, fields)))
+            if self.pending:
+                await self._reap(asyncio.ALL_COMPLETED)
+            await self._flush()
+        finally:
+            for task in self.pending:
+                task.cancel()
+        return self.progress
+
+
+async def import_meetings(
+    items: Iterable[Item],
+    instructions: Optional[str] = None,
+    progress: Optional[dict] = None,
+    concurrency: int = IMPORT_CONCURRENCY,
+    batch: int = IMPORT_BATCH_SIZE,
+    index: bool = True,
+    on_progress: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Summarize, embed and store meetings from `items` (see iter_archive). `instructions` applies to
+    items without their own. `progress` is updated in place (processed, imported, failed,
+    indexFailures and the first failures with their item references) and returned. With
+    `index=False` vectors are not loaded into the store (they are still saved on the documents).
+    """
+    return await _Importer(instructions, progress if progress is not None else {}, concurrency, batch, index, on_progress).run(items)
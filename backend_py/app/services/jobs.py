@@ -0,0 +1,172 @@
+import os
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+# Bounded background worker pool for long-running requests (e.g. summarize).
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "100"))
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "3600"))
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+class Job:
+    def __init__(self, kind: str, fn: Callable[["Job"], Awaitable[Any]]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"  # queued | running | done | failed | cancelled
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.progress: Dict[str, Any] = {}
+        self.createdAt = datetime.utcnow()
+        self.startedAt: Optional[datetime] = None
+        self.finishedAt: Optional[datetime] = None
+        self._fn = fn
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    def to_dict(self) -> dict:
+        return jsonable_encoder({
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "createdAt": self.createdAt,
+            "startedAt": self.startedAt,
+            "finishedAt": self.finishedAt,
+        })
+
+
+class JobQueue:
+    """In-process job queue: a bounded asyncio.Queue drained by a fixed number of workers.
+    Jobs are coroutines; blocking work inside them should be offloaded with asyncio.to_thread.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, maxsize: int = JOB_QUEUE_MAX):
+        self.workers = max(1, workers)
+        self.maxsize = max(1, maxsize)
+        self._queue: Optional[asyncio.Queue] = None
+        self._jobs: Dict[str, Job] = {}
+        self._tasks: list[asyncio.Task] = []
+        self._stopping = False
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._stopping = False
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        self._stopping = True
+        for job in self._jobs.values():
+            if not job.finished:
+                self.cancel(job.id)
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    async def drain(self, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for queued and running jobs to finish."""
+        if self._queue is None:
+            return True
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def submit(self, fn: Callable[[Job], Awaitable[Any]], kind: str = "job") -> Job:
+        if self._queue is None:
+            raise RuntimeError("Job queue not started")
+        self._prune()
+        job = Job(kind, fn)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError(f"Job queue is full ({self.maxsize} pending)")
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        if job.status == "queued":
+            # Worker skips it when dequeued
+            job.status = "cancelled"
+            job.finishedAt = datetime.utcnow()
+        elif job._task is not None:
+            # Threads already running cannot be interrupted; their result is discarded
+            job._task.cancel()
+        return job
+
+    def stats(self) -> dict:
+        counts: Dict[str, int] = {}
+        for j in self._jobs.values():
+            counts[j.status] = counts.get(j.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "maxQueue": self.maxsize,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "jobs": counts,
+        }
+
+    def _prune(self):
+        cutoff = datetime.utcnow() - timedelta(seconds=JOB_TTL_SECONDS)
+        stale = [jid for jid, j in self._jobs.items() if j.finished and j.finishedAt and j.finishedAt < cutoff]
+        for jid in stale:
+            del self._jobs[jid]
+
+    async def _worker(self):
+        assert self._queue is not None
+        while True:
+            job: Job = await self._queue.get()
+            try:
+                if job.status == "cancelled":
+                    continue
+                job.status = "running"
+                job.startedAt = datetime.utcnow()
+                job._task = asyncio.create_task(job._fn(job))
+                try:
+                    job.result = await job._task
+                    job.status = "done"
+                except asyncio.CancelledError:
+                    job.status = "cancelled"
+                    if self._stopping:
+                        raise
+                except Exception as e:
+                    job.status = "failed"
+                    job.error = str(e) or e.__class__.__name__
+                finally:
+                    job.finishedAt = datetime.utcnow()
+                    job._task = None
+            finally:
+                self._queue.task_done()
+
+
+# Global queue singleton
+_queue: Optional[JobQueue] = None
+
+
+def get_queue() -> JobQueue:
+    global _queue
+    if _queue is None:
+        _queue = JobQueue()
+    return _queue
@@ -1,57 +1,267 @@
 import os
-from typing import List, Optional
+import time
+import random
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
 import aiosmtplib
 from email.message import EmailMessage
+from email.utils import make_msgid
 from dotenv import load_dotenv
+from .jobs import Job, JobQueue
+from . import metrics
 load_dotenv()
 
-async def send_email(to: List[str], subject: str, text: Optional[str] = None, html: Optional[str] = None):
-    host = os.getenv("SMTP_HOST")
+# Connection pool: connections are kept open between messages and NOOP-checked before
+# reuse once idle for a while. Outbound mail goes through a dedicated job queue with retries.
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "2"))
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+SMTP_IDLE_CHECK_SECONDS = float(os.getenv("SMTP_IDLE_CHECK_SECONDS", "30"))
+SMTP_MAX_IDLE_SECONDS = float(os.getenv("SMTP_MAX_IDLE_SECONDS", "300"))
+MAIL_QUEUE_MAX = int(os.getenv("MAIL_QUEUE_MAX", "500"))
+MAIL_MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", "5"))
+MAIL_BACKOFF_SECONDS = float(os.getenv("MAIL_BACKOFF_SECONDS", "2"))
+MAIL_BACKOFF_MAX_SECONDS = float(os.getenv("MAIL_BACKOFF_MAX_SECONDS", "60"))
+MAIL_DRAIN_SECONDS = float(os.getenv("MAIL_DRAIN_SECONDS", "10"))
+
+
+def _settings() -> dict:
     port = int(os.getenv("SMTP_PORT", "587"))
     user = os.getenv("SMTP_USER")
-    password = os.getenv("SMTP_PASS")
-    mail_from = os.getenv("MAIL_FROM", user or "no-reply@example.com")
-    debug = os.getenv("SMTP_DEBUG", "false").lower() in ("1", "true", "yes")
+    return {
+        "host": os.getenv("SMTP_HOST"),
+        "port": port,
+        "user": user,
+        "password": os.getenv("SMTP_PASS"),
+        "mail_from": os.getenv("MAIL_FROM", user or "no-reply@example.com"),
+        # SMTP_AUTH=false and SMTP_SECURITY=none allow a local debug server (e.g. aiosmtpd on port 1025)
+        "auth": os.getenv("SMTP_AUTH", "true").lower() in ("1", "true", "yes"),
+        "security": (os.getenv("SMTP_SECURITY") or ("ssl" if port == 465 else "starttls")).lower(),
+        "debug": os.getenv("SMTP_DEBUG", "false").lower() in ("1", "true", "yes"),
+    }
+
 
-    if not host or not user or not password:
+def _check_configured(cfg: dict):
+    if not cfg["host"] or (cfg["auth"] and (not cfg["user"] or not cfg["password"])):
         raise RuntimeError("SMTP not configured. Please set SMTP_HOST, SMTP_USER, SMTP_PASS in .env")
 
+
+def build_message(to: List[str], subject: str, text: Optional[str] = None, html: Optional[str] = None) -> EmailMessage:
+    cfg = _settings()
+    _check_configured(cfg)
     msg = EmailMessage()
-    msg["From"] = mail_from
+    msg["From"] = cfg["mail_from"]
     msg["To"] = ", ".join(to)
     msg["Subject"] = subject
+    # Assigned up front so callers get an id while the message is still queued
+    msg["Message-ID"] = make_msgid()
 
     if html:
         msg.set_content(text or "")
         msg.add_alternative(html, subtype="html")
     else:
         msg.set_content(text or "")
+    return msg
+
+
+class SMTPPool:
+    """Up to `size` persistent SMTP connections. TLS and login happen once per connection,
+    not once per message; idle connections are health-checked with NOOP before reuse."""
+
+    def __init__(self, size: int = SMTP_POOL_SIZE):
+        self.size = max(1, size)
+        self._cfg = _settings()
+        self._idle: List[Tuple[aiosmtplib.SMTP, float]] = []  # (client, last used)
+        self._slots = asyncio.Semaphore(self.size)
+        self.opened = self.reused = self.discarded = 0
+
+    async def _open(self, port: int, security: str) -> aiosmtplib.SMTP:
+        cfg = self._cfg
+        if cfg["debug"]:
+            print(f"[SMTP] connecting host={cfg['host']} port={port} security={security} user={cfg['user']}")
+        client = aiosmtplib.SMTP(
+            hostname=cfg["host"], port=port, timeout=SMTP_TIMEOUT,
+            use_tls=security == "ssl", start_tls=security == "starttls",
+        )
+        await client.connect()
+        try:
+            if cfg["auth"]:
+                await client.login(cfg["user"], cfg["password"])
+        except BaseException:
+            client.close()
+            raise
+        return client
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        _check_configured(self._cfg)
+        port, security = self._cfg["port"], self._cfg["security"]
+        try:
+            client = await self._open(port, security)
+        except aiosmtplib.SMTPAuthenticationError as auth_err:
+            alt_port = 465 if port != 465 else 587
+            if self._cfg["debug"]:
+                print(f"[SMTP] auth failed on {port} ({auth_err}); retrying {alt_port}")
+            client = await self._open(alt_port, "ssl" if alt_port == 465 else "starttls")
+            # Later connections go straight to the port that worked
+            self._cfg.update(port=alt_port, security="ssl" if alt_port == 465 else "starttls")
+        self.opened += 1
+        return client
 
-    async def send_via(port_num: int):
-        if debug:
-            print(f"[SMTP] sending via host={host} port={port_num} user={user}")
-        if port_num == 465:
-            client = aiosmtplib.SMTP(hostname=host, port=port_num, use_tls=True)
-            await client.connect()
-            await client.login(user, password)
-            resp = await client.send_message(msg)
-            await client.quit()
-            return resp
+    async def _acquire(self) -> aiosmtplib.SMTP:
+        while self._idle:
+            client, last_used = self._idle.pop()
+            idle = time.monotonic() - last_used
+            if idle > SMTP_MAX_IDLE_SECONDS or not client.is_connected:
+                self._discard(client)
+                continue
+            if idle > SMTP_IDLE_CHECK_SECONDS:
+                try:
+                    await client.noop()
+                except Exception:
+                    self._discard(client)
+                    continue
+            self.reused += 1
+            return client
+        return await self._connect()
+
+    def _discard(self, client: aiosmtplib.SMTP):
+        self.discarded += 1
+        try:
+            client.close()
+        except Exception:
+            pass
+
+    async def send(self, msg: EmailMessage):
+        with metrics.span("mail.send"):
+            return await self._send(msg)
+
+    async def _send(self, msg: EmailMessage):
+        async with self._slots:
+            client = await self._acquire()
+            try:
+                response = await client.send_message(msg)
+            except aiosmtplib.SMTPServerDisconnected:
+                # A pooled connection was dropped by the server; retry once on a fresh one
+                self._discard(client)
+                client = await self._connect()
+                try:
+                    response = await client.send_message(msg)
+                except BaseException:
+                    self._discard(client)
+                    raise
+            except (aiosmtplib.SMTPResponseException, aiosmtplib.SMTPRecipientsRefused):
+                # The server answered, so the connection stays usable once the transaction is reset
+                await self._release_after_reset(client)
+                raise
+            except BaseException:
+                self._discard(client)
+                raise
+            self._idle.append((client, time.monotonic()))
+            return response
+
+    async def _release_after_reset(self, client: aiosmtplib.SMTP):
+        try:
+            await client.rset()
+        except Exception:
+            self._discard(client)
         else:
-            return await aiosmtplib.send(
-                msg,
-                hostname=host,
-                port=port_num,
-                start_tls=True,
-                username=user,
-                password=password,
-            )
-
-    try:
-        response = await send_via(port)
-    except aiosmtplib.errors.SMTPAuthenticationError as auth_err:
-        alt_port = 465 if port != 465 else 587
-        if debug:
-            print(f"[SMTP] auth failed on {port} ({auth_err}); retrying {alt_port}")
-        response = await send_via(alt_port)
-    return {"messageId": msg.get("Message-ID", ""), "response": str(response)}
+            self._idle.append((client, time.monotonic()))
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for client, _ in idle:
+            try:
+                await client.quit()
+            except Exception:
+                client.close()
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "opened": self.opened,
+            "reused": self.reused,
+            "discarded": self.discarded,
+        }
+
+
+def _retryable(e: Exception) -> bool:
+    """Transient failures (connection problems, timeouts, 4xx replies) are retried; 5xx replies,
+    refused recipients and configuration errors are not."""
+    if isinstance(e, aiosmtplib.SMTPResponseException):
+        return 400 <= e.code < 500
+    return isinstance(e, (OSError, asyncio.TimeoutError))
+
+
+async def _send_with_retry(msg: EmailMessage, job: Optional[Job] = None) -> dict:
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            response = await get_pool().send(msg)
+            return {"messageId": msg["Message-ID"], "response": str(response), "attempts": attempt}
+        except Exception as e:
+            if attempt >= MAIL_MAX_ATTEMPTS or not _retryable(e):
+                raise
+            # Exponential backoff with jitter
+            delay = min(MAIL_BACKOFF_MAX_SECONDS, MAIL_BACKOFF_SECONDS * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+            print(f"[SMTP] send attempt {attempt} failed ({e}); retrying in {delay:.1f}s")
+            if job is not None:
+                job.progress = {"attempt": attempt, "lastError": str(e), "retryInSeconds": round(delay, 1)}
+            await asyncio.sleep(delay)
+
+
+def enqueue_email(
+    to: List[str],
+    subject: str,
+    text: Optional[str] = None,
+    html: Optional[str] = None,
+    on_sent: Optional[Callable[[dict], Awaitable[Any]]] = None,
+) -> Tuple[Job, str]:
+    """
+    Queue a message for background delivery with retries. `on_sent` runs after the server
+    accepts it. Returns the job (poll it like any other job) and the Message-ID.
+    Raises RuntimeError if SMTP is not configured and QueueFullError if the queue is full.
+    """
+    msg = build_message(to, subject, text, html)
+
+    async def deliver(job: Job) -> dict:
+        info = await _send_with_retry(msg, job)
+        if on_sent is not None:
+            await on_sent(info)
+        return info
+
+    job = get_mail_queue().submit(deliver, kind="email")
+    return job, msg["Message-ID"]
+
+
+def mail_stats() -> dict:
+    return {
+        "pool": _pool.stats() if _pool is not None else None,
+        "queue": get_mail_queue().stats(),
+    }
+
+
+# Singletons
+_pool: Optional[SMTPPool] = None
+_mail_queue: Optional[JobQueue] = None
+
+
+def get_pool() -> SMTPPool:
+    global _pool
+    if _pool is None:
+        _pool = SMTPPool()
+    return _pool
+
+
+def get_mail_queue() -> JobQueue:
+    global _mail_queue
+    if _mail_queue is None:
+        _mail_queue = JobQueue(workers=SMTP_POOL_SIZE, maxsize=MAIL_QUEUE_MAX)
+    return _mail_queue
+
+
+async def close_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
@@ -0,0 +1,306 @@
+import os
+import time
+import functools
+import threading
+import contextvars
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# In-process metrics in the Prometheus text format (GET /api/metrics), no client library needed.
+# Timing spans feed the app_stage_seconds histogram and, per request, a trace that can be logged.
+# With METRICS_ENABLED=false spans are a shared no-op and counters return immediately;
+# scrape-time gauges (cache, index and queue sizes) are still reported.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+METRICS_TRACE = os.getenv("METRICS_TRACE", "false").lower() in ("1", "true", "yes")
+METRICS_TRACE_MIN_MS = float(os.getenv("METRICS_TRACE_MIN_MS", "0"))
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+TOKEN_BUCKETS = (100, 1000, 5000, 10000, 50000, 100000, 500000, 1000000)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.series: Dict[LabelKey, List[float]] = {}  # per label set: bucket counts..., sum, count
+
+    def observe(self, key: LabelKey, value: float):
+        row = self.series.get(key)
+        if row is None:
+            row = self.series[key] = [0.0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                row[i] += 1
+                break
+        row[-2] += value
+        row[-1] += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, str] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, _Histogram] = {}
+        self._collectors: List[Callable[[], Iterable[tuple]]] = []
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float, labels: dict):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, labels: dict, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        key = _label_key(labels)
+        with self._lock:
+            hist = self._histograms.get(name)
+            if hist is None:
+                hist = self._histograms[name] = _Histogram(buckets)
+            hist.observe(key, value)
+
+    def register_collector(self, fn: Callable[[], Iterable[tuple]]):
+        """fn() yields (name, type, help, [(labels, value), ...]) at scrape time."""
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        lines: List[str] = []
+
+        def header(name: str, kind: str, help_text: Optional[str]):
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            counters = {n: dict(s) for n, s in self._counters.items()}
+            histograms = {n: (h.buckets, {k: list(r) for k, r in h.series.items()}) for n, h in self._histograms.items()}
+        for name, series in sorted(counters.items()):
+            header(name, "counter", self._help.get(name))
+            lines.extend(f"{name}{_fmt_labels(k)} {v:g}" for k, v in series.items())
+        for name, (buckets, series) in sorted(histograms.items()):
+            header(name, "histogram", self._help.get(name))
+            for key, row in series.items():
+                cumulative = 0.0
+                for bound, n in zip(buckets, row):
+                    cumulative += n
+                    lines.append(f"{name}_bucket{_fmt_labels(key, ('le', f'{bound:g}'))} {cumulative:g}")
+                lines.append(f"{name}_bucket{_fmt_labels(key, ('le', '+Inf'))} {row[-1]:g}")
+                lines.append(f"{name}_sum{_fmt_labels(key)} {row[-2]:.6f}")
+                lines.append(f"{name}_count{_fmt_labels(key)} {row[-1]:g}")
+        for collect in self._collectors:
+            try:
+                for name, kind, help_text, samples in collect():
+                    header(name, kind, help_text)
+                    lines.extend(f"{name}{_fmt_labels(_label_key(labels))} {float(value):g}" for labels, value in samples)
+            except Exception as e:
+                lines.append(f"# collector failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+registry.describe("app_stage_seconds", "Time spent in instrumented stages (summarizer, embeddings, vector store, mailer, db)")
+registry.describe("app_http_request_seconds", "HTTP request latency by route, method and status")
+registry.describe("app_llm_calls_total", "Gemini generate calls by summarization stage")
+registry.describe("app_llm_tokens_total", "Gemini tokens by kind (prompt or response; estimated when the API does not report usage)")
+registry.describe("app_llm_calls_per_request", "Gemini calls made while serving one request")
+registry.describe("app_llm_tokens_per_request", "Gemini tokens used while serving one request")
+registry.describe("app_mongo_command_seconds", "MongoDB command latency by command name")
+registry.describe("app_mongo_command_failures_total", "Failed MongoDB commands by command name")
+
+
+# --- Per-request traces ---------------------------------------------------------------------
+
+class _Trace:
+    __slots__ = ("spans", "tallies", "lock")
+
+    def __init__(self):
+        self.spans: List[Tuple[str, float]] = []
+        self.tallies: Dict[str, float] = {}
+        self.lock = threading.Lock()
+
+
+_current: contextvars.ContextVar[Optional[_Trace]] = contextvars.ContextVar("metrics_trace", default=None)
+
+
+def bind(fn: Callable) -> Callable:
+    """Carry the current request's trace into a thread pool (executor threads do not inherit context)."""
+    trace = _current.get()
+    if not METRICS_ENABLED or trace is None:
+        return fn
+
+    def run(*args, **kwargs):
+        token = _current.set(trace)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return run
+
+
+def tally(name: str, value: float = 1):
+    """Add to a per-request total (e.g. LLM calls or tokens) of the current trace."""
+    trace = _current.get()
+    if trace is not None:
+        with trace.lock:
+            trace.tallies[name] = trace.tallies.get(name, 0) + value
+
+
+# --- Instrumentation API --------------------------------------------------------------------
+
+class _Span:
+    __slots__ = ("name", "labels", "t0")
+
+    def __init__(self, name: str, labels: dict):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.t0
+        registry.observe("app_stage_seconds", elapsed, {"stage": self.name, **self.labels})
+        trace = _current.get()
+        if trace is not None:
+            with trace.lock:
+                trace.spans.append((self.name, elapsed))
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str, **labels):
+    """Time a block: `with span("vector.upsert"): ...`"""
+    if not METRICS_ENABLED:
+        return _NOOP
+    return _Span(name, labels)
+
+
+def timed(name: str):
+    """Decorator form of span()."""
+    def wrap(fn):
+        if not METRICS_ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            with _Span(name, {}):
+                return fn(*args, **kwargs)
+        return run
+    return wrap
+
+
+def inc(name: str, value: float = 1, **labels):
+    if METRICS_ENABLED:
+        registry.inc(name, value, labels)
+
+
+def observe(name: str, value: float, buckets: Tuple[float, ...] = LATENCY_BUCKETS, **labels):
+    if METRICS_ENABLED:
+        registry.observe(name, value, labels, buckets)
+
+
+def register_collector(fn: Callable[[], Iterable[tuple]]):
+    registry.register_collector(fn)
+
+
+def render() -> str:
+    return registry.render()
+
+
+# --- HTTP middleware ------------------------------------------------------------------------
+
+def _summarize_trace(trace: _Trace) -> str:
+    totals: Dict[str, List[float]] = {}
+    for name, elapsed in trace.spans:
+        t = totals.setdefault(name, [0, 0.0])
+        t[0] += 1
+        t[1] += elapsed
+    parts = [f"{name}{f' x{n}' if n > 1 else ''} {secs * 1000:.1f}ms" for name, (n, secs) in totals.items()]
+    parts.extend(f"{k}={v:g}" for k, v in trace.tallies.items())
+    return " | ".join(parts)
+
+
+class MetricsMiddleware:
+    """ASGI middleware: request latency by route template, per-request LLM usage and optional
+    trace logging (METRICS_TRACE). Timing covers the whole response, including streamed bodies."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        trace = _Trace()
+        token = _current.set(trace)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - t0
+            _current.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            registry.observe("app_http_request_seconds", elapsed, {"method": scope["method"], "route": path, "status": status})
+            if "llm_calls" in trace.tallies:
+                registry.observe("app_llm_calls_per_request", trace.tallies["llm_calls"], {"route": path}, COUNT_BUCKETS)
+                registry.observe("app_llm_tokens_per_request", trace.tallies.get("llm_tokens", 0), {"route": path}, TOKEN_BUCKETS)
+            if METRICS_TRACE and elapsed * 1000 >= METRICS_TRACE_MIN_MS:
+                print(f"[trace] {scope['method']} {scope['path']} {status} {elapsed * 1000:.1f}ms | {_summarize_trace(trace)}")
+
+
+# --- MongoDB command monitoring -------------------------------------------------------------
+
+def mongo_listeners() -> list:
+    """pymongo event listeners that time every command (pass as event_listeners= to the client)."""
+    if not METRICS_ENABLED:
+        return []
+    from pymongo import monitoring
+
+    class _CommandTimer(monitoring.CommandListener):
+        def started(self, event):
+            pass
+
+        def succeeded(self, event):
+            registry.observe("app_mongo_command_seconds", event.duration_micros / 1e6, {"command": event.command_name})
+
+        def failed(self, event):
+            registry.observe("app_mongo_command_seconds", event.duration_micros / 1e6, {"command": event.command_name})
+            registry.inc("app_mongo_command_failures_total", 1, {"command": event.command_name})
+
+    return [_CommandTimer()]
@@ -0,0 +1,283 @@
+import os
+import re
+import json
+import time
+import random
+import threading
+from typing import Callable, Dict, Iterable, Iterator, TypeVar
+
+from . import metrics
+
+try:
+    from google.api_core import exceptions as _google_exceptions  # type: ignore
+    # ResourceExhausted (quota) subclasses TooManyRequests
+    _THROTTLE_TYPES: tuple = (_google_exceptions.TooManyRequests, _google_exceptions.ServiceUnavailable)
+except Exception:
+    _THROTTLE_TYPES = ()
+
+# Process-wide limits for Gemini calls (summaries and embeddings), one limiter per model:
+# token buckets for requests and tokens per minute, plus an AIMD concurrency limit that is
+# halved on 429/503 responses (and cut by 10% when a call is slower than the latency target)
+# and grows by about one slot per window of successful calls. Throttled calls are retried
+# with full-jitter exponential backoff; RateLimitedError is raised once retries run out.
+#
+# Defaults apply to every model; GEMINI_RATE_LIMITS overrides them per model, e.g.
+#   {"gemini-1.5-flash": {"rpm": 2000, "tpm": 4000000, "concurrency": 16},
+#    "text-embedding-004": {"rpm": 1500, "latencyTarget": 5}}
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "1000"))  # 0 = unlimited
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "0"))  # 0 = unlimited
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "16"))
+GEMINI_MIN_CONCURRENCY = int(os.getenv("GEMINI_MIN_CONCURRENCY", "1"))
+GEMINI_LATENCY_TARGET_SECONDS = float(os.getenv("GEMINI_LATENCY_TARGET_SECONDS", "0"))  # 0 = ignore latency
+GEMINI_RETRIES = int(os.getenv("GEMINI_RETRIES", "5"))
+GEMINI_RETRY_BASE_SECONDS = float(os.getenv("GEMINI_RETRY_BASE_SECONDS", "1"))
+GEMINI_RETRY_MAX_SECONDS = float(os.getenv("GEMINI_RETRY_MAX_SECONDS", "30"))
+GEMINI_QUEUE_TIMEOUT_SECONDS = float(os.getenv("GEMINI_QUEUE_TIMEOUT_SECONDS", "120"))
+_RATE_LIMITS: Dict[str, dict] = json.loads(os.getenv("GEMINI_RATE_LIMITS", "") or "{}")
+
+T = TypeVar("T")
+_END = object()
+
+
+class RateLimitedError(RuntimeError):
+    """Gemini kept throttling (or the local limits kept the call queued) past the retry budget."""
+
+    def __init__(self, message: str, retry_after: float = GEMINI_RETRY_BASE_SECONDS):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# google.api_core errors render as "<status> <message>"; only a leading status is trusted
+_THROTTLE_MESSAGE = re.compile(r"^\s*(?:429|503)\b|\bresource (?:has been )?exhausted\b|\brate limit", re.IGNORECASE)
+
+
+def is_throttled(e: BaseException) -> bool:
+    """429 (quota/rate) and 503 (overloaded) errors from the Gemini client."""
+    if isinstance(e, _THROTTLE_TYPES) or type(e).__name__ in ("ResourceExhausted", "TooManyRequests", "ServiceUnavailable"):
+        return True
+    try:
+        if int(getattr(e, "code", 0) or 0) in (429, 503):
+            return True
+    except (TypeError, ValueError):
+        pass
+    return _THROTTLE_MESSAGE.search(str(e)) is not None
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute up to the same capacity. A request larger than the
+    capacity waits for a full bucket and leaves it in debt, so the long-run rate still holds."""
+
+    def __init__(self, per_minute: int):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, amount: float, deadline: float):
+        if self.rate <= 0 or amount <= 0:
+            return
+        need = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.level >= need:
+                    self.level -= amount
+                    return
+                wait = (need - self.level) / self.rate
+            if now + wait > deadline:
+                raise RateLimitedError("local rate limit: queue timeout", retry_after=wait)
+            time.sleep(wait)
+
+    def give_back(self, amount: float):
+        """Return unused units (negative to charge more than was taken)."""
+        if self.rate <= 0 or not amount:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.level = min(self.capacity, self.level + amount)
+
+
+class AIMDLimit:
+    """Adaptive concurrency limit: additive increase on success, multiplicative decrease on congestion."""
+
+    def __init__(self, max_limit: int, min_limit: int = 1, latency_target: float = 0):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.latency_target = latency_target
+        self.limit = float(self.max_limit)
+        self.inflight = 0
+        self.rtt = 0.0  # moving average latency of successful calls
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self, deadline: float):
+        with self._cond:
+            while self.inflight >= int(self.limit):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RateLimitedError("concurrency limit: queue timeout")
+                self._cond.wait(remaining)
+            self.inflight += 1
+
+    def release(self, latency: float, throttled: bool = False, failed: bool = False):
+        with self._cond:
+            self.inflight -= 1
+            slow = self.latency_target > 0 and latency > self.latency_target
+            if throttled or slow:
+                # Calls in flight when the limit dropped report the same congestion: decrease at
+                # most once per round trip
+                now = time.monotonic()
+                if now - self._last_decrease >= (self.rtt or latency):
+                    self.limit = max(float(self.min_limit), self.limit * (0.5 if throttled else 0.9))
+                    self._last_decrease = now
+            elif not failed:
+                # +1/limit per success is about +1 per round trip at full concurrency
+                self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+                self.rtt = latency if not self.rtt else 0.8 * self.rtt + 0.2 * latency
+            self._cond.notify_all()
+
+
+class ModelLimiter:
+    def __init__(self, model: str):
+        cfg = _RATE_LIMITS.get(model, {})
+        self.model = model
+        self.requests = TokenBucket(int(cfg.get("rpm", GEMINI_RPM)))
+        self.tokens = TokenBucket(int(cfg.get("tpm", GEMINI_TPM)))
+        self.concurrency = AIMDLimit(
+            int(cfg.get("concurrency", GEMINI_MAX_CONCURRENCY)),
+            int(cfg.get("minConcurrency", GEMINI_MIN_CONCURRENCY)),
+            float(cfg.get("latencyTarget", GEMINI_LATENCY_TARGET_SECONDS)),
+        )
+        self.throttled = 0
+        self.retries = 0
+
+    def _admit(self, tokens: int):
+        """Take a request, the estimated tokens and a concurrency slot. If a later step times out,
+        the units already taken are returned so queue timeouts do not drain the buckets."""
+        deadline = time.monotonic() + GEMINI_QUEUE_TIMEOUT_SECONDS
+        self.requests.take(1, deadline)
+        try:
+            self.tokens.take(tokens, deadline)
+        except RateLimitedError:
+            self.requests.give_back(1)
+            raise
+        try:
+            self.concurrency.acquire(deadline)
+        except RateLimitedError:
+            self.requests.give_back(1)
+            self.tokens.give_back(tokens)
+            raise
+
+    def _backoff(self, e: Exception, latency: float, tokens: int, attempt: int) -> bool:
+        """Release the slot of a failed attempt. Returns False if the error should propagate;
+        for throttling, sleeps before the next attempt or raises RateLimitedError once retries run out."""
+        throttled = is_throttled(e)
+        self.concurrency.release(latency, throttled=throttled, failed=True)
+        if not throttled:
+            return False
+        self.tokens.give_back(tokens)  # rejected requests are not billed
+        self.throttled += 1
+        metrics.inc("app_llm_throttled_total", model=self.model)
+        if attempt >= GEMINI_RETRIES:
+            print(f"[ratelimit] {self.model} still throttled after {GEMINI_RETRIES} retries")
+            raise RateLimitedError(f"{self.model} is rate limited: {e}", retry_after=GEMINI_RETRY_MAX_SECONDS) from e
+        self.retries += 1
+        if attempt == 0:
+            print(f"[ratelimit] {self.model} throttled ({e.__class__.__name__}); retrying with backoff, limit {self.concurrency.limit:.1f}")
+        time.sleep(random.uniform(0, min(GEMINI_RETRY_MAX_SECONDS, GEMINI_RETRY_BASE_SECONDS * 2 ** attempt)))
+        return True
+
+    def call(self, fn: Callable[[], T], tokens: int = 0) -> T:
+        """Run fn() under the model's limits, retrying throttled attempts with jittered backoff.
+        `tokens` is the estimated cost of the call; use settle() once the actual count is known."""
+        attempt = 0
+        while True:
+            self._admit(tokens)
+            t0 = time.perf_counter()
+            try:
+                result = fn()
+            except Exception as e:
+                if not self._backoff(e, time.perf_counter() - t0, tokens, attempt):
+                    raise
+                attempt += 1
+                continue
+            self.concurrency.release(time.perf_counter() - t0)
+            return result
+
+    def stream(self, start: Callable[[], Iterable[T]], tokens: int = 0) -> Iterator[T]:
+        """
+        Streaming form of call(): start() opens the stream. Throttled attempts are retried until
+        the first item arrives (nothing has been yielded by then). The concurrency slot is held
+        until the stream is exhausted, fails or is closed, and AIMD sees the whole duration.
+        """
+        attempt = 0
+        while True:
+            self._admit(tokens)
+            t0 = time.perf_counter()
+            try:
+                it = iter(start())
+                first = next(it, _END)
+            except Exception as e:
+                if not self._backoff(e, time.perf_counter() - t0, tokens, attempt):
+                    raise
+                attempt += 1
+                continue
+            break
+        throttled = failed = False
+        try:
+            if first is not _END:
+                yield first
+                yield from it
+        except GeneratorExit:
+            failed = True  # closed by the consumer: no signal about the model's capacity
+            raise
+        except Exception as e:
+            throttled, failed = is_throttled(e), True
+            raise
+        finally:
+            self.concurrency.release(time.perf_counter() - t0, throttled=throttled, failed=failed)
+
+    def settle(self, reserved: int, actual: int):
+        """Correct the token bucket once a call's real token usage is known."""
+        self.tokens.give_back(reserved - actual)
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.concurrency.limit, 2),
+            "inflight": self.concurrency.inflight,
+            "throttled": self.throttled,
+            "retries": self.retries,
+        }
+
+
+_limiters: Dict[str, ModelLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(model: str) -> ModelLimiter:
+    limiter = _limiters.get(model)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.setdefault(model, ModelLimiter(model))
+    return limiter
+
+
+def limiter_stats() -> dict:
+    return {model: lim.stats() for model, lim in list(_limiters.items())}
+
+
+def _collect():
+    stats = limiter_stats()
+    yield "app_llm_concurrency_limit", "gauge", "Adaptive concurrency limit per Gemini model", [({"model": m}, s["limit"]) for m, s in stats.items()]
+    yield "app_llm_inflight", "gauge", "Gemini calls in flight per model", [({"model": m}, s["inflight"]) for m, s in stats.items()]
+    yield "app_llm_retries_total", "counter", "Throttled Gemini calls retried per model", [({"model": m}, s["retries"]) for m, s in stats.items()]
+
+
+metrics.registry.describe("app_llm_throttled_total", "Gemini calls rejected with 429/503 per model")
+metrics.register_collector(_collect)
@@ -0,0 +1,35 @@
+import threading
+from typing import Optional
+
+import markdown as md
+
+from .cache import cache_key
+
+# Summaries are rendered to HTML once, on create/update, and stored next to the Markdown
+# with the hash they were rendered from. Bump the version when the extensions change so
+# stored renderings are treated as stale.
+SUMMARY_HTML_VERSION = "1"
+_EXTENSIONS = ["extra", "sane_lists"]
+
+# Building a Markdown instance loads its extensions; reuse one (instances are not thread-safe)
+_md = md.Markdown(extensions=_EXTENSIONS)
+_md_lock = threading.Lock()
+
+
+def summary_hash(summary: Optional[str]) -> str:
+    return cache_key("summary_html", SUMMARY_HTML_VERSION, summary or "")
+
+
+def render_summary(summary: Optional[str]) -> dict:
+    """The fields to store with a summary: `summaryHtml` and the `summaryHash` it was rendered from."""
+    with _md_lock:
+        html = _md.reset().convert(summary or "")
+    return {"summaryHtml": html, "summaryHash": summary_hash(summary)}
+
+
+def stored_html(doc: dict) -> Optional[str]:
+    """The document's stored rendering if it is current for its summary, else None."""
+    html = doc.get("summaryHtml")
+    if html is not None and doc.get("summaryHash") == summary_hash(doc.get("summary")):
+        return html
+    return None
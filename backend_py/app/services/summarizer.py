@@ -1,91 +1,124 @@
 import re
 import os
-from typing import List, Optional
+import itertools
+from contextlib import closing
+from typing import Iterable, Iterator, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import google.generativeai as genai 
+from .cache import TieredCache, MongoCacheTier, StreamingKey, cache_key
+from . import metrics
+from .tokens import token_weight, estimate_tokens, context_window
+from .ratelimit import get_limiter, RateLimitedError
+from .extractive import score_sentences, apply_instruction_filters, extractive_summary
 
-def sentence_split(text: str) -> List[str]:
-    sentences = re.sub(r"\n+", " ", text)
-    parts = re.split(r"(?<=[.!?])\s+", sentences)
-    return [s.strip() for s in parts if s and s.strip()]
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
 
+# Content-addressed caches for final summaries and per-chunk partial summaries
+_cache_persist = os.getenv("SUMMARY_CACHE_PERSIST", "true").lower() in ("1", "true", "yes")
+_cache_tier = MongoCacheTier(
+    "summary_cache",
+    ttl_seconds=int(os.getenv("SUMMARY_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+    max_docs=int(os.getenv("SUMMARY_CACHE_MAX_DOCS", "10000")),
+) if _cache_persist else None
+_summary_cache = TieredCache("summary", int(os.getenv("SUMMARY_CACHE_SIZE", "256")), _cache_tier)
+_chunk_cache = TieredCache("summary_chunks", int(os.getenv("SUMMARY_CHUNK_CACHE_SIZE", "2048")), _cache_tier)
 
-def score_sentences(sentences: List[str]) -> dict[str, float]:
-    stop = set(
-        "a,an,the,and,or,but,if,then,else,for,of,in,on,at,by,to,from,with,as,that,this,these,those,is,are,was,were,be,been,being,can,could,should,would,may,might,will,shall,do,does,did,have,has,had".split(",")
-    )
-    freq: dict[str, int] = {}
-    for s in sentences:
-        for w in re.findall(r"[a-z0-9'-]+", s.lower()):
-            if w in stop:
-                continue
-            freq[w] = freq.get(w, 0) + 1
-    scores: dict[str, float] = {}
-    for s in sentences:
-        score = 0
-        words = re.findall(r"[a-z0-9'-]+", s.lower())
-        for w in words:
-            if w in stop:
-                continue
-            score += freq.get(w, 0)
-        length = max(5, len(re.findall(r"\S+", s)))
-        scores[s] = score / length
-    return scores
-
-
-def apply_instruction_filters(sentences: List[str], instructions: str | None) -> List[str]:
-    """
-    Filter sentences based on user instructions. If multiple categories are requested
-    (e.g., actions AND deadlines), include sentences that match ANY requested category
-    instead of requiring ALL. If no categories are detected, return the original list.
-
-    Note: For more robust NLP (sentence splitting, tokenization, lemmatization, NER),
-    consider integrating spaCy or NLTK. This function intentionally remains regex-based
-    and dependency-light.
-    """
-    if not instructions:
-        return sentences
-
-    instr = instructions.lower()
-
-    # Organized pattern definitions for maintainability
-    patterns = {
-        "deadlines": re.compile(r"deadline|due|by\s+\d{1,2}\/(\d{1,2}|\d{4})|eod|eow", re.I),
-        "actions": re.compile(r"action|todo|follow[- ]?up|task|next step", re.I),
-        "decisions": re.compile(r"decision|agreed|conclude|finalize", re.I),
-        "risks": re.compile(r"risk|blocker|issue|concern", re.I),
-        "owners": re.compile(r"owner|assign|responsible|who", re.I),
-    }
 
-    requested = {
-        key: bool(p.search(instr)) for key, p in patterns.items()
-    }
+# Cleaning passes (see _clean_transcript), run over blocks of whole lines. Only whitespace
+# collapsing and the \s* runs below can cross a line break; block cuts account for those.
+# Bracketed/parenthesized timestamps, clock times and dates are removed in one scan. The old
+# passes ran in that order, so a date whose 2-digit year is followed by ":mm" is left for the
+# time alternative ("1-2-12:30" loses "12:30", not "1-2-12"). The leading lookaheads only
+# let the regex engine skip ahead to candidate characters.
+_TIMESTAMPS = re.compile(
+    r"(?=[\d\[(])(?:"
+    r"\[(?:\d{1,2}:)?\d{1,2}:\d{2}\s*(?i:AM|PM)?\]"
+    r"|\((?:\d{1,2}:)?\d{1,2}:\d{2}\)"
+    r"|\b\d{1,2}:\d{2}(?::\d{2})?\b"
+    r"|\b\d{1,2}[/-]\d{1,2}[/-](?:\d{2}\b(?!:\d{2}(?::\d{2})?\b)|\d{3,4}\b)"
+    r")"
+)
+_SPEAKER = re.compile(r"(?m)^[A-Z][A-Za-z0-9_\- ]{1,30}:\s*")
+_FILLER = re.compile(r"(?i)(?=[uea])\b(?:um+|uh+|er+|ah+)\b")
+_BULLET = re.compile(r"(?m)^\s*[-•*]\s*")
+# CJK full-width terminators end a sentence without a following space
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|(?<=[。！？])\s*")
+# An unfinished bracketed timestamp ("[12:34") may still close on a following line
+_OPEN_TS = re.compile(r"\[(?:\d{1,2}:)?\d{1,2}:\d{2}\Z")
+# Lines that let the speaker/bullet passes run on into the next line (their trailing \s*)
+_OPEN_SPEAKER = re.compile(r"[A-Z][A-Za-z0-9_\- ]{1,30}:\s*")
+_OPEN_BULLET = re.compile(r"\s*(?:[-•*]\s*)?")
+CLEAN_BLOCK_CHARS = 65536
 
-    # If no specific category requested, return sentences unchanged
-    if not any(requested.values()):
-        return sentences
 
-    sentence_matchers = {
-        "deadlines": re.compile(r"deadline|due|by\s+\w+\s*\d{1,2}|\b\d{1,2}\/\d{1,2}\b|eod|eow|tomorrow|next week", re.I),
-        "actions": re.compile(r"\b(we|i|they)\s+(will|need to|must|should)|action|todo|follow[- ]?up|task|next step", re.I),
-        "decisions": re.compile(r"decided|agreed|approved|concluded|finalized", re.I),
-        "risks": re.compile(r"risk|blocker|issue|concern|problem", re.I),
-        "owners": re.compile(r"@?\b[A-Z][a-z]+\b|assigned to|owner|responsible", re.I),
-    }
+def _safe_cut(buf: str, start: int, cut: int) -> bool:
+    """Whether no timestamp can span the newline at buf[cut] (the next char must be known)."""
+    if cut + 1 >= len(buf):
+        return False
+    c = buf[cut + 1]
+    if not (c.isspace() or c in "aApP]"):
+        return True
+    j = cut
+    while j > start and buf[j - 1].isspace():
+        j -= 1
+    return _OPEN_TS.search(buf, max(start, j - 12), j) is None
 
-    filtered: List[str] = []
-    seen = set()
-    for s in sentences:
-        # Include sentence if it matches ANY requested category
-        for key, want in requested.items():
-            if not want:
-                continue
-            if sentence_matchers[key].search(s):
-                if s not in seen:
-                    filtered.append(s)
-                    seen.add(s)
-                break  # no need to test other categories once matched
 
-    return filtered or sentences
+def _iter_line_blocks(pieces: Iterable[str], target: int = CLEAN_BLOCK_CHARS) -> Iterator[str]:
+    """
+    Regroup arbitrary text pieces into blocks of whole lines of about `target` chars, cut
+    only where no timestamp spans the line break. Blocks are yielded without the newline
+    that separates them, so joining them with "\\n" restores the input.
+    """
+    buf = ""
+    for piece in pieces:
+        buf += piece
+        start = 0
+        while len(buf) - start > target:
+            cut = buf.find("\n", start + target)
+            while cut >= 0 and not _safe_cut(buf, start, cut):
+                cut = buf.find("\n", cut + 1)
+            if cut < 0:
+                break
+            yield buf[start:cut]
+            start = cut + 1
+        buf = buf[start:]
+    yield buf
+
+
+def _collapse(text: str) -> str:
+    # str.split() uses the same whitespace definition as \s, so this is re.sub(r"\s+", " ", t).strip()
+    return " ".join(text.split())
+
+
+def _last_line(text: str) -> str:
+    return text[text.rfind("\n") + 1:]
+
+
+def iter_clean_transcript(pieces: Iterable[str]) -> Iterator[str]:
+    """
+    Streaming form of _clean_transcript over text pieces (e.g. decoded upload chunks).
+    Yields non-empty cleaned segments whose single-space join equals _clean_transcript
+    of the concatenated input; memory is bounded by the block size, not the transcript.
+    """
+    pending: List[str] = []
+    for block in _iter_line_blocks(pieces):
+        pending.append(_TIMESTAMPS.sub(" ", block))
+        tail = _last_line(pending[-1])
+        if not tail.strip() or _OPEN_SPEAKER.fullmatch(tail):
+            continue  # a speaker label's trailing \s* may reach into the next block
+        t = _FILLER.sub(" ", _SPEAKER.sub("", "\n".join(pending)))
+        if _OPEN_BULLET.fullmatch(_last_line(t)):
+            continue  # so may a bullet's
+        pending = []
+        out = _collapse(_BULLET.sub("- ", t))
+        if out:
+            yield out
+    if pending:
+        t = _FILLER.sub(" ", _SPEAKER.sub("", "\n".join(pending)))
+        out = _collapse(_BULLET.sub("- ", t))
+        if out:
+            yield out
 
 
 def _clean_transcript(text: str) -> str:
@@ -97,23 +130,28 @@ def _clean_transcript(text: str) -> str:
     - Normalize bullets/dashes
     - Strip leading/trailing whitespace
     """
-    t = text
-    # Remove bracketed timestamps
-    t = re.sub(r"\[(?:\d{1,2}:)?\d{1,2}:\d{2}\s*(?:AM|PM)?\]", " ", t, flags=re.I)
-    t = re.sub(r"\((?:\d{1,2}:)?\d{1,2}:\d{2}\)", " ", t)
-    # Remove simple time stamps 12:34 or 1:02:03
-    t = re.sub(r"\b\d{1,2}:\d{2}(?::\d{2})?\b", " ", t)
-    # Remove date-like stamps 03/12/2025
-    t = re.sub(r"\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b", " ", t)
-    # Remove speaker markers like 'John:' at start of lines
-    t = re.sub(r"(?m)^[A-Z][A-Za-z0-9_\- ]{1,30}:\s*", "", t)
-    # Remove fillers
-    t = re.sub(r"(?i)\b(um+|uh+|er+|ah+)\b", " ", t)
-    # Normalize bullets
-    t = re.sub(r"(?m)^\s*[-•*]\s*", "- ", t)
-    # Collapse whitespace
-    t = re.sub(r"\s+", " ", t)
-    return t.strip()
+    return " ".join(iter_clean_transcript([text]))
+
+
+def iter_sentences(pieces: Iterable[str]) -> Iterator[str]:
+    """
+    Split a stream of cleaned pieces (joined by single spaces) into sentences, holding only the
+    unfinished tail. Each sentence keeps the whitespace that followed it (none after a CJK
+    terminator written without a space), so "".join of the sentences restores the text.
+    """
+    buf = ""
+    for p in pieces:
+        buf = f"{buf} {p}" if buf else p
+        start = 0
+        for m in _SENTENCE_BOUNDARY.finditer(buf):
+            if m.end() == len(buf):
+                break  # the separator (or the sentence) may continue in the next piece
+            if m.end() > start:
+                yield buf[start:m.end()]
+                start = m.end()
+        buf = buf[start:]
+    if buf.strip():
+        yield buf
 
 
 def _ensure_gemini_configured() -> Optional[str]:
@@ -129,70 +167,433 @@ def _ensure_gemini_configured() -> Optional[str]:
 
 def _gemini_model():
     # Prefer a fast and capable model
-    return genai.GenerativeModel("gemini-1.5-flash")
+    return genai.GenerativeModel(GEMINI_MODEL)
+
+
+def _split_long(sentence: str, max_tokens: float) -> Iterator[str]:
+    """Break a sentence over the budget (unpunctuated speech-to-text, scripts without spaces) at
+    word boundaries, slicing single words that are still too long. Pieces keep their trailing
+    separator like the sentences from iter_sentences, so "".join of them restores `sentence`."""
+    body = sentence.rstrip()
+    trail = sentence[len(body):]
+    sep = token_weight(" ")
+    buf: List[str] = []
+    size = 0.0
+    for word in body.split(" "):
+        w = token_weight(word)
+        while w > max_tokens:
+            # Each slice fills a chunk of its own, so no spaces are inserted inside the word
+            if buf:
+                yield " ".join(buf) + " "
+                buf, size = [], 0.0
+            step = max(1, int(len(word) * max_tokens / w))
+            while step > 1 and token_weight(word[:step]) > max_tokens:
+                step = step * 9 // 10
+            yield word[:step]
+            word = word[step:]
+            w = token_weight(word)
+        pw = w + sep
+        if buf and size + pw - sep > max_tokens:
+            yield " ".join(buf) + " "
+            buf, size = [], 0.0
+        buf.append(word)
+        size += pw
+    if buf:
+        yield " ".join(buf) + trail
 
 
-def _chunk_text(text: str, max_chars: int = 12000) -> List[str]:
+def _chunk_sentences(sentences: Iterable[str], max_tokens: float, overlap: int = 0) -> Iterator[str]:
     """
-    Split text into roughly max_chars chunks on sentence boundaries when possible.
+    Greedily pack sentences (from iter_sentences, with their trailing whitespace) into chunks of
+    at most max_tokens estimated tokens, which gives the fewest chunks for an ordered split.
+    Sentences are joined as they were in the text, so no spaces are added between CJK sentences.
+    With `overlap`, each chunk starts with the last `overlap` sentences of the previous one
+    (never more than half the budget). Text whose estimate fits the budget is never split.
     """
-    if len(text) <= max_chars:
-        return [text]
-    sentences = sentence_split(text)
-    chunks: List[str] = []
-    buf = []
-    size = 0
+    buf: List[tuple[str, float]] = []
+    size = 0.0  # includes each sentence's trailing separator; a chunk drops the last one
     for s in sentences:
-        if size + len(s) + 1 > max_chars and buf:
-            chunks.append(" ".join(buf))
-            buf, size = [s], len(s) + 1
-        else:
-            buf.append(s)
-            size += len(s) + 1
+        w = token_weight(s.rstrip())
+        for piece in ([s] if w <= max_tokens else _split_long(s, max_tokens)):
+            body = token_weight(piece.rstrip())
+            if buf and size + body > max_tokens:
+                yield "".join(x for x, _ in buf).rstrip()
+                carry = buf[-overlap:] if overlap > 0 else []
+                carried = sum(c for _, c in carry)
+                while carry and (carried > max_tokens / 2 or carried + body > max_tokens):
+                    carried -= carry.pop(0)[1]
+                buf, size = carry, carried
+            pw = token_weight(piece)
+            buf.append((piece, pw))
+            size += pw
     if buf:
-        chunks.append(" ".join(buf))
-    return chunks
+        yield "".join(x for x, _ in buf).rstrip()
 
 
-def generate_ai_summary(transcript: str, instructions: str) -> str:
+def _clean_and_chunk(transcript: str, key: StreamingKey, max_tokens: int, overlap: int = 0) -> List[str]:
     """
-    Sends the transcript and instructions to the Gemini model to generate a summary.
-    Automatically cleans transcript and handles long inputs by chunking and stitching.
+    One streaming pass over the transcript: clean block by block, feed the cleaned text into the
+    cache key and split it into sentences and chunks. Gives the same chunks as
+    _chunk_sentences(iter_sentences([_clean_transcript(transcript)]), ...) without materializing
+    intermediate copies.
     """
-    # Ensure SDK configured
+    first = True
+
+    def pieces() -> Iterator[str]:
+        nonlocal first
+        for p in iter_clean_transcript([transcript]):
+            if not first:
+                key.update(" ")
+            first = False
+            key.update(p)
+            yield p
+
+    return list(_chunk_sentences(iter_sentences(pieces()), max_tokens, overlap)) or [""]
+
+
+# Map/reduce tuning for long transcripts
+SUMMARY_MAX_CONCURRENCY = int(os.getenv("SUMMARY_MAX_CONCURRENCY", "4"))
+SUMMARY_REDUCE_MAX_CHARS = int(os.getenv("SUMMARY_REDUCE_MAX_CHARS", "48000"))
+
+_CHUNK_PROMPT = (
+    "You are summarizing a long meeting transcript chunk. "
+    "Return concise markdown sections: Key Points, Decisions, Action Items with owners & deadlines if any."
+)
+_MERGE_PROMPT = (
+    "You are given partial summaries of consecutive parts of a long meeting transcript. "
+    "Merge them into one concise markdown summary with sections: Key Points, Decisions, "
+    "Action Items with owners & deadlines if any. Keep every decision and action item."
+)
+
+
+# Chunk budgets are in estimated tokens (see tokens.py): the model's context window less the
+# prompt and the reserved output, times a safety margin for estimation error. A cap gives
+# smaller chunks, which summarize in parallel and reuse the chunk cache better; 0 = no cap.
+SUMMARY_OUTPUT_TOKENS = int(os.getenv("SUMMARY_OUTPUT_TOKENS", "8192"))
+SUMMARY_CHUNK_MAX_TOKENS = int(os.getenv("SUMMARY_CHUNK_MAX_TOKENS", "0"))
+SUMMARY_TOKEN_MARGIN = float(os.getenv("SUMMARY_TOKEN_MARGIN", "0.9"))
+SUMMARY_CHUNK_OVERLAP_SENTENCES = int(os.getenv("SUMMARY_CHUNK_OVERLAP_SENTENCES", "0"))
+_PROMPT_OVERHEAD_TOKENS = 64  # chunk headers and separators around the transcript text
+_MIN_CHUNK_TOKENS = 256
+
+
+def chunk_token_budget(instructions: str = "", model: str = GEMINI_MODEL) -> int:
+    """Estimated tokens of transcript per call. The same budget serves chunk prompts and the
+    single-call path, which carries the user's instructions instead of the chunk prompt."""
+    prompt = max(estimate_tokens(_CHUNK_PROMPT), estimate_tokens(instructions)) + _PROMPT_OVERHEAD_TOKENS
+    budget = int((context_window(model) - SUMMARY_OUTPUT_TOKENS - prompt) * SUMMARY_TOKEN_MARGIN)
+    if SUMMARY_CHUNK_MAX_TOKENS > 0:
+        budget = min(budget, SUMMARY_CHUNK_MAX_TOKENS)
+    return max(budget, _MIN_CHUNK_TOKENS)
+
+
+def _normalize_instructions(instructions: str) -> str:
+    return " ".join((instructions or "").split())
+
+
+def _response_text(resp) -> str:
+    return getattr(resp, "text", "") or ""
+
+
+# Response tokens reserved against the per-minute token budget until the real count is known
+_EXPECTED_RESPONSE_TOKENS = 1024
+
+
+def _token_usage(prompt: str, text: str, usage=None) -> tuple[int, int]:
+    # Token counts come from the response's usage metadata when present, else estimates
+    prompt_tokens = getattr(usage, "prompt_token_count", None) or estimate_tokens(prompt)
+    response_tokens = getattr(usage, "candidates_token_count", None) or estimate_tokens(text)
+    return prompt_tokens, response_tokens
+
+
+def _record_llm_usage(stage: str, prompt_tokens: int, response_tokens: int):
+    metrics.inc("app_llm_calls_total", stage=stage)
+    metrics.inc("app_llm_tokens_total", prompt_tokens, kind="prompt")
+    metrics.inc("app_llm_tokens_total", response_tokens, kind="response")
+    metrics.tally("llm_calls")
+    metrics.tally("llm_tokens", prompt_tokens + response_tokens)
+
+
+def _generate(model, prompt: str, stage: str) -> str:
+    """One timed, rate-limited Gemini call; `stage` is chunk, merge, synthesis or single."""
+    limiter = get_limiter(GEMINI_MODEL)
+    reserved = estimate_tokens(prompt) + _EXPECTED_RESPONSE_TOKENS
+    with metrics.span("llm.generate", kind=stage):
+        resp = limiter.call(lambda: model.generate_content(prompt), reserved)
+    text = _response_text(resp)
+    prompt_tokens, response_tokens = _token_usage(prompt, text, getattr(resp, "usage_metadata", None))
+    limiter.settle(reserved, prompt_tokens + response_tokens)
+    if metrics.METRICS_ENABLED:
+        _record_llm_usage(stage, prompt_tokens, response_tokens)
+    return text
+
+
+def _generate_stream(model, prompt: str, stage: str) -> Iterator[str]:
+    """Streaming Gemini call yielding text pieces; timed from the request to the last piece.
+    Throttling is retried until the first piece arrives; the limiter slot is held to the end."""
+    limiter = get_limiter(GEMINI_MODEL)
+    reserved = estimate_tokens(prompt) + _EXPECTED_RESPONSE_TOKENS
+    parts: List[str] = []
+    usage = None
+    with metrics.span("llm.generate", kind=f"{stage}_stream"), \
+            closing(limiter.stream(lambda: model.generate_content(prompt, stream=True), reserved)) as pieces:
+        for piece in pieces:
+            usage = getattr(piece, "usage_metadata", None) or usage
+            text = _response_text(piece)
+            if text:
+                parts.append(text)
+                yield text
+    prompt_tokens, response_tokens = _token_usage(prompt, "".join(parts), usage)
+    limiter.settle(reserved, prompt_tokens + response_tokens)
+    if metrics.METRICS_ENABLED:
+        _record_llm_usage(stage, prompt_tokens, response_tokens)
+
+
+def _map_concurrently(fn, items: List, max_workers: int = SUMMARY_MAX_CONCURRENCY) -> List:
+    """Apply fn to items on a bounded thread pool, returning results in input order."""
+    if len(items) <= 1:
+        return [fn(it) for it in items]
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as pool:
+        return list(pool.map(metrics.bind(fn), items))
+
+
+def _iter_chunk_summaries(model, chunks: List[str], offset: int = 0) -> Iterator[tuple[int, str]]:
+    """Summarize chunks on the bounded pool, yielding (index, partial summary) as each one finishes.
+    `offset` is the number of earlier chunks already summarized (for the chunk headers)."""
+    total = offset + len(chunks)
+
+    def run(i: int, ch: str) -> str:
+        # Keyed on the chunk text only (not its position) so shared chunks are reused across transcripts
+        key = cache_key("chunk", GEMINI_MODEL, _CHUNK_PROMPT, ch)
+        cached = _chunk_cache.get(key)
+        if cached is not None:
+            return cached
+        out = _generate(model, f"{_CHUNK_PROMPT}\n\nCHUNK {offset + i + 1}/{total}:\n{ch}", "chunk")
+        if out:
+            _chunk_cache.set(key, out)
+        return out
+
+    if len(chunks) <= 1:
+        for i, ch in enumerate(chunks):
+            yield i, run(i, ch)
+        return
+    with ThreadPoolExecutor(max_workers=max(1, min(SUMMARY_MAX_CONCURRENCY, len(chunks)))) as pool:
+        traced = metrics.bind(run)
+        futures = {pool.submit(traced, i, ch): i for i, ch in enumerate(chunks)}
+        for fut in as_completed(futures):
+            yield futures[fut], fut.result()
+
+
+def _summarize_chunks(model, chunks: List[str], offset: int = 0) -> List[str]:
+    partials = [""] * len(chunks)
+    for i, out in _iter_chunk_summaries(model, chunks, offset):
+        partials[i] = out
+    return partials
+
+
+def _group_partials(partials: List[str], max_chars: int) -> List[List[str]]:
+    """Group consecutive partial summaries so each group fits in max_chars (at least two per group)."""
+    groups: List[List[str]] = []
+    buf: List[str] = []
+    size = 0
+    for p in partials:
+        if buf and len(buf) >= 2 and size + len(p) + 2 > max_chars:
+            groups.append(buf)
+            buf, size = [], 0
+        buf.append(p)
+        size += len(p) + 2
+    if buf:
+        if len(buf) == 1 and groups:
+            groups[-1].append(buf[0])
+        else:
+            groups.append(buf)
+    return groups
+
+
+def _merge_partials(model, partials: List[str]) -> List[str]:
+    """Hierarchical reduce: merge groups of partial summaries level by level until they fit in one synthesis prompt."""
+    while len(partials) > 1 and sum(len(p) + 2 for p in partials) > SUMMARY_REDUCE_MAX_CHARS:
+        groups = _group_partials(partials, SUMMARY_REDUCE_MAX_CHARS)
+
+        def merge(group: List[str]) -> str:
+            joined = "\n\n".join(group)
+            return _generate(model, f"{_MERGE_PROMPT}\n\nPARTIAL SUMMARIES:\n{joined}", "merge")
+
+        partials = _map_concurrently(merge, groups)
+    return partials
+
+
+def _synthesis_prompt(partials: List[str], instructions: str) -> str:
+    joined_partials = "\n\n".join(partials)
+    return (
+        f"{instructions}\n\nYou are given partial summaries of chunks from a long transcript. "
+        "Synthesize a single, coherent, non-redundant markdown summary with these sections: "
+        "- Agenda (one line)\n- Key Discussion Points\n- Decisions\n- Action Items (with owners & deadlines)\n- Next Steps.\n\n"
+        f"PARTIAL SUMMARIES:\n{joined_partials}"
+    )
+
+
+def _reduce_partials(model, partials: List[str], instructions: str) -> str:
+    """Merge partial summaries as needed, then run the final synthesis with the user's instructions."""
+    return _generate(model, _synthesis_prompt(_merge_partials(model, partials), instructions), "synthesis")
+
+
+def _prepare(transcript: str, instructions: str) -> tuple[str, List[str]]:
+    """Clean, hash and chunk in one streaming pass. The key equals
+    cache_key("summary", model, instructions, _clean_transcript(transcript))."""
     if not _ensure_gemini_configured():
         raise RuntimeError("Gemini not configured: install google-generativeai and set GEMINI_API_KEY")
+    key_stream = StreamingKey("summary", GEMINI_MODEL, _normalize_instructions(instructions))
+    with metrics.span("summarizer.clean_chunk"):
+        chunks = _clean_and_chunk(transcript, key_stream, chunk_token_budget(instructions), SUMMARY_CHUNK_OVERLAP_SENTENCES)
+    return key_stream.hexdigest(), chunks
 
-    clean = _clean_transcript(transcript)
+
+def generate_ai_summary(transcript: str, instructions: str) -> str:
+    """
+    Sends the transcript and instructions to the Gemini model to generate a summary.
+    Automatically cleans transcript and handles long inputs by chunking and stitching.
+    """
+    key, chunks = _prepare(transcript, instructions)
+    cached = _summary_cache.get(key)
+    if cached is not None:
+        return cached
 
     # If very long, summarize chunks first then ask for a final synthesis
-    chunks = _chunk_text(clean)
     model = _gemini_model()
 
     if len(chunks) == 1:
         full_prompt = f"{instructions}\n\n--- TRANSCRIPT ---\n{chunks[0]}"
-        resp = model.generate_content(full_prompt)
-        return getattr(resp, "text", "") or ""
+        out = _generate(model, full_prompt, "single")
+    else:
+        partial_summaries = _summarize_chunks(model, chunks)
+        out = _reduce_partials(model, partial_summaries, instructions)
+    if out:
+        _summary_cache.set(key, out)
+    return out
 
-    partial_summaries: List[str] = []
-    sub_prompt = (
-        "You are summarizing a long meeting transcript chunk. "
-        "Return concise markdown sections: Key Points, Decisions, Action Items with owners & deadlines if any."
-    )
-    for i, ch in enumerate(chunks, 1):
-        p = f"{sub_prompt}\n\nCHUNK {i}/{len(chunks)}:\n{ch}"
-        r = model.generate_content(p)
-        partial_summaries.append(getattr(r, "text", "") or "")
 
-    joined_partials = "\n\n".join(partial_summaries)
-    final_prompt = (
-        f"{instructions}\n\nYou are given partial summaries of chunks from a long transcript. "
-        "Synthesize a single, coherent, non-redundant markdown summary with these sections: "
-        "- Agenda (one line)\n- Key Discussion Points\n- Decisions\n- Action Items (with owners & deadlines)\n- Next Steps.\n\n"
-        f"PARTIAL SUMMARIES:\n{joined_partials}"
-    )
-    final_resp = model.generate_content(final_prompt)
-    return getattr(final_resp, "text", "") or ""
+# Incremental summaries (appending to a live transcript) keep per-meeting chunk state: the partial
+# summaries of closed chunks and the text of the open last chunk. An append re-chunks only the open
+# chunk plus the new text; greedy packing never reopens a closed chunk, so the chunks are the ones a
+# full re-chunk would give. The open chunk is re-summarized on every append, so chunks are capped
+# at SUMMARY_APPEND_CHUNK_TOKENS to keep that cost small. Long meetings also keep the merged
+# summaries of the hierarchical reduce, so only its last groups are merged again (_merge_appended).
+SUMMARY_APPEND_CHUNK_TOKENS = int(os.getenv("SUMMARY_APPEND_CHUNK_TOKENS", "4000"))
+SUMMARY_STATE_VERSION = 2
+
+
+def _merge_appended(model, levels: List[List[str]], fresh: List[str]) -> tuple[List[str], List[List[str]]]:
+    """
+    Incremental form of _merge_partials for appends. levels[0] holds the closed chunk partials and
+    levels[i] the merged summaries of level i, in both cases those not yet in a final group of the
+    next level; `fresh` are the new chunk partials, the last one for the open chunk. Greedy groups
+    that are followed by a final item (and are not among the last two) never change: they are
+    merged once and their summary moves up a level. Only the groups after them are merged again.
+    Returns the partials for the synthesis and the new levels.
+    """
+    items, final = levels[0] + fresh, len(levels[0]) + len(fresh) - 1
+    out_levels: List[List[str]] = []
+    level = 0
+    while True:
+        merged_before = level + 1 < len(levels)
+        if not merged_before and (len(items) <= 1 or sum(len(p) + 2 for p in items) <= SUMMARY_REDUCE_MAX_CHARS):
+            out_levels.append(items[:final])
+            return items, out_levels
+        groups = _group_partials(items, SUMMARY_REDUCE_MAX_CHARS)
+        stable = used = 0
+        for g in groups[:-2]:
+            if used + len(g) >= final:
+                break
+            stable += 1
+            used += len(g)
+
+        def merge(group: List[str]) -> str:
+            if len(group) == 1:
+                return group[0]
+            joined = "\n\n".join(group)
+            return _generate(model, f"{_MERGE_PROMPT}\n\nPARTIAL SUMMARIES:\n{joined}", "merge")
+
+        merged = _map_concurrently(merge, groups)
+        out_levels.append(items[used:final])
+        above = levels[level + 1] if merged_before else []
+        items, final = above + merged, len(above) + stable
+        level += 1
+
+
+def append_ai_summary(state: Optional[dict], segment: str, instructions: str, transcript: Optional[str] = None) -> tuple[str, dict]:
+    """
+    Summary of a transcript after `segment` is appended to it. `state` is the state returned by the
+    previous call; without a usable one, chunking starts over from `transcript` (the text before the
+    segment). Only new chunks, the open last chunk and the last merge groups are summarized before
+    the final synthesis, so the cost follows the segment's size rather than the transcript's.
+    Returns (summary, new state).
+    """
+    if not _ensure_gemini_configured():
+        raise RuntimeError("Gemini not configured: install google-generativeai and set GEMINI_API_KEY")
+    if state and state.get("version") in (1, SUMMARY_STATE_VERSION) and state.get("model") == GEMINI_MODEL:
+        # Version 1 kept only the closed chunk partials (no merged levels)
+        levels = state.get("levels") or [list(state["partials"])]
+        closed = state.get("closed", len(levels[0]))
+        tail, budget, text = state["tail"], state["budget"], segment
+    else:
+        levels, closed, tail = [[]], 0, ""
+        budget = min(chunk_token_budget(instructions), SUMMARY_APPEND_CHUNK_TOKENS)
+        text = f"{transcript}\n{segment}" if transcript else segment
+    with metrics.span("summarizer.clean_chunk"):
+        pieces = itertools.chain([tail] if tail else [], iter_clean_transcript([text]))
+        chunks = list(_chunk_sentences(iter_sentences(pieces), budget, SUMMARY_CHUNK_OVERLAP_SENTENCES)) or [""]
+
+    model = _gemini_model()
+    if not closed and len(chunks) == 1:
+        # Still one chunk: same single call as generate_ai_summary
+        out = _generate(model, f"{instructions}\n\n--- TRANSCRIPT ---\n{chunks[0]}", "single")
+    else:
+        fresh = _summarize_chunks(model, chunks, offset=closed)
+        partials, levels = _merge_appended(model, levels, fresh)
+        out = _generate(model, _synthesis_prompt(partials, instructions), "synthesis")
+        closed += len(fresh) - 1
+    return out, {
+        "version": SUMMARY_STATE_VERSION,
+        "model": GEMINI_MODEL,
+        "budget": budget,
+        "closed": closed,
+        "levels": levels,
+        "tail": chunks[-1],
+    }
+
+
+def stream_ai_summary(transcript: str, instructions: str) -> Iterator[tuple[str, dict]]:
+    """
+    Streaming form of generate_ai_summary. Yields ("progress", {...}) as chunk summaries
+    finish and ("token", {"text": ...}) as the summary streams from the model.
+    """
+    key, chunks = _prepare(transcript, instructions)
+    cached = _summary_cache.get(key)
+    if cached is not None:
+        yield "token", {"text": cached}
+        return
+
+    model = _gemini_model()
+    if len(chunks) == 1:
+        prompt, stage = f"{instructions}\n\n--- TRANSCRIPT ---\n{chunks[0]}", "single"
+    else:
+        total = len(chunks)
+        partials = [""] * total
+        for done, (i, out) in enumerate(_iter_chunk_summaries(model, chunks), 1):
+            partials[i] = out
+            yield "progress", {"stage": "chunks", "done": done, "total": total, "message": f"chunk {done}/{total} done"}
+        partials = _merge_partials(model, partials)
+        yield "progress", {"stage": "synthesis", "message": "writing final summary"}
+        prompt, stage = _synthesis_prompt(partials, instructions), "synthesis"
+
+    parts: List[str] = []
+    for text in _generate_stream(model, prompt, stage):
+        parts.append(text)
+        yield "token", {"text": text}
+    out = "".join(parts)
+    if out:
+        _summary_cache.set(key, out)
 
 
 def summarize(text: str, instructions: str | None = None, max_sentences: int = 6) -> str:
@@ -201,20 +602,32 @@ def summarize(text: str, instructions: str | None = None, max_sentences: int = 6
     """
     if not text or not (instructions and instructions.strip()):
         return "Error: Transcript and prompt cannot be empty."
-
     try:
         return generate_ai_summary(text, instructions.strip())
-    except Exception:
+    except RateLimitedError:
+        # Quota exhausted after retries: report it rather than quietly degrade the summary
+        raise
+    except Exception as e:
         # Fallback to heuristic pipeline
-        sentences = sentence_split(text)
-        if not sentences:
-            return ""
-        filtered = apply_instruction_filters(sentences, instructions)
-        scores = score_sentences(filtered)
-        ranked = [s for s, _ in sorted(scores.items(), key=lambda kv: kv[1], reverse=True)]
-        take = min(max_sentences, max(3, int(len(filtered) * 0.3)))
-        selected = sorted(ranked[:take], key=lambda s: sentences.index(s))
-        as_bullets = bool(re.search(r"bullet|point|list", instructions or "", re.I))
-        if as_bullets:
-            return "\n".join([f"• {s}" for s in selected])
-        return " ".join(selected)
+        print(f"[summarizer] AI summary failed, using heuristic summary: {e}")
+        return extractive_summary(text, instructions, max_sentences)
+
+
+def stream_summary(text: str, instructions: str | None = None, max_sentences: int = 6) -> Iterator[tuple[str, dict]]:
+    """
+    Streaming counterpart of summarize(): (event, data) pairs whose "token" texts join to the summary.
+    Falls back to the heuristic summary if the AI path fails before producing any output.
+    """
+    if not text or not (instructions and instructions.strip()):
+        yield "token", {"text": "Error: Transcript and prompt cannot be empty."}
+        return
+    started = False
+    try:
+        for event, data in stream_ai_summary(text, instructions.strip()):
+            started = started or event == "token"
+            yield event, data
+    except Exception as e:
+        if started or isinstance(e, RateLimitedError):
+            raise  # part of the summary was already sent, or quota is exhausted; let the caller report it
+        print(f"[summarizer] AI summary failed, using heuristic summary: {e}")
+        yield "token", {"text": extractive_summary(text, instructions, max_sentences)}
@@ -0,0 +1,46 @@
+import os
+import math
+from typing import Optional
+
+# Token estimates for budgeting prompts without a network round trip (count_tokens is an API call).
+# ASCII text averages ~4 characters per token; other scripts cost more per character, so non-ASCII
+# text is counted by UTF-8 bytes: ~1 token per CJK character (3 bytes), ~1.5 Cyrillic/Greek/Arabic
+# characters per token (2 bytes each). Estimates err on the high side so budgets are not overrun.
+CHARS_PER_TOKEN = float(os.getenv("TOKEN_ESTIMATE_CHARS_PER_TOKEN", "4"))
+BYTES_PER_TOKEN_NON_ASCII = 3.0
+_NON_ASCII_BYTES = bytes(range(128, 256))
+
+# Input context windows (tokens) by model family; the longest matching prefix wins
+_CONTEXT_WINDOWS = {
+    "gemini-pro": 30720,
+    "gemini-1.0-pro": 30720,
+    "gemini-1.5-flash": 1048576,
+    "gemini-1.5-pro": 2097152,
+    "gemini-2.0-flash": 1048576,
+    "gemini-2.5-flash": 1048576,
+    "gemini-2.5-pro": 1048576,
+}
+DEFAULT_CONTEXT_TOKENS = 32768
+
+
+def token_weight(text: str) -> float:
+    """Fractional token estimate; sums of weights never exceed the weight of the joined text."""
+    if text.isascii():
+        return len(text) / CHARS_PER_TOKEN
+    raw = text.encode("utf-8")
+    ascii_chars = len(raw.translate(None, _NON_ASCII_BYTES))
+    return ascii_chars / CHARS_PER_TOKEN + (len(raw) - ascii_chars) / BYTES_PER_TOKEN_NON_ASCII
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    return math.ceil(token_weight(text or ""))
+
+
+def context_window(model: str) -> int:
+    """Input token limit for a model name (GEMINI_CONTEXT_TOKENS overrides)."""
+    override = int(os.getenv("GEMINI_CONTEXT_TOKENS", "0"))
+    if override > 0:
+        return override
+    name = model.rsplit("/", 1)[-1]
+    best = max((p for p in _CONTEXT_WINDOWS if name.startswith(p)), key=len, default=None)
+    return _CONTEXT_WINDOWS[best] if best else DEFAULT_CONTEXT_TOKENS
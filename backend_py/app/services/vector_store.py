@@ -1,7 +1,17 @@
 import os
-from typing import List, Tuple, Optional
+import json
+import math
+import time
+import random
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Tuple, Optional, Set
 import numpy as np
 
+from . import metrics
+
 try:
     import faiss  # type: ignore
     _has_faiss = True
@@ -18,23 +28,565 @@ except Exception:
     Pinecone = None  # type: ignore
     _has_pinecone = False
 
+DEFAULT_DIM = int(os.getenv("EMBED_DIM", "768"))
+# Local index snapshots (FAISS / NumPy fallback); empty disables persistence
+_default_index_dir = str(Path(__file__).resolve().parents[2] / ".cache" / "vector_index")
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", _default_index_dir)
+VECTOR_INDEX_MMAP = os.getenv("VECTOR_INDEX_MMAP", "true").lower() in ("1", "true", "yes")
+VECTOR_SNAPSHOT_SECONDS = int(os.getenv("VECTOR_SNAPSHOT_SECONDS", "60"))
+# Documents updated this long before a snapshot are still re-checked at startup: updatedAt is set
+# before the embeddings are computed, so the index write can land well after it
+VECTOR_RECONCILE_SLACK_SECONDS = int(os.getenv("VECTOR_RECONCILE_SLACK_SECONDS", "300"))
+SCOPES = ("title", "summary")
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+# Storage precision for the NumPy fallback backend: float32 or float16 (half the memory)
+VECTOR_FALLBACK_DTYPE = os.getenv("VECTOR_FALLBACK_DTYPE", "float32").lower()
+VECTOR_TOMBSTONE_RATIO = float(os.getenv("VECTOR_TOMBSTONE_RATIO", "0.2"))
+VECTOR_TOMBSTONE_MIN = int(os.getenv("VECTOR_TOMBSTONE_MIN", "64"))
+SNAPSHOT_VERSION = 2
+# Approximate nearest-neighbour mode for FAISS: flat (exact), hnsw or ivf. ANN indexes are
+# built from the flat index once a scope holds VECTOR_ANN_THRESHOLD vectors.
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "flat").lower()
+VECTOR_ANN_THRESHOLD = int(os.getenv("VECTOR_ANN_THRESHOLD", "10000"))
+VECTOR_HNSW_M = int(os.getenv("VECTOR_HNSW_M", "32"))
+VECTOR_HNSW_EF_CONSTRUCTION = int(os.getenv("VECTOR_HNSW_EF_CONSTRUCTION", "200"))
+VECTOR_HNSW_EF_SEARCH = int(os.getenv("VECTOR_HNSW_EF_SEARCH", "64"))
+VECTOR_IVF_NLIST = int(os.getenv("VECTOR_IVF_NLIST", "0"))  # 0 = derived from corpus size
+VECTOR_IVF_NPROBE = int(os.getenv("VECTOR_IVF_NPROBE", "16"))
+# Pinecone write-behind buffer: upserts/deletes are coalesced per id and flushed by a background
+# thread once a namespace holds PINECONE_FLUSH_BATCH operations or the oldest is PINECONE_FLUSH_SECONDS old
+PINECONE_FLUSH_BATCH = int(os.getenv("PINECONE_FLUSH_BATCH", "100"))
+PINECONE_FLUSH_SECONDS = float(os.getenv("PINECONE_FLUSH_SECONDS", "1"))
+PINECONE_RETRY_SECONDS = float(os.getenv("PINECONE_RETRY_SECONDS", "1"))
+PINECONE_RETRY_MAX_SECONDS = float(os.getenv("PINECONE_RETRY_MAX_SECONDS", "30"))
+PINECONE_DRAIN_SECONDS = float(os.getenv("PINECONE_DRAIN_SECONDS", "15"))
+# Overlay buffered writes on Pinecone query results (read-your-writes before the flush lands)
+PINECONE_SEARCH_PENDING = os.getenv("PINECONE_SEARCH_PENDING", "true").lower() in ("1", "true", "yes")
+PINECONE_MAX_TOP_K = 10000
+
+
+def _as_list(vec) -> List[float]:
+    # Pinecone expects plain floats; vectors may arrive as lists or decoded NumPy arrays
+    return vec.astype("float32").tolist() if isinstance(vec, np.ndarray) else list(vec)
+
+
+def _to_unit_rows(vectors) -> np.ndarray:
+    mat = np.asarray(vectors, dtype="float32").reshape(len(vectors), -1)
+    norms = np.linalg.norm(mat, axis=1, keepdims=True) + 1e-12
+    return (mat / norms).astype("float32")
+
+
+def _auto_nlist(n: int) -> int:
+    # ~4*sqrt(n) lists, but keep at least ~39 training points per centroid
+    return max(1, min(int(4 * math.sqrt(n)), n // 39))
+
+
+def build_index(kind: str, dim: int, train: Optional[np.ndarray] = None, nlist: int = 0,
+                m: int = VECTOR_HNSW_M, ef_construction: int = VECTOR_HNSW_EF_CONSTRUCTION):
+    """Create an empty inner-product FAISS index of the given kind that accepts add_with_ids
+    (flat/HNSW wrapped in IndexIDMap2; IVF is trained on `train` and maps ids itself)."""
+    if kind == "hnsw":
+        inner = faiss.IndexHNSWFlat(dim, m, faiss.METRIC_INNER_PRODUCT)
+        inner.hnsw.efConstruction = ef_construction
+    elif kind == "ivf":
+        if train is None or len(train) == 0:
+            raise ValueError("IVF index needs training vectors")
+        quantizer = faiss.IndexFlatIP(dim)
+        inner = faiss.IndexIVFFlat(quantizer, dim, nlist or _auto_nlist(len(train)), faiss.METRIC_INNER_PRODUCT)
+        inner.train(train)
+        # IVF stores ids natively; a Hashtable direct map allows reconstruct() and remove_ids() by id
+        inner.set_direct_map_type(faiss.DirectMap.Hashtable)
+        return inner
+    else:
+        inner = faiss.IndexFlatIP(dim)
+    return faiss.IndexIDMap2(inner)
+
+
+def _inner_index(index):
+    index = faiss.downcast_index(index)
+    return faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap2) else index
+
+
+def index_kind(index) -> str:
+    inner = _inner_index(index)
+    if isinstance(inner, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(inner, faiss.IndexIVF):
+        return "ivf"
+    return "flat"
+
+
+def set_search_params(index, ef_search: int = VECTOR_HNSW_EF_SEARCH, nprobe: int = VECTOR_IVF_NPROBE):
+    inner = _inner_index(index)
+    if isinstance(inner, faiss.IndexHNSW):
+        inner.hnsw.efSearch = ef_search
+    elif isinstance(inner, faiss.IndexIVF):
+        inner.nprobe = nprobe
+
+
+class _FaissScope:
+    """
+    One scope (title or summary) in FAISS, addressable by meeting id. Vectors are stored in an
+    IndexIDMap2 under int64 labels. Replacing or deleting a vector tombstones its old label,
+    which is filtered out of results until compaction physically removes it; compaction runs
+    once tombstones exceed VECTOR_TOMBSTONE_RATIO of the stored vectors.
+    With VECTOR_INDEX_TYPE=hnsw|ivf the flat index is rebuilt as an ANN index past
+    VECTOR_ANN_THRESHOLD vectors (IVF is retrained whenever the corpus doubles).
+    """
+
+    kind = "faiss"
+
+    def __init__(self, dim: int, index_type: str = VECTOR_INDEX_TYPE):
+        self.dim = dim
+        self.index_type = index_type if index_type in ("flat", "hnsw", "ivf") else "flat"
+        self.index = build_index("flat", dim)
+        self.labels: Dict[str, int] = {}
+        self.owners: Dict[int, str] = {}
+        self.tombstones: Set[int] = set()
+        self.next_label = 0
+        self.trained_on = 0
+        # IVF inverted lists memory-mapped from a snapshot at `path`: loaded into memory on first write
+        self.mmapped = False
+        self.path: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def ids(self) -> Set[str]:
+        return set(self.labels)
+
+    def _writable(self):
+        if self.mmapped:
+            # Memory-mapped (on-disk inverted lists cannot be cloned): re-read the snapshot into memory
+            self.index = faiss.read_index(self.path)
+            set_search_params(self.index)
+            self.mmapped = False
+        return self.index
+
+    def add(self, ids: List[str], mat: np.ndarray):
+        # Last write wins for ids repeated within one batch
+        last = {mid: row for row, mid in enumerate(ids)}
+        ids, rows = list(last.keys()), list(last.values())
+        new_labels = np.arange(self.next_label, self.next_label + len(ids), dtype="int64")
+        self.next_label += len(ids)
+        for mid, label in zip(ids, new_labels.tolist()):
+            old = self.labels.get(mid)
+            if old is not None:
+                self.owners.pop(old, None)
+                self.tombstones.add(old)
+            self.labels[mid] = label
+            self.owners[label] = mid
+        self._writable().add_with_ids(np.ascontiguousarray(mat[rows]), new_labels)
+        if not self._maybe_migrate():
+            self._maybe_compact()
+
+    def _maybe_migrate(self) -> bool:
+        if self.index_type == "flat" or len(self.labels) < VECTOR_ANN_THRESHOLD:
+            return False
+        current = index_kind(self.index)
+        if current == "flat" or (current == "ivf" and len(self.labels) > 2 * self.trained_on):
+            self.rebuild(self.index_type)
+            return True
+        return False
+
+    def rebuild(self, kind: str):
+        """Re-create the index as `kind` from the live vectors (drops tombstones)."""
+        labels = np.array(sorted(self.owners), dtype="int64")
+        vecs = self.index.reconstruct_batch(labels) if len(labels) else np.zeros((0, self.dim), dtype="float32")
+        if kind == "ivf" and len(labels) == 0:
+            kind = "flat"
+        index = build_index(kind, self.dim, train=vecs, nlist=VECTOR_IVF_NLIST)
+        set_search_params(index)
+        if len(labels):
+            index.add_with_ids(vecs, labels)
+        self.index = index
+        self.mmapped = False
+        self.tombstones.clear()
+        self.trained_on = len(labels) if kind == "ivf" else 0
+
+    def remove(self, mid: str) -> bool:
+        label = self.labels.pop(mid, None)
+        if label is None:
+            return False
+        self.owners.pop(label, None)
+        self.tombstones.add(label)
+        self._maybe_compact()
+        return True
+
+    def _maybe_compact(self):
+        if len(self.tombstones) > max(VECTOR_TOMBSTONE_MIN, VECTOR_TOMBSTONE_RATIO * self.index.ntotal):
+            self.compact()
+
+    def compact(self):
+        if not self.tombstones:
+            return
+        if index_kind(self.index) == "hnsw":
+            # HNSW graphs do not support removal; rebuild from live vectors instead
+            self.rebuild("hnsw")
+            return
+        dead = np.fromiter(self.tombstones, dtype="int64", count=len(self.tombstones))
+        self._writable().remove_ids(dead)
+        self.tombstones.clear()
+
+    def search(self, q: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        n = self.index.ntotal
+        if n == 0 or k <= 0:
+            return []
+        # Over-fetch by the tombstone count so k live results survive filtering
+        D, I = self.index.search(q, min(n, k + len(self.tombstones)))
+        out: List[Tuple[str, float]] = []
+        for score, label in zip(D[0].tolist(), I[0].tolist()):
+            mid = self.owners.get(label)
+            if mid is not None:
+                out.append((mid, float(score)))
+                if len(out) >= k:
+                    break
+        return out
+
+    def stats(self) -> dict:
+        return {
+            "type": index_kind(self.index),
+            "live": len(self.labels),
+            "stored": int(self.index.ntotal),
+            "tombstones": len(self.tombstones),
+        }
+
+    def dump(self) -> Tuple[bytes, dict]:
+        self._writable()  # never serialize a mapping of the file about to be replaced
+        state = {
+            "labels": self.labels,
+            "tombstones": sorted(self.tombstones),
+            "next": self.next_label,
+            "trainedOn": self.trained_on,
+        }
+        return faiss.serialize_index(self.index).tobytes(), state
+
+    @classmethod
+    def restore(cls, dim: int, path: str, state: dict) -> "_FaissScope":
+        sc = cls(dim)
+        # IO_FLAG_MMAP only maps IVF inverted lists; flat and HNSW indexes are read into memory
+        sc.index = faiss.read_index(path, faiss.IO_FLAG_MMAP if VECTOR_INDEX_MMAP else 0)
+        set_search_params(sc.index)
+        sc.mmapped = VECTOR_INDEX_MMAP and index_kind(sc.index) == "ivf"
+        sc.path = path
+        sc.labels = {mid: int(label) for mid, label in state["labels"].items()}
+        sc.owners = {label: mid for mid, label in sc.labels.items()}
+        sc.tombstones = set(state.get("tombstones", []))
+        sc.next_label = int(state["next"])
+        sc.trained_on = int(state.get("trainedOn", 0))
+        return sc
+
+
+class _NumpyScope:
+    """
+    One scope held as a single preallocated matrix of unit-normalized rows (used when FAISS is
+    unavailable). Capacity doubles as it grows; upserts overwrite their row in place and deletes
+    move the last row into the freed slot, so rows [0, n) are always the live vectors.
+    Rows are float32, or float16 with VECTOR_FALLBACK_DTYPE=float16 (scored in float32 blocks).
+    """
+
+    kind = "npy"
+    MIN_CAPACITY = 64
+    SCORE_BLOCK = 65536
+
+    def __init__(self, dim: int, dtype: str = VECTOR_FALLBACK_DTYPE):
+        self.dim = dim
+        self.dtype = np.dtype(dtype if dtype in ("float32", "float16") else "float32")
+        self.mat = np.empty((0, dim), dtype=self.dtype)
+        self.n = 0
+        self.ids_list: List[str] = []
+        self.pos: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self.n
+
+    def ids(self) -> Set[str]:
+        return set(self.pos)
+
+    def _resize(self, capacity: int):
+        mat = np.empty((capacity, self.dim), dtype=self.dtype)
+        mat[: self.n] = self.mat[: self.n]
+        self.mat = mat
+
+    def add(self, ids: List[str], mat: np.ndarray):
+        # Last write wins for ids repeated within one batch
+        last = {mid: row for row, mid in enumerate(ids)}
+        new_ids = [mid for mid in last if mid not in self.pos]
+        needed = self.n + len(new_ids)
+        if needed > self.mat.shape[0]:
+            self._resize(max(needed, 2 * self.mat.shape[0], self.MIN_CAPACITY))
+        for mid in new_ids:
+            self.pos[mid] = self.n
+            self.ids_list.append(mid)
+            self.n += 1
+        targets = np.fromiter((self.pos[mid] for mid in last), dtype="int64", count=len(last))
+        self.mat[targets] = mat[list(last.values())]
+
+    def remove(self, mid: str) -> bool:
+        i = self.pos.pop(mid, None)
+        if i is None:
+            return False
+        last = self.n - 1
+        if i != last:
+            self.mat[i] = self.mat[last]
+            self.ids_list[i] = self.ids_list[last]
+            self.pos[self.ids_list[i]] = i
+        self.ids_list.pop()
+        self.n -= 1
+        if self.mat.shape[0] > self.MIN_CAPACITY and self.n < self.mat.shape[0] // 4:
+            self._resize(max(2 * self.n, self.MIN_CAPACITY))
+        return True
+
+    def compact(self):
+        pass
+
+    def _scores(self, q: np.ndarray) -> np.ndarray:
+        qv = q.reshape(-1).astype("float32")
+        if self.dtype == np.float32:
+            return self.mat[: self.n] @ qv
+        sims = np.empty(self.n, dtype="float32")
+        for start in range(0, self.n, self.SCORE_BLOCK):
+            stop = min(start + self.SCORE_BLOCK, self.n)
+            sims[start:stop] = self.mat[start:stop].astype("float32") @ qv
+        return sims
+
+    def search(self, q: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        if self.n == 0 or k <= 0:
+            return []
+        sims = self._scores(q)
+        k = min(k, self.n)
+        if k < self.n:
+            top = np.argpartition(-sims, k - 1)[:k]
+            top = top[np.argsort(-sims[top])]
+        else:
+            top = np.argsort(-sims)
+        return [(self.ids_list[i], float(sims[i])) for i in top.tolist()]
+
+    def stats(self) -> dict:
+        return {"live": self.n, "stored": self.n, "tombstones": 0, "capacity": int(self.mat.shape[0]), "dtype": self.dtype.name}
+
+    def _detach(self):
+        """Copy a snapshot mapping into memory and close it, so the snapshot file can be replaced
+        (an open mapping blocks os.replace on Windows)."""
+        if isinstance(self.mat, np.memmap):
+            mapped = self.mat
+            self.mat = np.array(mapped)
+            if mapped._mmap is not None:
+                mapped._mmap.close()
+
+    def dump(self) -> Tuple[bytes, dict]:
+        self._detach()
+        return self.mat[: self.n].tobytes(), {"ids": list(self.ids_list), "dtype": self.dtype.name}
+
+    @classmethod
+    def restore(cls, dim: int, path: str, state: dict) -> "_NumpyScope":
+        sc = cls(dim)
+        sc.ids_list = list(state["ids"])
+        sc.n = len(sc.ids_list)
+        if sc.n:
+            # Copy-on-write mapping: reads come from the page cache, writes stay private. It lasts
+            # until the next snapshot, which copies the rows into memory first (see _detach)
+            stored = np.dtype(state.get("dtype", "float32"))
+            if VECTOR_INDEX_MMAP and stored == sc.dtype:
+                sc.mat = np.memmap(path, dtype=stored, mode="c", shape=(sc.n, dim))
+            else:
+                sc.mat = np.fromfile(path, dtype=stored, count=sc.n * dim).reshape(sc.n, dim).astype(sc.dtype, copy=False)
+        sc.pos = {mid: i for i, mid in enumerate(sc.ids_list)}
+        return sc
+
+
+class PineconeWriteBuffer:
+    """
+    Write-behind buffer in front of a Pinecone index. Route handlers only record operations;
+    a daemon thread sends them as batched upserts/deletes per namespace. Operations are keyed
+    by id (last write wins), so a failed batch is simply put back - unless a newer operation
+    for the id arrived meanwhile - and retried with backoff: replaying an upsert or delete is
+    idempotent. Operations being flushed stay visible to `overlay` until Pinecone acknowledges them.
+    """
+
+    def __init__(self, index, batch: int = PINECONE_FLUSH_BATCH, interval: float = PINECONE_FLUSH_SECONDS):
+        self._index = index
+        self.batch = max(1, batch)
+        self.interval = interval
+        # namespace -> id -> ("upsert", values) | ("delete", None)
+        self._pending: Dict[str, Dict[str, Tuple[str, Optional[List[float]]]]] = {}
+        self._inflight: Dict[str, Dict[str, Tuple[str, Optional[List[float]]]]] = {}
+        self._oldest: Optional[float] = None
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._retry_delay = 0.0
+        self.flushed_upserts = self.flushed_deletes = self.requests = self.retries = 0
+        self.last_error: Optional[str] = None
+        self.last_flush_ms: Optional[float] = None
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="pinecone-write-behind", daemon=True)
+            self._thread.start()
+
+    def _put(self, namespace: str, mid: str, op: Tuple[str, Optional[List[float]]]):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Pinecone write buffer is closed")
+            ops = self._pending.setdefault(namespace, {})
+            ops.pop(mid, None)  # re-insert so ids flush in the order they were last written
+            ops[mid] = op
+            if self._oldest is None:
+                # Wake the flusher so it times this first operation
+                self._oldest = time.monotonic()
+                self._cond.notify_all()
+            elif len(ops) >= self.batch:
+                self._cond.notify_all()
+            self._start()
+
+    def upsert(self, namespace: str, mid: str, values: List[float]):
+        self._put(namespace, mid, ("upsert", values))
+
+    def delete(self, namespace: str, mid: str):
+        self._put(namespace, mid, ("delete", None))
+
+    def pending(self, namespace: Optional[str] = None) -> int:
+        """Buffered operations not yet acknowledged (including a flush in progress)."""
+        with self._cond:
+            groups = [self._pending, self._inflight]
+            if namespace is not None:
+                return sum(len(g.get(namespace, {})) for g in groups)
+            return sum(len(ops) for g in groups for ops in g.values())
+
+    def _due(self) -> bool:
+        if not self._pending:
+            return False
+        if self._closed or any(len(ops) >= self.batch for ops in self._pending.values()):
+            return True
+        return time.monotonic() - (self._oldest or 0) >= self.interval
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._due():
+                    if self._closed and not self._pending:
+                        return
+                    timeout = None if self._oldest is None else max(0.0, self._oldest + self.interval - time.monotonic())
+                    self._cond.wait(timeout)
+                self._inflight, self._pending, self._oldest = self._pending, {}, None
+                taken = self._inflight
+            ok = self._send(taken)
+            with self._cond:
+                if not ok:
+                    # Put back what was not superseded while the flush was running
+                    for namespace, ops in taken.items():
+                        pending = self._pending.setdefault(namespace, {})
+                        self._pending[namespace] = {**ops, **pending}
+                    self._oldest = time.monotonic()
+                self._inflight = {}
+                self._cond.notify_all()
+            if not ok:
+                self._retry_delay = min(PINECONE_RETRY_MAX_SECONDS, max(PINECONE_RETRY_SECONDS, 2 * self._retry_delay))
+                time.sleep(self._retry_delay * random.uniform(0.5, 1.0))
+            else:
+                self._retry_delay = 0.0
+
+    @metrics.timed("vector.pinecone_flush")
+    def _send(self, taken: Dict[str, Dict[str, Tuple[str, Optional[List[float]]]]]) -> bool:
+        t0 = time.perf_counter()
+        try:
+            for namespace, ops in taken.items():
+                upserts = [{"id": mid, "values": values} for mid, (kind, values) in ops.items() if kind == "upsert"]
+                deletes = [mid for mid, (kind, _) in ops.items() if kind == "delete"]
+                for i in range(0, len(upserts), self.batch):
+                    self._index.upsert(vectors=upserts[i:i + self.batch], namespace=namespace)
+                    self.requests += 1
+                for i in range(0, len(deletes), self.batch):
+                    self._index.delete(ids=deletes[i:i + self.batch], namespace=namespace)
+                    self.requests += 1
+                self.flushed_upserts += len(upserts)
+                self.flushed_deletes += len(deletes)
+        except Exception as e:
+            self.retries += 1
+            self.last_error = str(e)
+            print(f"[vector_store] Pinecone flush failed, will retry: {e}")
+            return False
+        self.last_flush_ms = round((time.perf_counter() - t0) * 1000, 1)
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything buffered so far is acknowledged by Pinecone (or the timeout passes)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            if self._pending:
+                self._oldest = 0.0  # due now
+                self._start()
+                self._cond.notify_all()
+            while self._pending or self._inflight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def close(self, timeout: float = PINECONE_DRAIN_SECONDS) -> bool:
+        """Flush everything and stop the flusher thread. Returns False if operations were left unsent."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        drained = self.flush(timeout)
+        if not drained:
+            print(f"[vector_store] Pinecone write buffer closed with {self.pending()} unsent operations")
+        return drained
+
+    def overlay(self, namespace: str, q: np.ndarray, results: List[Tuple[str, float]], k: int) -> List[Tuple[str, float]]:
+        """Apply buffered writes to query results: pending deletes are dropped and pending upserts
+        are scored locally (cosine) and merged in."""
+        with self._cond:
+            ops = {**self._inflight.get(namespace, {}), **self._pending.get(namespace, {})}
+        if not ops:
+            return results
+        merged = {mid: score for mid, score in results if mid not in ops}
+        upserts = [(mid, values) for mid, (kind, values) in ops.items() if kind == "upsert"]
+        if upserts:
+            mat = _to_unit_rows([values for _, values in upserts])
+            scores = mat @ q.reshape(-1)
+            merged.update({mid: float(sc) for (mid, _), sc in zip(upserts, scores.tolist())})
+        return sorted(merged.items(), key=lambda kv: kv[1], reverse=True)[:k]
+
+    def stats(self) -> dict:
+        with self._cond:
+            pending = {ns: len(ops) for ns, ops in self._pending.items() if ops}
+            inflight = sum(len(ops) for ops in self._inflight.values())
+        return {
+            "pending": pending,
+            "inflight": inflight,
+            "flushedUpserts": self.flushed_upserts,
+            "flushedDeletes": self.flushed_deletes,
+            "requests": self.requests,
+            "failedFlushes": self.retries,
+            "lastFlushMs": self.last_flush_ms,
+            "lastError": self.last_error,
+        }
+
+
 # Two separate indexes for title and summary scopes
 class VectorStore:
     def __init__(self, dim: int):
         self.dim = dim
         self.backend = os.getenv("VECTOR_BACKEND", "faiss").lower()
         self.use_faiss = _has_faiss and self.backend == "faiss"
-        # in-memory ids and vectors for fallback
-        self._ids_title: List[str] = []
-        self._vecs_title: List[np.ndarray] = []
-        self._ids_summary: List[str] = []
-        self._vecs_summary: List[np.ndarray] = []
-        if self.use_faiss:
-            self._index_title = faiss.IndexFlatIP(dim)
-            self._index_summary = faiss.IndexFlatIP(dim)
-        else:
-            self._index_title = None
-            self._index_summary = None
+        self._lock = threading.RLock()
+        self._dirty = False
+        # When the loaded snapshot was taken (UTC); vectors updated after it may be stale
+        self.snapshot_time: Optional[datetime] = None
+        # Local id-addressable storage per scope (unused in Pinecone mode)
+        scope_cls = _FaissScope if self.use_faiss else _NumpyScope
+        self._scopes = {scope: scope_cls(dim) for scope in SCOPES}
 
         # Pinecone init if selected
         self.use_pinecone = (self.backend == "pinecone")
@@ -60,84 +612,56 @@ class VectorStore:
                 self._index_dim = int(os.getenv("PINECONE_DIM", "0")) or self.dim
             except Exception:
                 self._index_dim = self.dim
+            self._buffer = PineconeWriteBuffer(self._index)
 
-    @staticmethod
-    def _to_unit(vec: np.ndarray) -> np.ndarray:
-        n = np.linalg.norm(vec) + 1e-12
-        return (vec / n).astype("float32")
-
-    def _faiss_add(self, scope: str, ids: List[str], vectors: List[List[float]]):
-        vecs = np.array([self._to_unit(np.array(v, dtype="float32")) for v in vectors], dtype="float32")
-        if scope == "title":
-            self._index_title.add(vecs)  # type: ignore
-            self._ids_title.extend(ids)
-        else:
-            self._index_summary.add(vecs)  # type: ignore
-            self._ids_summary.extend(ids)
-
-    def _fallback_add(self, scope: str, ids: List[str], vectors: List[List[float]]):
-        arrs = [self._to_unit(np.array(v, dtype="float32")) for v in vectors]
-        if scope == "title":
-            self._ids_title.extend(ids)
-            self._vecs_title.extend(arrs)
-        else:
-            self._ids_summary.extend(ids)
-            self._vecs_summary.extend(arrs)
+    def _fit(self, vector) -> List[float]:
+        # Fit vector to the Pinecone index dimension if necessary
+        values = _as_list(vector)
+        tgt = getattr(self, "_index_dim", None)
+        if tgt:
+            if len(values) < tgt:
+                values = [*values, *([0.0] * (tgt - len(values)))]
+            elif len(values) > tgt:
+                values = values[:tgt]
+        return values
 
+    @metrics.timed("vector.upsert")
     def upsert(self, scope: str, id: str, vector: List[float]):
         # Pinecone path
         if self.use_pinecone:
+            # Buffered: returns immediately, the flusher thread sends it in a batch
             namespace = "title" if scope == "title" else "summary"
-            values = vector
-            # Fit vector to index dimension if necessary
-            if hasattr(self, "_index_dim") and self._index_dim:
-                if len(values) < self._index_dim:
-                    values = [*values, *([0.0] * (self._index_dim - len(values)))]
-                elif len(values) > self._index_dim:
-                    values = values[: self._index_dim]
-            self._index.upsert(vectors=[{"id": id, "values": values}], namespace=namespace)
+            self._buffer.upsert(namespace, id, self._fit(vector))
             return
-        # FAISS / fallback path
-        if self.use_faiss:
-            self._faiss_add(scope, [id], [vector])
-        else:
-            self._fallback_add(scope, [id], [vector])
+        # FAISS / fallback path: replaces any existing vector for this id
+        with self._lock:
+            self._scopes[scope].add([id], _to_unit_rows([vector]))
+            self._dirty = True
 
+    @metrics.timed("vector.bulk_load")
     def bulk_load(self, scope: str, items: List[Tuple[str, List[float]]]):
         ids = [i for i, _ in items]
         vecs = [v for _, v in items]
         if not ids:
             return
         if self.use_pinecone:
+            # Synchronous (bulk loads are scripts that need the write to have landed)
             namespace = "title" if scope == "title" else "summary"
-            vecs = []
-            tgt = getattr(self, "_index_dim", None)
-            for i, v in items:
-                values = v
-                if tgt:
-                    if len(values) < tgt:
-                        values = [*values, *([0.0] * (tgt - len(values)))]
-                    elif len(values) > tgt:
-                        values = values[:tgt]
-                vecs.append({"id": i, "values": values})
-            self._index.upsert(vectors=vecs, namespace=namespace)
+            self._index.upsert(vectors=[{"id": i, "values": self._fit(v)} for i, v in items], namespace=namespace)
             return
-        if self.use_faiss:
-            self._faiss_add(scope, ids, vecs)
-        else:
-            self._fallback_add(scope, ids, vecs)
+        with self._lock:
+            self._scopes[scope].add(ids, _to_unit_rows(vecs))
+            self._dirty = True
 
-    def search(self, scope: str, query_vec: List[float], k: int = 10) -> List[Tuple[str, float]]:
+    @metrics.timed("vector.search")
+    def search(self, scope: str, query_vec: List[float], k: int = 10, pending_writes: bool = True) -> List[Tuple[str, float]]:
         if self.use_pinecone:
             namespace = "title" if scope == "title" else "summary"
-            qv = query_vec
-            tgt = getattr(self, "_index_dim", None)
-            if tgt:
-                if len(qv) < tgt:
-                    qv = [*qv, *([0.0] * (tgt - len(qv)))]
-                elif len(qv) > tgt:
-                    qv = qv[:tgt]
-            res = self._index.query(vector=qv, top_k=k, include_values=False, namespace=namespace)
+            qv = self._fit(query_vec)
+            overlay = pending_writes and PINECONE_SEARCH_PENDING
+            # Over-fetch so k results remain after buffered deletes/upserts are applied
+            top_k = min(PINECONE_MAX_TOP_K, k + self._buffer.pending(namespace)) if overlay else k
+            res = self._index.query(vector=qv, top_k=top_k, include_values=False, namespace=namespace)
             matches = getattr(res, "matches", []) or res.get("matches", [])  # supports different client returns
             out: List[Tuple[str, float]] = []
             for m in matches:
@@ -145,51 +669,174 @@ class VectorStore:
                 score = getattr(m, "score", None) or (m.get("score") if isinstance(m, dict) else None)
                 if mid is not None and score is not None:
                     out.append((str(mid), float(score)))
+            if overlay:
+                out = self._buffer.overlay(namespace, _to_unit_rows([qv]), out, k)
             return out
         # Local FAISS / cosine fallback
-        q = self._to_unit(np.array(query_vec, dtype="float32")).reshape(1, -1)
-        if scope == "title":
-            ids, vecs = self._ids_title, self._vecs_title
-            index = self._index_title
-        else:
-            ids, vecs = self._ids_summary, self._vecs_summary
-            index = self._index_summary
-        if self.use_faiss and index is not None:
-            D, I = index.search(q, min(k, len(ids)))  # type: ignore
-            return [(ids[i], float(D[0][j])) for j, i in enumerate(I[0]) if 0 <= i < len(ids)]
-        if not ids:
-            return []
-        mat = np.stack(vecs, axis=0)
-        sims = mat @ q.T
-        sims = sims.reshape(-1)
-        topk_idx = np.argsort(-sims)[:k]
-        return [(ids[i], float(sims[i])) for i in topk_idx]
-
-    def delete(self, id: str):
-        # Pinecone deletion for both namespaces
+        q = _to_unit_rows([query_vec])
+        with self._lock:
+            return self._scopes[scope].search(q, k)
+
+    @metrics.timed("vector.delete")
+    def delete(self, id: str, scope: Optional[str] = None):
+        """Remove a meeting's vectors from both scopes, or only from `scope`."""
+        scopes = SCOPES if scope is None else (scope,)
         if self.use_pinecone:
-            try:
-                self._index.delete(ids=[id], namespace="title")
-            except Exception:
-                pass
-            try:
-                self._index.delete(ids=[id], namespace="summary")
-            except Exception:
-                pass
+            for s in scopes:
+                self._buffer.delete("title" if s == "title" else "summary", id)
             return
-        # Best-effort local deletion (non-FAISS path keeps vectors in memory)
-        if id in self._ids_title:
-            idxs = [i for i, x in enumerate(self._ids_title) if x == id]
-            for i in reversed(idxs):
-                del self._ids_title[i]
-                if i < len(self._vecs_title):
-                    del self._vecs_title[i]
-        if id in self._ids_summary:
-            idxs = [i for i, x in enumerate(self._ids_summary) if x == id]
-            for i in reversed(idxs):
-                del self._ids_summary[i]
-                if i < len(self._vecs_summary):
-                    del self._vecs_summary[i]
+        with self._lock:
+            for s in scopes:
+                self._scopes[s].remove(id)
+            self._dirty = True
+
+    def ids(self, scope: str) -> Set[str]:
+        with self._lock:
+            return self._scopes[scope].ids()
+
+    def size(self, scope: str) -> int:
+        """Number of live vectors in a scope."""
+        return len(self._scopes[scope])
+
+    def compact(self):
+        with self._lock:
+            for sc in self._scopes.values():
+                sc.compact()
+            self._dirty = True
+
+    def stats(self) -> dict:
+        if self.use_pinecone:
+            return {"backend": "pinecone", "writeBuffer": self._buffer.stats()}
+        with self._lock:
+            return {"backend": "faiss" if self.use_faiss else "numpy", **{s: sc.stats() for s, sc in self._scopes.items()}}
+
+    def flush(self, timeout: Optional[float] = PINECONE_DRAIN_SECONDS) -> bool:
+        """Wait for buffered Pinecone writes to land (no-op for local backends)."""
+        return self._buffer.flush(timeout) if self.use_pinecone else True
+
+    def close(self) -> bool:
+        """Flush and stop the Pinecone write buffer at shutdown."""
+        return self._buffer.close() if self.use_pinecone else True
+
+    # --- Snapshot persistence (local backends only) ---
+
+    def save(self, directory: Optional[str] = None) -> bool:
+        """Snapshot both scopes and their id maps to disk. Returns False if nothing was written."""
+        directory = directory or VECTOR_INDEX_DIR
+        if self.use_pinecone or not directory:
+            return False
+        with self._lock:
+            # Serialize under the lock, write files outside it
+            payload = {scope: sc.dump() for scope, sc in self._scopes.items()}
+            kind = self._scopes["title"].kind
+            saved_at = datetime.utcnow()
+            self._dirty = False
+        os.makedirs(directory, exist_ok=True)
+        for scope, (data, state) in payload.items():
+            _write_atomic(os.path.join(directory, f"{scope}.{kind}"), data)
+            _write_atomic(os.path.join(directory, f"{scope}.state.json"), json.dumps(state).encode("utf-8"))
+        meta = {"version": SNAPSHOT_VERSION, "dim": self.dim, "kind": kind, "savedAt": saved_at.isoformat()}
+        _write_atomic(os.path.join(directory, "meta.json"), json.dumps(meta).encode("utf-8"))
+        return True
+
+    def save_if_dirty(self) -> bool:
+        return self.save() if self._dirty else False
+
+    def load(self, directory: Optional[str] = None) -> bool:
+        """Load a snapshot written by save(), memory-mapping the index files when possible."""
+        directory = directory or VECTOR_INDEX_DIR
+        if self.use_pinecone or not directory:
+            return False
+        meta_path = os.path.join(directory, "meta.json")
+        if not os.path.exists(meta_path):
+            return False
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        scope_cls = _FaissScope if self.use_faiss else _NumpyScope
+        found = (meta.get("version"), meta.get("kind"), meta.get("dim"))
+        if found != (SNAPSHOT_VERSION, scope_cls.kind, self.dim):
+            # Incompatible snapshots are ignored; reconcile_with_db rebuilds from Mongo
+            print(f"[vector_store] ignoring snapshot in {directory}: {found} != {(SNAPSHOT_VERSION, scope_cls.kind, self.dim)}")
+            return False
+        scopes = {}
+        for scope in SCOPES:
+            with open(os.path.join(directory, f"{scope}.state.json"), "r", encoding="utf-8") as f:
+                state = json.load(f)
+            scopes[scope] = scope_cls.restore(self.dim, os.path.join(directory, f"{scope}.{scope_cls.kind}"), state)
+        with self._lock:
+            self._scopes = scopes
+            self._dirty = False
+        # Snapshots written before savedAt was recorded: every vector may be stale
+        self.snapshot_time = datetime.fromisoformat(meta["savedAt"]) if meta.get("savedAt") else datetime.min
+        return True
+
+
+async def reconcile_with_db(store: "VectorStore", batch: int = 500):
+    """
+    Bring a local index in line with Mongo: drop vectors for deleted meetings, add vectors that
+    are stored on documents (titleEmbedding/summaryEmbedding) but missing from the index, and
+    re-upsert vectors of documents updated after the loaded snapshot was taken.
+    Runs incrementally in batches so it can be scheduled in the background at startup.
+    """
+    if store.use_pinecone:
+        return
+    try:
+        await _reconcile(store, batch)
+    except Exception as e:
+        print(f"[vector_store] reconcile with Mongo failed: {e}")
+
+
+async def _reconcile(store: "VectorStore", batch: int):
+    from bson import ObjectId
+    from ..db import db  # local import: db is only needed for reconciliation
+    from .embedding_codec import unpack_embedding
+    coll = db()["meetings"]
+    since = None
+    if store.snapshot_time is not None:
+        since = store.snapshot_time - timedelta(seconds=VECTOR_RECONCILE_SLACK_SECONDS)
+    added = removed = refreshed = 0
+    for scope, field in (("title", "titleEmbedding"), ("summary", "summaryEmbedding")):
+        have = store.ids(scope)
+        expected: Set[str] = set()
+        stale: Set[str] = set()
+        async for d in coll.find({field: {"$exists": True, "$ne": None}}, projection={"_id": 1, "updatedAt": 1}):
+            mid = str(d["_id"])
+            expected.add(mid)
+            updated = d.get("updatedAt")
+            if since is not None and updated is not None and updated > since:
+                stale.add(mid)
+        for mid in have - expected:
+            # This scope only: the meeting may still have a vector in the other one
+            store.delete(mid, scope)
+            removed += 1
+        have = store.ids(scope)
+        # Missing vectors, and vectors that may predate the document's last update
+        load = [mid for mid in expected if mid not in have or mid in stale]
+        for i in range(0, len(load), batch):
+            part = [ObjectId(m) for m in load[i:i + batch]]
+            items: List[Tuple[str, np.ndarray]] = []
+            async for d in coll.find({"_id": {"$in": part}}, projection={field: 1}):
+                vec = unpack_embedding(d.get(field))
+                if vec is not None and len(vec) == store.dim:
+                    items.append((str(d["_id"]), vec))
+            store.bulk_load(scope, items)
+            n_refreshed = sum(1 for mid, _ in items if mid in have)
+            refreshed += n_refreshed
+            added += len(items) - n_refreshed
+            await asyncio.sleep(0)  # yield to request handlers between batches
+    if added or removed or refreshed:
+        print(f"[vector_store] reconciled with Mongo: added {added}, refreshed {refreshed}, removed {removed} vectors")
+        await asyncio.to_thread(store.save)
+
+
+async def snapshot_periodically(store: "VectorStore", every: int = VECTOR_SNAPSHOT_SECONDS):
+    while True:
+        await asyncio.sleep(every)
+        try:
+            await asyncio.to_thread(store.save_if_dirty)
+        except Exception as e:
+            print(f"[vector_store] snapshot failed: {e}")
+
 
 # Global store singleton
 _store: Optional[VectorStore] = None
@@ -0,0 +1,104 @@
+"""
+Previous implementations, kept verbatim as oracles: the optimized cleaner and extractive
+summarizer must produce byte-identical output (tests/test_cleaner.py, tests/test_extractive.py).
+The benchmarks in app/scripts also time them as the baseline.
+"""
+import re
+from typing import List
+
+
+# --- transcript cleaner (eight full-string passes) ------------------------------------------
+
+def legacy_clean_transcript(text: str) -> str:
+    """The original cleaner, verbatim: one full-string re.sub per rule."""
+    t = text
+    t = re.sub(r"\[(?:\d{1,2}:)?\d{1,2}:\d{2}\s*(?:AM|PM)?\]", " ", t, flags=re.I)
+    t = re.sub(r"\((?:\d{1,2}:)?\d{1,2}:\d{2}\)", " ", t)
+    t = re.sub(r"\b\d{1,2}:\d{2}(?::\d{2})?\b", " ", t)
+    t = re.sub(r"\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b", " ", t)
+    t = re.sub(r"(?m)^[A-Z][A-Za-z0-9_\- ]{1,30}:\s*", "", t)
+    t = re.sub(r"(?i)\b(um+|uh+|er+|ah+)\b", " ", t)
+    t = re.sub(r"(?m)^\s*[-•*]\s*", "- ", t)
+    t = re.sub(r"\s+", " ", t)
+    return t.strip()
+
+
+# --- extractive summarizer ------------------------------------------------------------------
+
+def legacy_sentence_split(text: str) -> List[str]:
+    sentences = re.sub(r"\n+", " ", text)
+    parts = re.split(r"(?<=[.!?])\s+", sentences)
+    return [s.strip() for s in parts if s and s.strip()]
+
+
+def legacy_score_sentences(sentences: List[str]) -> dict[str, float]:
+    stop = set(
+        "a,an,the,and,or,but,if,then,else,for,of,in,on,at,by,to,from,with,as,that,this,these,those,is,are,was,were,be,been,being,can,could,should,would,may,might,will,shall,do,does,did,have,has,had".split(",")
+    )
+    freq: dict[str, int] = {}
+    for s in sentences:
+        for w in re.findall(r"[a-z0-9'-]+", s.lower()):
+            if w in stop:
+                continue
+            freq[w] = freq.get(w, 0) + 1
+    scores: dict[str, float] = {}
+    for s in sentences:
+        score = 0
+        words = re.findall(r"[a-z0-9'-]+", s.lower())
+        for w in words:
+            if w in stop:
+                continue
+            score += freq.get(w, 0)
+        length = max(5, len(re.findall(r"\S+", s)))
+        scores[s] = score / length
+    return scores
+
+
+def legacy_apply_instruction_filters(sentences: List[str], instructions: str | None) -> List[str]:
+    if not instructions:
+        return sentences
+    instr = instructions.lower()
+    patterns = {
+        "deadlines": re.compile(r"deadline|due|by\s+\d{1,2}\/(\d{1,2}|\d{4})|eod|eow", re.I),
+        "actions": re.compile(r"action|todo|follow[- ]?up|task|next step", re.I),
+        "decisions": re.compile(r"decision|agreed|conclude|finalize", re.I),
+        "risks": re.compile(r"risk|blocker|issue|concern", re.I),
+        "owners": re.compile(r"owner|assign|responsible|who", re.I),
+    }
+    requested = {key: bool(p.search(instr)) for key, p in patterns.items()}
+    if not any(requested.values()):
+        return sentences
+    sentence_matchers = {
+        "deadlines": re.compile(r"deadline|due|by\s+\w+\s*\d{1,2}|\b\d{1,2}\/\d{1,2}\b|eod|eow|tomorrow|next week", re.I),
+        "actions": re.compile(r"\b(we|i|they)\s+(will|need to|must|should)|action|todo|follow[- ]?up|task|next step", re.I),
+        "decisions": re.compile(r"decided|agreed|approved|concluded|finalized", re.I),
+        "risks": re.compile(r"risk|blocker|issue|concern|problem", re.I),
+        "owners": re.compile(r"@?\b[A-Z][a-z]+\b|assigned to|owner|responsible", re.I),
+    }
+    filtered: List[str] = []
+    seen = set()
+    for s in sentences:
+        for key, want in requested.items():
+            if not want:
+                continue
+            if sentence_matchers[key].search(s):
+                if s not in seen:
+                    filtered.append(s)
+                    seen.add(s)
+                break
+    return filtered or sentences
+
+
+def legacy_summary(text: str, instructions: str | None, max_sentences: int = 6) -> str:
+    sentences = legacy_sentence_split(text)
+    if not sentences:
+        return ""
+    filtered = legacy_apply_instruction_filters(sentences, instructions)
+    scores = legacy_score_sentences(filtered)
+    ranked = [s for s, _ in sorted(scores.items(), key=lambda kv: kv[1], reverse=True)]
+    take = min(max_sentences, max(3, int(len(filtered) * 0.3)))
+    selected = sorted(ranked[:take], key=lambda s: sentences.index(s))
+    as_bullets = bool(re.search(r"bullet|point|list", instructions or "", re.I))
+    if as_bullets:
+        return "\n".join([f"• {s}" for s in selected])
+    return " ".join(selected)
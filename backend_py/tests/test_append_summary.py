@@ -0,0 +1,72 @@
+"""Incremental hierarchical merging of chunk summaries for appended transcript segments."""
+import itertools
+import threading
+
+import pytest
+
+from app.services import summarizer
+
+WIDTH = 100  # every partial and merged summary has this length, so groups hold four
+
+
+class _Merger:
+    """Stands in for the merge calls: each output is a new fixed-width token that covers the union
+    of the chunks its inputs covered."""
+
+    def __init__(self):
+        self.covers = {}
+        self.calls = 0
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def leaf(self, chunk: int, version: int) -> str:
+        text = f"chunk{chunk}.v{version}".ljust(WIDTH, ".")
+        self.covers[text] = [(chunk, version)]
+        return text
+
+    def __call__(self, model, prompt: str, stage: str) -> str:
+        assert stage == "merge"
+        group = prompt.split("PARTIAL SUMMARIES:\n", 1)[1].split("\n\n")
+        assert len(group) >= 2
+        with self._lock:
+            self.calls += 1
+            text = f"merge{next(self._ids)}".ljust(WIDTH, ".")
+            self.covers[text] = [c for p in group for c in self.covers[p]]
+        return text
+
+
+@pytest.fixture
+def merger(monkeypatch):
+    m = _Merger()
+    monkeypatch.setattr(summarizer, "_generate", m)
+    monkeypatch.setattr(summarizer, "SUMMARY_REDUCE_MAX_CHARS", 4 * (WIDTH + 2) + 30)
+    return m
+
+
+def test_appends_merge_only_the_last_groups(merger):
+    levels = [[]]
+    calls = []
+    for n in range(1, 400):
+        # Chunk n-1 closes (re-summarized one last time) and chunk n is the new open chunk
+        fresh = [merger.leaf(n - 1, n), merger.leaf(n, n)]
+        before = merger.calls
+        partials, levels = summarizer._merge_appended(None, levels, fresh)
+        calls.append(merger.calls - before)
+        # The synthesis input covers every chunk once, in order, each by its latest summary
+        assert [c for p in partials for c in merger.covers[p]] == [(k, k + 1) for k in range(n)] + [(n, n)]
+        assert sum(len(p) + 2 for p in partials) <= summarizer.SUMMARY_REDUCE_MAX_CHARS
+        # Stored state stays small: only items not yet in a final group, per level
+        assert all(len(level) <= 8 for level in levels)
+    # Cost per append follows the number of levels, not the number of chunks
+    assert max(calls[-100:]) <= 3 * len(levels) <= 18
+    # A full re-merge of 400 partials in groups of four takes over 100 calls
+    assert sum(calls[-100:]) / 100 < 10
+
+
+def test_short_meetings_are_not_merged(merger):
+    levels = [[]]
+    for n in range(1, 4):
+        partials, levels = summarizer._merge_appended(None, levels, [merger.leaf(n - 1, n), merger.leaf(n, n)])
+        assert merger.calls == 0
+        assert len(partials) == n + 1
+    assert levels == [partials[:-1]]
@@ -0,0 +1,82 @@
+"""Mongo cache tier: TTL index set-up; tiered cache counters."""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pymongo.errors import OperationFailure
+
+from app.services import cache
+
+
+class _Database:
+    def __init__(self, coll, collmod_error=None):
+        self.coll = coll
+        self.commands = []
+        self.collmod_error = collmod_error
+
+    def command(self, cmd):
+        self.commands.append(cmd)
+        if self.collmod_error:
+            raise self.collmod_error
+        self.coll.ttl = cmd["index"]["expireAfterSeconds"]
+
+
+class _Collection:
+    """A collection whose createdAt index already exists with `ttl` (None = not a TTL index)."""
+
+    def __init__(self, ttl, collmod_error=None):
+        self.ttl = ttl
+        self.exists = True
+        self.database = _Database(self, collmod_error)
+        self.docs = {}
+
+    def create_index(self, key, expireAfterSeconds):
+        if self.exists and self.ttl != expireAfterSeconds:
+            raise OperationFailure("An equivalent index already exists with different options", code=85)
+        self.exists, self.ttl = True, expireAfterSeconds
+
+    def drop_index(self, keys):
+        self.exists, self.ttl = False, None
+
+    def replace_one(self, query, doc, upsert=False):
+        self.docs[query["_id"]] = doc
+
+    def find_one(self, query, projection=None):
+        return self.docs.get(query["_id"])
+
+
+@pytest.mark.parametrize("existing, collmod_error", [
+    (60, None),  # TTL changed in place with collMod
+    (None, OperationFailure("not a TTL index", code=72)),  # plain index: dropped and rebuilt
+])
+def test_conflicting_ttl_index_is_updated(existing, collmod_error, monkeypatch):
+    coll = _Collection(existing, collmod_error)
+    monkeypatch.setattr(cache, "sync_db", lambda: {"summary_cache": coll})
+    tier = cache.MongoCacheTier("summary_cache", ttl_seconds=3600, max_docs=100)
+    tier.set("k", "v")
+    assert coll.ttl == 3600
+    assert coll.database.commands[0]["collMod"] == "summary_cache"
+    # The tier stays enabled
+    assert tier.get("k") == "v"
+    assert tier._disabled_until == 0.0
+
+
+def test_other_index_errors_disable_the_tier_briefly(monkeypatch):
+    class Broken(_Collection):
+        def create_index(self, key, expireAfterSeconds):
+            raise OperationFailure("not authorized", code=13)
+
+    monkeypatch.setattr(cache, "sync_db", lambda: {"summary_cache": Broken(60)})
+    tier = cache.MongoCacheTier("summary_cache", ttl_seconds=3600, max_docs=100)
+    assert tier.get("k") is None
+    assert tier._disabled_until > 0
+
+
+def test_counters_add_up_under_concurrent_lookups():
+    c = cache.TieredCache("test_counters", maxsize=100)
+    c.set("hit", "v")
+    keys = ["hit", "miss"] * 20000
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(c.get, keys))
+    st = c.stats()
+    assert (st["hitsMemory"], st["hitsPersistent"], st["misses"]) == (20000, 0, 20000)
+    assert st["hitRate"] == 0.5
@@ -0,0 +1,52 @@
+"""Sentence splitting and token-budget chunking in the summarizer."""
+import random
+
+import pytest
+
+from app.services import summarizer
+from app.services.tokens import token_weight
+
+WORDS = ["alpha", "beta", "gamma.", "delta!", "eps?", "Dr.", "你好", "世界。", "再见！", "好吗？", "слово.", "x" * 60]
+
+
+def _cleaned(rng: random.Random) -> str:
+    text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 300)))
+    if rng.random() < 0.3:
+        text = text.replace(" ", "")  # CJK written without spaces
+    return summarizer._clean_transcript(text)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_sentences_restore_the_text(seed):
+    rng = random.Random(seed)
+    for _ in range(200):
+        cleaned = _cleaned(rng)
+        pieces = [p for p in cleaned.split(" ") if p] if rng.random() < 0.5 else [cleaned]
+        assert "".join(summarizer.iter_sentences(pieces)) == " ".join(pieces)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_chunks_keep_the_original_separators(seed):
+    rng = random.Random(seed)
+    for _ in range(200):
+        cleaned = _cleaned(rng)
+        budget = rng.choice([20, 60, 400, 100000])
+        chunks = list(summarizer._chunk_sentences(summarizer.iter_sentences([cleaned]), budget))
+        # Chunks are consecutive slices of the cleaned text, cut only at whitespace or boundaries
+        pos = 0
+        for c in chunks:
+            assert c and c == c.strip()
+            assert token_weight(c) <= budget
+            i = cleaned.index(c, pos)
+            assert not cleaned[pos:i].strip()
+            pos = i + len(c)
+        assert not cleaned[pos:].strip()
+
+
+def test_cjk_sentences_are_not_spaced():
+    text = "今天开会。讨论预算！下一步？" * 50
+    chunks = list(summarizer._chunk_sentences(summarizer.iter_sentences([text]), 30))
+    assert len(chunks) > 1
+    assert all(" " not in c for c in chunks)
+    assert "".join(chunks) == text
+    assert summarizer._clean_and_chunk(text, summarizer.StreamingKey("t"), 100000) == [text]
@@ -0,0 +1,58 @@
+"""The fused, streaming transcript cleaner against the original eight-pass cleaner."""
+import random
+
+import pytest
+
+from app.services import summarizer
+from app.services.summarizer import _clean_transcript, iter_clean_transcript
+from tests.legacy import legacy_clean_transcript
+
+# Tokens chosen to hit every rule and the cases where rules interact across lines
+TOKENS = [
+    "John:", "Mary Ann:", "Bob_2:", "x:", "A", "Z", ":", "um", "uh", "ummm", "er", "ah", "Umm", "ER", "hello",
+    "world.", "ok!", "really?", "[03:45 PM]", "[1:02:03]", "[12:34", "am]", "PM]", "]", "(00:12:34)", "(3:45)",
+    "12:34", "1:02:03", "1:2", "03/12/2025", "3-4-25", "1-2-12:30", "4/5/6", "٣:٤٥", "１２:３４", "-", "•", "*",
+    "\n", "\n", "\n\n", "\n\n\n", "\r\n", " ", "  ", "\t", "\x0c", "\xa0", "　", "\x1c", "é", "",
+    "会议开始。", "我们决定！", "下周？", "李明:", "[10:15] 王芳：", "スケジュール", "\n\n  - ", "\n• ",
+]
+
+
+def _random_text(rng: random.Random, n: int = 60) -> str:
+    return "".join(rng.choice(TOKENS) + rng.choice(["", " ", "", "\n"]) for _ in range(rng.randint(0, n)))
+
+
+def _pieces(rng: random.Random, text: str):
+    """Split text at arbitrary points, as upload chunks decode."""
+    cuts = sorted(rng.randint(0, len(text)) for _ in range(rng.randint(0, 4)))
+    return [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_matches_legacy_cleaner(seed):
+    rng = random.Random(seed)
+    for _ in range(1000):
+        text = _random_text(rng)
+        assert _clean_transcript(text) == legacy_clean_transcript(text), repr(text)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_streaming_matches_legacy_cleaner(seed, monkeypatch):
+    rng = random.Random(seed)
+    for _ in range(1000):
+        text = _random_text(rng)
+        # Tiny blocks so every line break is a candidate cut
+        monkeypatch.setattr(summarizer._iter_line_blocks, "__defaults__", (rng.randint(0, 12),))
+        assert " ".join(iter_clean_transcript(_pieces(rng, text))) == legacy_clean_transcript(text), repr(text)
+
+
+def test_large_transcript_with_default_blocks():
+    rng = random.Random(42)
+    lines = []
+    for i in range(6000):
+        ts = rng.choice(["[12:01 PM] ", "(0:12:34) ", "03/12/2025 14:33 ", ""])
+        lines.append(ts + _random_text(rng, 12).replace("\n", " ") + rng.choice(["", "\n", "\n\n\n"]))
+    text = "\n".join(lines)
+    assert len(text) > 3 * summarizer.CLEAN_BLOCK_CHARS
+    expected = legacy_clean_transcript(text)
+    assert _clean_transcript(text) == expected
+    assert " ".join(iter_clean_transcript(_pieces(rng, text))) == expected
@@ -0,0 +1,38 @@
+"""The linear-time extractive summarizer (pure Python and NumPy scoring) against the previous engine."""
+import random
+
+import pytest
+
+from app.services.extractive import extractive_summary
+from app.scripts.bench_extractive import make_transcript
+from tests.legacy import legacy_summary
+
+INSTRUCTIONS = ["Summarize the meeting", "List the action items and deadlines as bullet points", "What decisions and risks came up?"]
+NOISE = ["Due", "by May 3", "4/5", "we will", "Ann", "@bob", "ok", ".", "!", "?", " ", "  ", "\n", "\n\n", "\n\n\n",
+         "\t", "\xa0", " ", "\x1c", "it's", "x-ray", "THE", "é", "eod", "risk", "agreed", "owner", "12:30",
+         "[03:45 PM]", "03/12/2025", "会议。", "决定！", "风险？", "李明 will", "１２/３"]
+
+
+def _noise(rng: random.Random) -> str:
+    return "".join(rng.choice(NOISE) + rng.choice(["", " ", ". "]) for _ in range(rng.randint(0, 80)))
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_matches_previous_engine(seed):
+    """Small, duplicate-heavy transcripts and token noise, byte for byte."""
+    rng = random.Random(seed)
+    for i in range(250):
+        text = make_transcript(rng.randint(0, 60), seed=rng.randint(0, 10**9)) if i % 2 else _noise(rng)
+        instructions = rng.choice(INSTRUCTIONS + [None, ""])
+        k = rng.randint(1, 10)
+        expected = legacy_summary(text, instructions, k)
+        for use_numpy in (False, True):
+            assert extractive_summary(text, instructions, k, use_numpy=use_numpy) == expected, (use_numpy, text, instructions)
+
+
+@pytest.mark.parametrize("instructions", INSTRUCTIONS)
+def test_large_transcript(instructions):
+    text = make_transcript(3000, seed=5)
+    expected = legacy_summary(text, instructions)
+    assert extractive_summary(text, instructions, use_numpy=False) == expected
+    assert extractive_summary(text, instructions, use_numpy=True) == expected
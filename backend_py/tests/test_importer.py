@@ -0,0 +1,31 @@
+"""Archive parsing for bulk imports."""
+import json
+import zipfile
+
+from app.services import importer
+
+
+def test_item_limit_counts_utf8_bytes(monkeypatch):
+    monkeypatch.setattr(importer, "IMPORT_ITEM_MAX_BYTES", 12)
+    lines = [json.dumps({"title": t, "text": text}).encode() for t, text in [
+        ("ascii", "a" * 12), ("cjk", "会" * 4), ("cjk-long", "会" * 5), ("ascii-long", "a" * 13),
+    ]]
+    items = dict(importer.iter_jsonl(lines))
+    assert isinstance(items["line 1"], dict) and isinstance(items["line 2"], dict)
+    assert isinstance(items["line 3"], ValueError) and isinstance(items["line 4"], ValueError)
+
+
+def test_zip_members(tmp_path, monkeypatch):
+    monkeypatch.setattr(importer, "IMPORT_ITEM_MAX_BYTES", 12)
+    path = tmp_path / "a.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("standup.txt", "会议开始")  # 12 bytes
+        zf.writestr("retro.txt", "会议开始了")  # 15 bytes
+        zf.writestr("more.jsonl", "\n".join(json.dumps({"text": t}) for t in ["ok", "会" * 5]))
+        zf.writestr("image.png", b"\x89PNG")
+    items = dict(importer.iter_archive(str(path)))
+    assert items["standup.txt"] == {"title": "standup", "text": "会议开始", "instructions": None}
+    assert isinstance(items["retro.txt"], ValueError)
+    assert items["more.jsonl:1"]["text"] == "ok"
+    assert isinstance(items["more.jsonl:2"], ValueError)
+    assert isinstance(items["image.png"], ValueError)
@@ -0,0 +1,131 @@
+"""Gemini rate limiter: throttle detection, bucket refunds and streaming concurrency slots."""
+import threading
+import time
+
+import pytest
+
+from app.services import ratelimit
+from app.services.ratelimit import AIMDLimit, ModelLimiter, RateLimitedError, TokenBucket, is_throttled
+
+
+class _Status(Exception):
+    def __init__(self, code: int, message: str = "error"):
+        super().__init__(message)
+        self.code = code
+
+
+class ResourceExhausted(Exception):
+    pass
+
+
+@pytest.mark.parametrize("error, throttled", [
+    (ResourceExhausted("quota"), True),
+    (_Status(429), True),
+    (_Status(503), True),
+    (RuntimeError("429 Quota exceeded for requests per minute"), True),
+    (RuntimeError("Resource has been exhausted (e.g. check quota)."), True),
+    (_Status(400, "request 7429 has 4290 tokens"), False),
+    (RuntimeError("meeting 64f0c4290a1b not found"), False),
+    (ValueError("body of 429 bytes is invalid"), False),
+])
+def test_is_throttled(error, throttled):
+    assert is_throttled(error) is throttled
+
+
+def _limiter(monkeypatch, rpm: int = 0, tpm: int = 0, concurrency: int = 2) -> ModelLimiter:
+    monkeypatch.setattr(ratelimit, "GEMINI_RETRIES", 2)
+    monkeypatch.setattr(ratelimit, "GEMINI_RETRY_BASE_SECONDS", 0.001)
+    monkeypatch.setattr(ratelimit, "GEMINI_QUEUE_TIMEOUT_SECONDS", 0.05)
+    lim = ModelLimiter("test-model")
+    lim.requests = TokenBucket(rpm)
+    lim.tokens = TokenBucket(tpm)
+    lim.concurrency = AIMDLimit(concurrency)
+    return lim
+
+
+def test_queue_timeout_refunds_the_buckets(monkeypatch):
+    lim = _limiter(monkeypatch, rpm=600, tpm=60000, concurrency=1)
+    lim.concurrency.inflight = 1  # the only slot is taken
+    before = (lim.requests.level, lim.tokens.level)
+    with pytest.raises(RateLimitedError):
+        lim.call(lambda: "never", tokens=500)
+    assert lim.requests.level == pytest.approx(before[0], abs=1)
+    assert lim.tokens.level == pytest.approx(before[1], abs=50)
+
+
+def test_token_timeout_refunds_the_request(monkeypatch):
+    lim = _limiter(monkeypatch, rpm=600, tpm=600)
+    lim.tokens.level = 0.0
+    before = lim.requests.level
+    with pytest.raises(RateLimitedError):
+        lim.call(lambda: "never", tokens=500)
+    assert lim.requests.level == pytest.approx(before, abs=1)
+
+
+def test_throttled_calls_are_retried(monkeypatch):
+    lim = _limiter(monkeypatch)
+    attempts = []
+
+    def fn():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ResourceExhausted("slow down")
+        return "ok"
+
+    assert lim.call(fn) == "ok"
+    assert (lim.throttled, lim.retries, lim.concurrency.inflight) == (2, 2, 0)
+    with pytest.raises(RateLimitedError):
+        lim.call(lambda: (_ for _ in ()).throw(ResourceExhausted("always")))
+    with pytest.raises(ValueError):
+        lim.call(lambda: (_ for _ in ()).throw(ValueError("not throttling")))
+    assert lim.concurrency.inflight == 0
+
+
+def test_streams_hold_their_slot_until_done(monkeypatch):
+    lim = _limiter(monkeypatch, concurrency=2)
+    lim.concurrency.limit = 2.0
+    lim.concurrency.max_limit = 2
+    peak = []
+
+    def chunks():
+        for i in range(5):
+            peak.append(lim.concurrency.inflight)
+            time.sleep(0.01)
+            yield i
+
+    def consume():
+        assert list(lim.stream(chunks)) == list(range(5))
+
+    monkeypatch.setattr(ratelimit, "GEMINI_QUEUE_TIMEOUT_SECONDS", 5)
+    threads = [threading.Thread(target=consume) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert max(peak) <= 2
+    assert lim.concurrency.inflight == 0
+    # The whole stream (~50 ms), not the time to the first piece, feeds the latency average
+    assert lim.concurrency.rtt >= 0.04
+
+
+def test_closed_stream_releases_its_slot(monkeypatch):
+    lim = _limiter(monkeypatch)
+    gen = lim.stream(lambda: iter(range(10)))
+    assert next(gen) == 0
+    assert lim.concurrency.inflight == 1
+    gen.close()
+    assert lim.concurrency.inflight == 0
+
+
+def test_stream_retries_until_the_first_piece(monkeypatch):
+    lim = _limiter(monkeypatch)
+    attempts = []
+
+    def start():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ResourceExhausted("slow down")
+        return iter(["a", "b"])
+
+    assert list(lim.stream(start)) == ["a", "b"]
+    assert len(attempts) == 2 and lim.concurrency.inflight == 0
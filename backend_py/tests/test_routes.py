@@ -0,0 +1,23 @@
+"""Request validation in the meetings routes."""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app import routes
+
+
+@pytest.mark.parametrize("text, ok", [
+    ("a" * 12, True),
+    ("会" * 4, True),  # 12 bytes
+    ("会" * 5, False),  # 5 characters, 15 bytes
+    ("a" * 13, False),
+])
+def test_text_field_limit_counts_utf8_bytes(text, ok, monkeypatch):
+    monkeypatch.setattr(routes, "UPLOAD_MAX_BYTES", 12)
+    if ok:
+        assert asyncio.run(routes._read_transcript(text, None)) == text
+    else:
+        with pytest.raises(HTTPException) as e:
+            asyncio.run(routes._read_transcript(text, None))
+        assert e.value.status_code == 413
@@ -0,0 +1,361 @@
+"""
+Randomized upsert / re-upsert / delete sequences against the local vector scopes, checked
+against a reference dict after every step: size() and ids() must follow the live set and
+search must rank the live vectors like a brute-force scan.
+
+Run from backend_py/:  python -m pytest -q tests
+"""
+import random
+
+import numpy as np
+import pytest
+
+from app.services import vector_store as vs
+
+DIM = 16
+
+
+def _unit(rng: np.random.Generator, n: int = 1) -> np.ndarray:
+    return vs._to_unit_rows(rng.standard_normal((n, DIM)))
+
+
+def _expected_top(ref: dict, q: np.ndarray, k: int):
+    ids = list(ref)
+    scores = np.stack([ref[mid] for mid in ids]) @ q.reshape(-1)
+    order = np.argsort(-scores)[:k]
+    return [(ids[i], float(scores[i])) for i in order.tolist()]
+
+
+def _check_exact_search(scope, ref: dict, rng: np.random.Generator, k: int = 5):
+    q = _unit(rng)
+    got = scope.search(q, k)
+    want = _expected_top(ref, q, k) if ref else []
+    assert [mid for mid, _ in got] == [mid for mid, _ in want]
+    assert np.allclose([s for _, s in got], [s for _, s in want], atol=1e-4)
+
+
+def _check_ann_search(scope, ref: dict, rng: np.random.Generator, k: int = 5):
+    if not ref:
+        assert scope.search(_unit(rng), k) == []
+        return
+    mid = rng.choice(sorted(ref))
+    got = scope.search(ref[mid].reshape(1, -1), k)
+    ids = [m for m, _ in got]
+    assert len(ids) == len(set(ids)) == min(k, len(ref))
+    assert set(ids) <= set(ref)
+    # A stored vector is its own nearest neighbour
+    assert ids[0] == mid
+
+
+def _random_ops(scope, ref: dict, steps: int, seed: int, check_search, pool: int = 120):
+    """Apply random single and batched upserts (new ids, re-upserts, ids repeated within a batch)
+    and deletes (live and unknown ids) to `scope`, mirroring them in `ref`."""
+    rnd = random.Random(seed)
+    rng = np.random.default_rng(seed)
+    for step in range(steps):
+        op = rnd.random()
+        if op < 0.45:
+            mid = f"m{rnd.randrange(pool)}"
+            vec = _unit(rng)
+            scope.add([mid], vec)
+            ref[mid] = vec[0]
+        elif op < 0.65:
+            ids = [f"m{rnd.randrange(pool)}" for _ in range(rnd.randint(1, 12))]
+            mat = _unit(rng, len(ids))
+            scope.add(ids, mat)
+            for mid, row in zip(ids, mat):
+                ref[mid] = row  # last write wins within a batch
+        else:
+            mid = f"m{rnd.randrange(pool)}"
+            assert scope.remove(mid) == (mid in ref)
+            ref.pop(mid, None)
+        assert len(scope) == len(ref)
+        assert scope.ids() == set(ref)
+        if step % 10 == 0:
+            check_search(scope, ref, rng)
+    check_search(scope, ref, rng)
+
+
+@pytest.fixture
+def small_tombstone_limits(monkeypatch):
+    # Compact often so random sequences exercise it
+    monkeypatch.setattr(vs, "VECTOR_TOMBSTONE_MIN", 4)
+    monkeypatch.setattr(vs, "VECTOR_TOMBSTONE_RATIO", 0.2)
+
+
+# --- NumPy fallback ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("seed", range(5))
+def test_numpy_scope_follows_reference(seed):
+    sc = vs._NumpyScope(DIM)
+    ref: dict = {}
+    _random_ops(sc, ref, steps=400, seed=seed, check_search=_check_exact_search)
+    # Rows [0, n) are exactly the live vectors, at the positions recorded for their ids
+    assert sc.ids_list == sorted(sc.pos, key=sc.pos.get)
+    for mid, i in sc.pos.items():
+        assert np.allclose(sc.mat[i], ref[mid], atol=1e-6)
+
+
+def test_numpy_scope_grows_and_shrinks():
+    rng = np.random.default_rng(0)
+    sc = vs._NumpyScope(DIM)
+    ids = [f"m{i}" for i in range(300)]
+    ref = dict(zip(ids, _unit(rng, len(ids))))
+    for mid in ids:
+        sc.add([mid], ref[mid].reshape(1, -1))
+    assert len(sc) == 300 and sc.mat.shape[0] >= 300
+    grown = sc.mat.shape[0]
+    # Deleting from the front swaps the last row into the freed slot
+    for mid in ids[:280]:
+        assert sc.remove(mid)
+        del ref[mid]
+        assert sc.ids() == set(ref)
+    assert sc.mat.shape[0] < grown
+    assert sc.mat.shape[0] >= max(len(sc), vs._NumpyScope.MIN_CAPACITY)
+    for mid, i in sc.pos.items():
+        assert sc.ids_list[i] == mid
+        assert np.allclose(sc.mat[i], ref[mid], atol=1e-6)
+    _check_exact_search(sc, ref, rng, k=len(ref))
+
+
+def test_numpy_scope_float16():
+    sc = vs._NumpyScope(DIM, dtype="float16")
+    rng = np.random.default_rng(1)
+    ref = {f"m{i}": v for i, v in enumerate(_unit(rng, 50))}
+    sc.add(list(ref), np.stack(list(ref.values())))
+    mid = "m7"
+    assert sc.search(ref[mid].reshape(1, -1), 1)[0][0] == mid
+    assert sc.mat.dtype == np.float16
+
+
+# --- FAISS ------------------------------------------------------------------------------------
+
+needs_faiss = pytest.mark.skipif(not vs._has_faiss, reason="faiss not installed")
+
+
+def _check_tombstones(sc):
+    st = sc.stats()
+    assert st["live"] == len(sc)
+    assert st["stored"] == st["live"] + st["tombstones"]
+    assert st["tombstones"] <= max(vs.VECTOR_TOMBSTONE_MIN, vs.VECTOR_TOMBSTONE_RATIO * st["stored"])
+
+
+@pytest.mark.parametrize("seed", range(5))
+@needs_faiss
+def test_faiss_flat_scope_follows_reference(seed, small_tombstone_limits):
+    sc = vs._FaissScope(DIM, index_type="flat")
+    ref: dict = {}
+
+    def check(scope, ref, rng):
+        _check_exact_search(scope, ref, rng)
+        _check_tombstones(scope)
+
+    _random_ops(sc, ref, steps=400, seed=seed, check_search=check)
+    assert vs.index_kind(sc.index) == "flat"
+
+
+@needs_faiss
+def test_faiss_compaction_drops_tombstones(monkeypatch):
+    monkeypatch.setattr(vs, "VECTOR_TOMBSTONE_MIN", 4)
+    monkeypatch.setattr(vs, "VECTOR_TOMBSTONE_RATIO", 0.0)
+    rng = np.random.default_rng(2)
+    sc = vs._FaissScope(DIM, index_type="flat")
+    ref = {f"m{i}": v for i, v in enumerate(_unit(rng, 40))}
+    sc.add(list(ref), np.stack(list(ref.values())))
+    # Re-upsert and delete just under the automatic threshold, then compact explicitly
+    for mid in ["m0", "m1"]:
+        vec = _unit(rng)
+        sc.add([mid], vec)
+        ref[mid] = vec[0]
+    for mid in ["m2", "m3"]:
+        sc.remove(mid)
+        del ref[mid]
+    assert sc.stats()["tombstones"] == 4
+    _check_exact_search(sc, ref, rng)
+    sc.compact()
+    assert sc.stats() == {"type": "flat", "live": len(ref), "stored": len(ref), "tombstones": 0}
+    assert sc.ids() == set(ref)
+    _check_exact_search(sc, ref, rng, k=len(ref))
+    # The fifth tombstone crosses VECTOR_TOMBSTONE_MIN and compacts automatically
+    for mid in ["m4", "m5", "m6", "m7", "m8"]:
+        sc.remove(mid)
+        del ref[mid]
+    assert sc.stats()["tombstones"] == 0
+    assert sc.stats()["stored"] == len(ref)
+
+
+@needs_faiss
+@pytest.mark.parametrize("kind", ["hnsw", "ivf"])
+@pytest.mark.parametrize("seed", range(3))
+def test_faiss_ann_migration_follows_reference(kind, seed, small_tombstone_limits, monkeypatch):
+    monkeypatch.setattr(vs, "VECTOR_ANN_THRESHOLD", 60)
+    sc = vs._FaissScope(DIM, index_type=kind)
+    ref: dict = {}
+    rng = np.random.default_rng(seed)
+    # Below the threshold the scope stays flat (and exact)
+    first = {f"a{i}": v for i, v in enumerate(_unit(rng, 59))}
+    sc.add(list(first), np.stack(list(first.values())))
+    ref.update(first)
+    assert vs.index_kind(sc.index) == "flat"
+    _check_exact_search(sc, ref, rng)
+    # Crossing it rebuilds the index as `kind` with the same live vectors
+    vec = _unit(rng)
+    sc.add(["a59"], vec)
+    ref["a59"] = vec[0]
+    assert vs.index_kind(sc.index) == kind
+    assert sc.ids() == set(ref) and sc.stats()["tombstones"] == 0
+    _check_ann_search(sc, ref, rng)
+    if kind == "ivf":
+        assert sc.trained_on == 60
+    # Random traffic on the ANN index, with ids that do not collide with the initial ones
+    _random_ops(sc, ref, steps=300, seed=seed, check_search=_check_ann_search, pool=200)
+    assert vs.index_kind(sc.index) == kind
+    _check_tombstones(sc)
+    if kind == "ivf":
+        # Growing past twice the training size retrains the IVF index
+        more = {f"b{i}": v for i, v in enumerate(_unit(rng, 2 * sc.trained_on + 1 - len(ref)))}
+        sc.add(list(more), np.stack(list(more.values())))
+        ref.update(more)
+        assert sc.trained_on == len(ref)
+        _check_ann_search(sc, ref, rng)
+
+
+@pytest.mark.parametrize("use_faiss", [pytest.param(True, marks=needs_faiss), False])
+def test_store_size_and_ids_follow_upserts_and_deletes(use_faiss, monkeypatch):
+    monkeypatch.setenv("VECTOR_BACKEND", "faiss")
+    monkeypatch.setattr(vs, "_has_faiss", use_faiss)
+    store = vs.VectorStore(DIM)
+    rnd = random.Random(3)
+    rng = np.random.default_rng(3)
+    refs = {scope: {} for scope in vs.SCOPES}
+    for _ in range(300):
+        scope = rnd.choice(vs.SCOPES)
+        mid = f"m{rnd.randrange(60)}"
+        if rnd.random() < 0.7:
+            vec = _unit(rng)[0]
+            store.upsert(scope, mid, vec.tolist())
+            refs[scope][mid] = vec
+        else:
+            # delete() drops the meeting from both scopes
+            store.delete(mid)
+            for ref in refs.values():
+                ref.pop(mid, None)
+        for s, ref in refs.items():
+            assert store.size(s) == len(ref)
+            assert store.ids(s) == set(ref)
+    for s, ref in refs.items():
+        q = _unit(rng)[0]
+        got = store.search(s, q.tolist(), k=5)
+        assert [m for m, _ in got] == [m for m, _ in _expected_top(ref, q, 5)]
+
+
+# --- snapshots and reconciliation -------------------------------------------------------------
+
+@pytest.mark.parametrize("use_faiss", [pytest.param(True, marks=needs_faiss), False])
+@pytest.mark.parametrize("mmap", [True, False])
+def test_snapshot_round_trip_and_resave(use_faiss, mmap, tmp_path, monkeypatch):
+    monkeypatch.setenv("VECTOR_BACKEND", "faiss")
+    monkeypatch.setattr(vs, "_has_faiss", use_faiss)
+    monkeypatch.setattr(vs, "VECTOR_INDEX_MMAP", mmap)
+    rng = np.random.default_rng(4)
+    store = vs.VectorStore(DIM)
+    ref = {f"m{i}": v for i, v in enumerate(_unit(rng, 30))}
+    store.bulk_load("title", [(mid, v.tolist()) for mid, v in ref.items()])
+    assert store.save(str(tmp_path))
+
+    loaded = vs.VectorStore(DIM)
+    assert loaded.load(str(tmp_path))
+    assert loaded.ids("title") == set(ref) and loaded.size("summary") == 0
+    q = _unit(rng)[0]
+    assert [m for m, _ in loaded.search("title", q.tolist(), k=5)] == [m for m, _ in _expected_top(ref, q, 5)]
+    # Writing to the restored index and snapshotting over the files it was loaded from
+    vec = _unit(rng)[0]
+    loaded.upsert("title", "m0", vec.tolist())
+    ref["m0"] = vec
+    loaded.delete("m1")
+    del ref["m1"]
+    assert loaded.save(str(tmp_path))
+    again = vs.VectorStore(DIM)
+    assert again.load(str(tmp_path))
+    assert again.ids("title") == set(ref)
+    assert [m for m, _ in again.search("title", q.tolist(), k=5)] == [m for m, _ in _expected_top(ref, q, 5)]
+
+
+def test_reconcile_deletes_per_scope(tmp_path, monkeypatch):
+    import asyncio
+    from bson import ObjectId
+    from app import db as app_db
+    from app.scripts.fakes import FakeDatabase, _FakeClient
+    from app.services.embedding_codec import pack_embedding
+
+    database = FakeDatabase()
+    monkeypatch.setattr(app_db, "_client", _FakeClient())
+    monkeypatch.setattr(app_db, "_db", database)
+    monkeypatch.setattr(vs, "VECTOR_INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(vs, "_has_faiss", False)
+    rng = np.random.default_rng(5)
+    both, summary_only, gone = ObjectId(), ObjectId(), ObjectId()
+    vecs = {mid: _unit(rng)[0] for mid in (both, summary_only, gone)}
+    database["meetings"].docs = {
+        both: {"_id": both, "titleEmbedding": pack_embedding(vecs[both].tolist()), "summaryEmbedding": pack_embedding(vecs[both].tolist())},
+        summary_only: {"_id": summary_only, "titleEmbedding": None, "summaryEmbedding": pack_embedding(vecs[summary_only].tolist())},
+    }
+    store = vs.VectorStore(DIM)
+    for mid, vec in vecs.items():
+        for scope in vs.SCOPES:
+            store.upsert(scope, str(mid), vec.tolist())
+    loads = []
+    real_bulk_load = store.bulk_load
+    monkeypatch.setattr(store, "bulk_load", lambda scope, items: (loads.append((scope, len(items))), real_bulk_load(scope, items)))
+
+    asyncio.run(vs._reconcile(store, 500))
+    assert store.ids("title") == {str(both)}
+    assert store.ids("summary") == {str(both), str(summary_only)}
+    # The summary vector of a meeting without a title embedding was kept, not deleted and re-added
+    assert all(n == 0 for _, n in loads)
+
+
+def test_reconcile_refreshes_vectors_updated_after_the_snapshot(tmp_path, monkeypatch):
+    import asyncio
+    from datetime import datetime, timedelta
+    from bson import ObjectId
+    from app import db as app_db
+    from app.scripts.fakes import FakeDatabase, _FakeClient
+    from app.services.embedding_codec import pack_embedding
+
+    database = FakeDatabase()
+    monkeypatch.setattr(app_db, "_client", _FakeClient())
+    monkeypatch.setattr(app_db, "_db", database)
+    monkeypatch.setattr(vs, "_has_faiss", False)
+    rng = np.random.default_rng(6)
+    edited, untouched = ObjectId(), ObjectId()
+    old = {mid: _unit(rng)[0] for mid in (edited, untouched)}
+    long_ago = datetime.utcnow() - timedelta(days=1)
+    database["meetings"].docs = {
+        mid: {"_id": mid, "updatedAt": long_ago, "titleEmbedding": pack_embedding(v.tolist()), "summaryEmbedding": pack_embedding(v.tolist())}
+        for mid, v in old.items()
+    }
+    store = vs.VectorStore(DIM)
+    for mid, vec in old.items():
+        for scope in vs.SCOPES:
+            store.upsert(scope, str(mid), vec.tolist())
+    assert store.save(str(tmp_path))
+    # The meeting is edited after the snapshot, then the process dies before the next one
+    new = _unit(rng)[0]
+    database["meetings"].docs[edited].update(
+        updatedAt=datetime.utcnow(), titleEmbedding=pack_embedding(new.tolist()), summaryEmbedding=pack_embedding(new.tolist()))
+    store.upsert("title", str(edited), new.tolist())
+
+    restarted = vs.VectorStore(DIM)
+    assert restarted.load(str(tmp_path))
+    assert restarted.snapshot_time is not None
+    loads = []
+    real_bulk_load = restarted.bulk_load
+    monkeypatch.setattr(restarted, "bulk_load", lambda scope, items: (loads.append((scope, [m for m, _ in items])), real_bulk_load(scope, items)))
+    asyncio.run(vs._reconcile(restarted, 500))
+    # Only the edited meeting is re-read, and its new vector replaces the snapshot's
+    assert loads == [("title", [str(edited)]), ("summary", [str(edited)])]
+    for scope in vs.SCOPES:
+        assert restarted.ids(scope) == {str(edited), str(untouched)}
+        (mid, score), = restarted.search(scope, new.tolist(), k=1)
+        assert mid == str(edited) and score == pytest.approx(1.0, abs=1e-5)
@@ -58,8 +58,9 @@ export default function MeetingDetailPage() {
     try {
       setLoading(true);
       setError(null);
-      await api.sendEmail(meeting._id, to, meeting.title || 'Meeting Summary', meeting.summary || '');
-      setNotice('Email sent successfully.');
+      const queued = await api.sendEmail(meeting._id, to, meeting.title || 'Meeting Summary', meeting.summary || '');
+      setNotice('Email queued for delivery.');
+      if (queued?.jobId) watchEmail(queued.jobId);
     } catch (e: any) {
       setError(e?.message || 'Failed to send email');
     } finally {
@@ -67,6 +68,20 @@ export default function MeetingDetailPage() {
     }
   }
 
+  // Delivery (with retries) happens in the background; report its outcome when it is known
+  async function watchEmail(jobId: string) {
+    try {
+      const job = await api.waitForJob(jobId);
+      if (job?.status === 'done') setNotice('Email sent.');
+      else if (job?.status === 'failed' || job?.status === 'cancelled') {
+        setNotice(null);
+        setError(job.error || 'Failed to send email');
+      }
+    } catch {
+      // The job status is unavailable; the queued notice stands
+    }
+  }
+
   if (loading) return <p className="muted">Loading…</p>;
   if (error) return <p className="text-red-400">{error}</p>;
   if (!meeting) return <p className="muted">Not found</p>;
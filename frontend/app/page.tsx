@@ -98,12 +98,23 @@ export default function ImprovedSummaryInterface() {
     try {
       setLoading(true);
       setError(null);
-      await api.sendEmail(meeting._id, to, meeting.title || 'Meeting Summary');
+      const queued = await api.sendEmail(meeting._id, to, meeting.title || 'Meeting Summary');
+      const count = `${to.length} recipient${to.length > 1 ? 's' : ''}`;
       toast({
-        title: "Email sent successfully",
-        description: `Summary sent to ${to.length} recipient${to.length > 1 ? 's' : ''}.`,
+        title: "Email queued",
+        description: `Sending summary to ${count}.`,
       });
       setRecipients('');
+      // Delivery (with retries) happens in the background; report its outcome when it is known
+      if (queued?.jobId) {
+        api.waitForJob(queued.jobId).then(job => {
+          if (job?.status === 'done') {
+            toast({ title: "Email sent", description: `Summary delivered to ${count}.` });
+          } else if (job?.status === 'failed' || job?.status === 'cancelled') {
+            toast({ title: "Email failed", description: job.error || 'The email could not be delivered.', variant: "destructive" });
+          }
+        }).catch(() => {});
+      }
     } catch (e: any) {
       const errorMessage = e?.message || 'Failed to send email';
       setError(errorMessage);
@@ -53,6 +53,22 @@ export const api = {
     return handle(res);
   },
 
+  async getJob(jobId: string) {
+    const res = await fetch(`${BASE}/api/meetings/jobs/${jobId}`, { cache: 'no-store' });
+    return handle(res);
+  },
+
+  // Poll a background job until it finishes or `timeoutMs` passes; returns its last known state
+  async waitForJob(jobId: string, timeoutMs = 120000, intervalMs = 1500) {
+    const deadline = Date.now() + timeoutMs;
+    let job = await api.getJob(jobId);
+    while (!['done', 'failed', 'cancelled'].includes(job?.status) && Date.now() < deadline) {
+      await new Promise(resolve => setTimeout(resolve, intervalMs));
+      job = await api.getJob(jobId);
+    }
+    return job;
+  },
+
   async searchMeetings(q: string, scope: 'title' | 'summary' | 'both' = 'both', limit = 10) {
     const url = `${BASE}/api/meetings/search?q=${encodeURIComponent(q)}&scope=${scope}&limit=${limit}`;
     const res = await fetch(url, { cache: 'no-store' });